@@ -0,0 +1,115 @@
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import keyword_matcher
+from analyzed_message import AnalyzedMessage
+from crisis_detector import CrisisDetector
+from metrics import LatencyHistogram
+
+CRISIS = 'crisis'
+NORMAL = 'normal'
+
+
+class Overloaded(Exception):
+    """A lane's queue is full; the client should retry later"""
+
+
+class _Lane:
+    """One priority class: a worker pool plus queue and latency counters"""
+
+    def __init__(self, name, workers, max_queue):
+        self.name = name
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'admission-{name}')
+        self.workers = workers
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait = LatencyHistogram()
+        self.service = LatencyHistogram()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, args, kwargs):
+        with self._lock:
+            if self.max_queue is not None and self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded(f"{self.name} queue is full")
+            self.waiting += 1
+        return self.executor.submit(self._run, time.perf_counter(), fn, args, kwargs)
+
+    def _run(self, queued_at, fn, args, kwargs):
+        started = time.perf_counter()
+        with self._lock:
+            self.waiting -= 1
+            self.running += 1
+        self.wait.record(started - queued_at)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.service.record(time.perf_counter() - started)
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'queued': self.waiting,
+            'running': self.running,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'wait': self.wait.summary(),
+            'service': self.service.summary()
+        }
+
+
+class AdmissionController:
+    """Admit request work into priority lanes.
+
+    A cheap screen runs on the message as the request arrives: a hit on
+    one of the app's own crisis phrases (``screen_phrases``, by default
+    CrisisDetector's suicide and self-harm keywords) in the message's
+    shared keyword scan. Urgency words such as "right now" do not count.
+    Crisis work goes to its own reserved worker pool, so it never waits
+    behind voice uploads or speech synthesis; its queue holds at most
+    ``crisis_max_queue`` requests, and crisis work beyond that joins the
+    normal queue. The normal queue is bounded too: once ``max_queue``
+    requests are waiting, new work is rejected with ``Overloaded`` instead
+    of piling up. The request thread blocks until its work finishes, so
+    handlers keep their shape.
+    """
+
+    def __init__(self, normal_workers=8, crisis_workers=2, max_queue=64, crisis_max_queue=16, screen_phrases=()):
+        if not screen_phrases:
+            keywords = CrisisDetector().crisis_keywords
+            screen_phrases = keywords['suicide'] + keywords['self_harm']
+        phrases = sorted({phrase.lower() for phrase in screen_phrases})
+        # Controllers with the same phrases share one lexicon in the shared matcher
+        self.screen_lexicon = f"admission.screen.{hashlib.sha1(repr(phrases).encode('utf-8')).hexdigest()[:12]}"
+        keyword_matcher.register_lexicon(self.screen_lexicon, {'crisis': phrases})
+        self.lanes = {
+            CRISIS: _Lane(CRISIS, crisis_workers, crisis_max_queue),
+            NORMAL: _Lane(NORMAL, normal_workers, max_queue)
+        }
+
+    def priority_for(self, text):
+        """CRISIS when the screen finds one of the crisis phrases in the text, else NORMAL"""
+        return CRISIS if text and AnalyzedMessage.of(text).keywords.any(self.screen_lexicon) else NORMAL
+
+    def submit(self, priority, fn, *args, **kwargs):
+        if priority == CRISIS:
+            try:
+                return self.lanes[CRISIS].submit(fn, args, kwargs)
+            except Overloaded:
+                pass  # counted as rejected by the crisis lane; the work still gets a place in the normal queue
+        return self.lanes[NORMAL].submit(fn, args, kwargs)
+
+    def run(self, priority, fn, *args, **kwargs):
+        """Run fn in the priority's lane and return its result"""
+        return self.submit(priority, fn, *args, **kwargs).result()
+
+    def stats(self):
+        return {name: lane.stats() for name, lane in self.lanes.items()}
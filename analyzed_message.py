@@ -0,0 +1,81 @@
+import re
+import time
+
+import keyword_matcher
+import sentiment
+import text_normalizer
+from nlp_resources import shared_resources
+
+
+class AnalyzedMessage:
+    """One user message, analyzed once and shared by every analyzer.
+
+    Build it once per request and pass it wherever the raw text used to go.
+    Each stage (lowercased text, letters-only text, tokens, shortcut-expanded
+    text, keyword scans, sentiment) is computed on first access and then
+    reused. ``timings`` holds the seconds each stage took the one time it
+    ran, and ``reuses`` counts how often a later reader got it for free.
+    Analyzers can add their own stages with ``stage``.
+    """
+
+    def __init__(self, text, resources=None):
+        self.text = text
+        self.resources = resources or shared_resources
+        self.timings = {}
+        self.reuses = {}
+        self._values = {}
+
+    @classmethod
+    def of(cls, text, resources=None):
+        """Return text unchanged if it is already analyzed, else analyze it"""
+        return text if isinstance(text, cls) else cls(text, resources)
+
+    def stage(self, name, compute):
+        """Return the named value, computing and timing it on first use"""
+        if name in self._values:
+            self.reuses[name] = self.reuses.get(name, 0) + 1
+            return self._values[name]
+        started = time.perf_counter()
+        value = compute()
+        self.timings[name] = time.perf_counter() - started
+        self._values[name] = value
+        return value
+
+    @property
+    def lower(self):
+        return self.stage('lower', self.text.lower)
+
+    @property
+    def cleaned(self):
+        """Lowercased letters and whitespace only"""
+        return self.stage('cleaned', lambda: re.sub(r'[^a-zA-Z\s]', '', self.lower))
+
+    @property
+    def tokens(self):
+        return self.stage('tokens', lambda: self.resources.tokenizer(self.cleaned))
+
+    @property
+    def normalized(self):
+        """Lowercased, stripped, with chat shortcuts expanded"""
+        return self.stage('normalized', lambda: text_normalizer.normalize(self.lower.strip()))
+
+    @property
+    def keywords(self):
+        """Keyword hits of every registered lexicon in the text"""
+        return self.stage('keywords', lambda: keyword_matcher.scan(self.lower))
+
+    @property
+    def normalized_keywords(self):
+        """Keyword hits of every registered lexicon in the normalized text"""
+        return self.stage('normalized_keywords', lambda: keyword_matcher.scan(self.normalized))
+
+    @property
+    def sentiment(self):
+        """TextBlob-compatible polarity of the lowercased text"""
+        return self.stage('sentiment', lambda: sentiment.polarity(self.lower))
+
+    def report(self):
+        return {
+            'timings_ms': {name: round(seconds * 1e3, 3) for name, seconds in self.timings.items()},
+            'reuses': dict(self.reuses),
+        }
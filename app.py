@@ -1,10 +1,22 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context, url_for
 import os
 import tempfile
 import json
 import re
 import random
 import speech_recognition as sr
+import text_normalizer
+from intent_router import Intent, IntentRouter
+from emotion_lexicon import EMOTION_KEYWORDS, classify_emotion
+from analyzed_message import AnalyzedMessage
+from admission import AdmissionController, Overloaded, NORMAL
+from session_risk import SessionRiskTracker
+from batch import NDJSON, read_items, ndjson_lines
+from parallel import PooledBatchScorer
+from tts_service import TTSService
+from tts_cache import AudioCache, CachedTTS
+from audio_delivery import AudioLinks, send_audio, wants_audio_url
+from audio_profiles import requested_profile
 
 app = Flask(__name__)
 
@@ -13,56 +25,9 @@ engine = None
 training_data = None
 
 def normalize_text_shortcuts(text):
-    shortcuts = {
-        " u ": " you ", "ur ": "your ", " r ": " are ", " rn ": " right now ",
-        "im": "I am", "ive": "I have", "ill": "I will", "dont": "do not",
-        "cant": "cannot", "wont": "will not", "idk": "I don't know",
-        "pls": "please", "bc": "because", "cuz": "because",
-        "af": "very", "lol": "laughing out loud", "brb": "be right back",
-        "tbh": "to be honest", "lmk": "let me know", "rofl": "rolling on floor laughing",
-        "ngl": "not gonna lie", "gtg": "got to go", "ttyl": "talk to you later",
-        "fomo": "fear of missing out", "imo": "in my opinion", "smh": "shaking my head",
-        "finna": "going to", "slay": "succeed", "vibes": "feelings",
-        "lowkey": "kind of", "highkey": "really", "sus": "suspicious",
-        "deadass": "seriously", "no cap": "no lie", "cap": "lie",
-        "goat": "greatest of all time", "bet": "alright", "yass": "yes",
-        "mood": "relatable", "extra": "too much", "basic": "mainstream",
-        "boujee": "fancy", "dope": "cool", "lit": "awesome"
-    }
-    text = f" {text} "
-    for shortcut, full_form in shortcuts.items():
-        text = re.sub(rf'\\b{re.escape(shortcut.strip())}\\b', full_form.strip(), text, flags=re.IGNORECASE)
-    return text.strip()
-
-def classify_emotion(text):
-    emotion_keywords = {
-        "happy": ["happy", "excited", "yay", "glad", "good", "great", "joy", "awesome", "love", "delighted", "pleased", "content"],
-        "sad": ["sad", "upset", "depressed", "cry", "down", "miserable", "hurt", "unhappy", "grief", "blue", "heartbroken"],
-        "angry": ["angry", "mad", "furious", "irritated", "pissed", "annoyed", "rage", "frustrat", "bitter", "resentful"],
-        "anxious": ["anxious", "nervous", "scared", "worried", "stress", "panic", "fear", "tense", "restless", "uneasy", "dread"],
-        "confused": ["confused", "lost", "unsure", "uncertain", "puzzled", "perplexed", "bewildered", "doubt"],
-        "grateful": ["thank", "grateful", "appreciate", "thanks", "thankful", "blessed", "appreciative"],
-        "overwhelmed": ["overwhelmed", "too much", "can't handle", "exhausted", "burnout", "tired", "drained", "fatigued"],
-        "lonely": ["lonely", "alone", "isolated", "abandoned", "disconnected", "rejected", "left out"]
-    }
-    
-    text_lower = text.lower()
-    matched_emotions = {}
-    
-    for emotion, keywords in emotion_keywords.items():
-        for word in keywords:
-            if word in text_lower:
-                if emotion in matched_emotions:
-                    matched_emotions[emotion] += 1
-                else:
-                    matched_emotions[emotion] = 1
-                    
-    if matched_emotions:
-        # Return the emotion with the most matches
-        return max(matched_emotions.items(), key=lambda x: x[1])[0]
-    return "neutral"
-
-def get_response(message):
+    return text_normalizer.normalize(text)
+
+def get_response(message, chat=False):
     def journal_prompt():
         prompts = [
             "Grab your journal and reflect on this: 'What does feeling safe mean to me today?'",
@@ -96,92 +61,13 @@ def get_response(message):
         return random.choice(affirmations)
     
     try:
-        crisis_keywords = ["suicide", "kill myself", "end my life", "don't want to live", "want to die", "harm myself", "hurt myself"]
-        is_crisis = any(keyword in message.lower() for keyword in crisis_keywords)
-        
-        normalized_input = normalize_text_shortcuts(message.lower().strip())
+        analyzed = AnalyzedMessage.of(message)
+        normalized_input = analyzed.normalized
         emotion = classify_emotion(normalized_input)
+        is_question = ("?" in normalized_input) or normalized_input.startswith(QUESTION_WORDS)
         
-        is_question = ("?" in normalized_input) or any(normalized_input.startswith(word) for word in 
-                                                     ["what", "how", "why", "can", "could", "when", "
-        greetings = ["hi", "hello", "hey", "greetings", "howdy", "good morning", "good afternoon", "good evening"]
-        if any(greeting in normalized_input.split() for greeting in greetings):
-            return random.choice([
-                "Hello! How are you feeling today?",
-                "Hi there! I'm here to support you. What's on your mind?",
-                "Hey! How can I help you today?",
-                "Welcome back! How are you doing right now?",
-                "Hello! I'm here for you. How's your day going?"
-            ]), "neutral", False
-        
-        if is_crisis:
-            return "I'm concerned about what you're sharing. If you're in immediate danger, please call emergency services or a crisis helpline right away. Would you like me to provide some crisis resources?", "concerned", True
-        
-        if "depression" in normalized_input and is_question:
-            return "Depression is a mental health condition that causes persistent feelings of sadness and loss of interest. It can affect how you feel, think, and handle daily activities. It's more than just feeling sad temporarily - it's a serious medical condition that usually requires treatment. Have you been experiencing symptoms of depression?", "informative", False
-        
-        if "anxiety" in normalized_input and is_question:
-            return "Anxiety is your body's natural response to stress. It's a feeling of fear or apprehension about what's to come. Everyone experiences anxiety at times, but anxiety disorders involve excessive worry and fear that interfere with daily activities. Is anxiety something you've been struggling with?", "informative", False
-        
-        if "meditation" in normalized_input and is_question:
-            return "Meditation is a practice where you focus your mind on a particular object, thought, or activity to train attention and awareness. It can help reduce stress, control anxiety, improve sleep, and promote emotional health. Would you like me to guide you through a simple meditation exercise?", "calm", False
-        
-        if "therapy" in normalized_input and is_question:
-            return "Therapy or counseling is a process where you work with a mental health professional to address emotional issues, develop coping skills, and improve well-being. There are many types, including cognitive-behavioral therapy (CBT), dialectical behavior therapy (DBT), and psychodynamic therapy. Have you considered talking to a therapist?", "informative", False
-        
-        if "mindfulness" in normalized_input and is_question:
-            return "Mindfulness is the practice of being fully present and engaged in the moment, aware of your thoughts and feelings without judgment. It can help reduce stress, improve focus, and promote well-being. A simple way to practice is by focusing on your breath or paying attention to your senses. Would you like to try a quick mindfulness exercise?", "calm", False
-        
-        if "sleep" in normalized_input and is_question:
-            return "Good sleep is crucial for mental health. Adults typically need 7-9 hours of quality sleep. Try keeping a consistent schedule, creating a relaxing bedtime routine, limiting screen time before bed, and making your bedroom comfortable. If you're having persistent sleep problems, it might be worth discussing with a healthcare provider. What's your sleep routine like?", "helpful", False
-        
-        if "self care" in normalized_input and is_question:
-            return "Self-care includes activities that help maintain your physical, emotional, and mental health. It could be as simple as taking a walk, reading a book, or spending time with loved ones. It also includes basics like proper nutrition, exercise, and adequate sleep. What self-care activities do you enjoy or would like to try?", "supportive", False
-    
-        if emotion == "happy":
-            if is_question:
-                return f"I'm glad you're feeling good! To answer your question about {get_topic(normalized_input)}: {get_mental_health_info(normalized_input)}. Is there anything else about this that you'd like to explore?", "happy", False
-            return "That's wonderful to hear! I'm genuinely happy for you. What specifically brought you joy today? I'd love to hear more about what's working well for you right now.", "happy", False
-        
-        elif emotion == "sad":
-            if is_question:
-                return f"I understand you might be feeling down right now. Regarding your question about {get_topic(normalized_input)}: {get_mental_health_info(normalized_input)}. I hope that helps, and I'm here to talk more about how you're feeling too.", "sad", False
-            return "I hear that you're feeling down, and I want you to know that's completely valid. Sometimes life gets heavy. Would you like to talk about what's contributing to these feelings? I'm here to listen without judgment.", "sad", False
-        
-        elif emotion == "angry":
-            if is_question:
-                return f"I can sense your frustration. To address your question about {get_topic(normalized_input)}: {get_mental_health_info(normalized_input)}. Would you like to discuss what's causing these feelings of frustration too?", "angry", False
-            return "I can hear that you're feeling frustrated or angry, which is a completely valid response. Sometimes anger protects us or signals that boundaries have been crossed. What triggered these feelings? Talking it through might help.", "angry", False
-        
-        elif emotion == "anxious":
-            if is_question:
-                return f"I understand anxiety can make it hard to focus. For your question about {get_topic(normalized_input)}: {get_mental_health_info(normalized_input)}. Taking slow, deep breaths might help with the anxiety you're feeling. Would you like to try a quick breathing exercise?", "anxious", False
-            return "It sounds like you're feeling anxious, which can be really uncomfortable. Sometimes just naming what we're worried about can reduce its power over us. What specific concerns are on your mind right now? We can tackle them one by one.", "anxious", False
-        
-        elif emotion == "confused":
-            if is_question:
-                return f"It's okay to feel uncertain. Regarding your question about {get_topic(normalized_input)}: {get_mental_health_info(normalized_input)}. Does that clarify things, or would you like me to explain further?", "confused", False
-            return "It sounds like things feel a bit unclear right now, which happens to all of us. Let's try to break this down together. What's the most confusing aspect of what you're dealing with? Sometimes talking it through step by step can help find clarity.", "confused", False
-        
-        elif emotion == "grateful":
-            if is_question:
-                return f"It's wonderful to hear that positive tone! To answer your question about {get_topic(normalized_input)}: {get_mental_health_info(normalized_input)}. I appreciate you sharing these positive reflections with me.", "grateful", False
-            return "I really appreciate you sharing that gratitude. Noticing the positive things, even small ones, is so powerful for our wellbeing. What other aspects of your life bring you feelings of appreciation? Building on these positive elements can be really helpful.", "grateful", False
-        
-        elif emotion == "overwhelmed":
-            if is_question:
-                return f"I can tell things feel like a lot right now. For your question about {get_topic(normalized_input)}: {get_mental_health_info(normalized_input)}. When feeling overwhelmed, breaking things down into smaller steps can really help. What feels most urgent to address?", "overwhelmed", False
-            return "I hear that you're feeling overwhelmed, which is completely understandable. When everything feels too much, let's just focus on one thing at a time. What's the most pressing concern right now? We can start there and work through things step by step.", "overwhelmed", False
-        
-        elif emotion == "lonely":
-            if is_question:
-                return f"I'm sorry you're feeling disconnected. About your question on {get_topic(normalized_input)}: {get_mental_health_info(normalized_input)}. Feelings of loneliness are common but can be really difficult. Would you like to talk about ways to feel more connected?", "lonely", False
-            return "I hear that you're feeling lonely, which can be really painful. Connection is a fundamental human need. What kind of connection are you missing most right now? Sometimes even small interactions or reaching out to one person can help reduce these feelings.", "lonely", False
-        if is_question:
-            return get_mental_health_info(normalized_input), "informative", False
-
-        
-        return "I appreciate you sharing that with me. I'm here to support you through whatever you're experiencing. What's on your mind right now? Feel free to ask me any questions or just talk about what you're going through.", "neutral", False
+        intent = intent_router.route(analyzed.lower, normalized_input, emotion, is_question, chat)
+        return intent.respond(normalized_input, is_question)
     
     except Exception as e:
         
@@ -235,64 +121,66 @@ def get_mental_health_info(text):
 
     return "I'm here to provide support and information about mental health, emotions, and wellbeing. I can discuss topics like anxiety, depression, stress management, and self-care strategies. Feel free to ask me about any specific concerns you have."
 
+CALM_PLAYLISTS = [
+    "Peaceful Piano: https://open.spotify.com/playlist/37i9dQZF1DX4sWSpwq3LiO - Perfect for gentle background music while relaxing or working.",
+    "Calm Vibes: https://open.spotify.com/playlist/37i9dQZF1DXaImRpG7HXqp - A mix of gentle acoustic and ambient tracks to help you find peace.",
+    "Deep Sleep: https://open.spotify.com/playlist/37i9dQZF1DWZd79rJ6a7lp - Designed to help you drift off to sleep with soft, ambient sounds.",
+    "Ambient Relaxation: https://open.spotify.com/playlist/37i9dQZF1DX3Ogo9pFvBkY - Instrumental ambient music that creates a peaceful atmosphere.",
+    "Stress Relief: https://open.spotify.com/playlist/37i9dQZF1DWXe9gFZP0gtP - Curated to help reduce anxiety with calming melodies.",
+    "Nature Sounds: https://open.spotify.com/playlist/37i9dQZF1DX4PP3DA4J0N8 - Peaceful natural sounds to help you connect with tranquility.",
+    "Meditation Moments: https://open.spotify.com/playlist/37i9dQZF1DX0jgyAiPl8Af - Perfect companion for mindfulness practices and meditation."
+]
+
+def _playlist_text(playlist):
+    return f"Music can be incredibly helpful for finding calm. Here's a playlist that might help you relax: {playlist} Would you like to try listening to this while practicing some deep breathing?"
+
 def get_calm_playlist():
-    playlists = [
-        "Peaceful Piano: https://open.spotify.com/playlist/37i9dQZF1DX4sWSpwq3LiO - Perfect for gentle background music while relaxing or working.",
-        "Calm Vibes: https://open.spotify.com/playlist/37i9dQZF1DXaImRpG7HXqp - A mix of gentle acoustic and ambient tracks to help you find peace.",
-        "Deep Sleep: https://open.spotify.com/playlist/37i9dQZF1DWZd79rJ6a7lp - Designed to help you drift off to sleep with soft, ambient sounds.",
-        "Ambient Relaxation: https://open.spotify.com/playlist/37i9dQZF1DX3Ogo9pFvBkY - Instrumental ambient music that creates a peaceful atmosphere.",
-        "Stress Relief: https://open.spotify.com/playlist/37i9dQZF1DWXe9gFZP0gtP - Curated to help reduce anxiety with calming melodies.",
-        "Nature Sounds: https://open.spotify.com/playlist/37i9dQZF1DX4PP3DA4J0N8 - Peaceful natural sounds to help you connect with tranquility.",
-        "Meditation Moments: https://open.spotify.com/playlist/37i9dQZF1DX0jgyAiPl8Af - Perfect companion for mindfulness practices and meditation."
-    ]
-    return f"Music can be incredibly helpful for finding calm. Here's a playlist that might help you relax: {random.choice(playlists)} Would you like to try listening to this while practicing some deep breathing?"
+    return _playlist_text(random.choice(CALM_PLAYLISTS))
 
-def get_detailed_breathing_exercise():
-    """Return a detailed breathing exercise with step-by-step instructions"""
-    exercises = [
-        {
-            "name": "Progressive Relaxation Breathing",
-            "steps": [
-                "1. Find a comfortable seated position or lie down.",
-                "2. Take a deep breath in through your nose for 4 counts.",
-                "3. As you inhale, tense your feet and toes.",
-                "4. Hold your breath and the tension for 2 counts.",
-                "5. Exhale slowly through your mouth for 6 counts while releasing the tension.",
-                "6. Take another deep breath, and this time, tense your calves.",
-                "7. Continue this pattern, moving up through your body: thighs, abdomen, chest, arms, shoulders, and face.",
-                "8. Finish with three deep breaths, relaxing your entire body."
-            ],
-            "benefits": "This technique combines deep breathing with progressive muscle relaxation to release physical tension and mental stress."
-        },
-        {
-            "name": "4-7-8 Breathing Technique",
-            "steps": [
-                "1. Sit in a comfortable position with your back straight.",
-                "2. Place the tip of your tongue against the ridge behind your upper front teeth.",
-                "3. Exhale completely through your mouth, making a whoosh sound.",
-                "4. Close your mouth and inhale quietly through your nose for 4 counts.",
-                "5. Hold your breath for 7 counts.",
-                "6. Exhale completely through your mouth for 8 counts, making the whoosh sound.",
-                "7. This completes one breath cycle. Repeat for 3-4 complete breaths."
-            ],
-            "benefits": "Developed by Dr. Andrew Weil, this technique acts as a natural tranquilizer for the nervous system, helping with anxiety, sleep issues, and stress response."
-        },
-        {
-            "name": "Diaphragmatic (Belly) Breathing",
-            "steps": [
-                "1. Lie on your back with knees bent (or sit comfortably).",
-                "2. Place one hand on your upper chest and the other on your abdomen.",
-                "3. Breathe in slowly through your nose, feeling your stomach push against your hand.",
-                "4. Your chest should remain relatively still.",
-                "5. Purse your lips as if sipping through a straw.",
-                "6. Exhale slowly through pursed lips while gently pressing on your abdomen.",
-                "7. Repeat for 5-10 minutes, focusing on the movement of your breath."
-            ],
-            "benefits": "This activates the parasympathetic nervous system, reduces blood pressure, improves core muscle stability, and increases oxygen supply to your body."
-        }
-    ]
-    
-    exercise = random.choice(exercises)
+DETAILED_BREATHING_EXERCISES = [
+    {
+        "name": "Progressive Relaxation Breathing",
+        "steps": [
+            "1. Find a comfortable seated position or lie down.",
+            "2. Take a deep breath in through your nose for 4 counts.",
+            "3. As you inhale, tense your feet and toes.",
+            "4. Hold your breath and the tension for 2 counts.",
+            "5. Exhale slowly through your mouth for 6 counts while releasing the tension.",
+            "6. Take another deep breath, and this time, tense your calves.",
+            "7. Continue this pattern, moving up through your body: thighs, abdomen, chest, arms, shoulders, and face.",
+            "8. Finish with three deep breaths, relaxing your entire body."
+        ],
+        "benefits": "This technique combines deep breathing with progressive muscle relaxation to release physical tension and mental stress."
+    },
+    {
+        "name": "4-7-8 Breathing Technique",
+        "steps": [
+            "1. Sit in a comfortable position with your back straight.",
+            "2. Place the tip of your tongue against the ridge behind your upper front teeth.",
+            "3. Exhale completely through your mouth, making a whoosh sound.",
+            "4. Close your mouth and inhale quietly through your nose for 4 counts.",
+            "5. Hold your breath for 7 counts.",
+            "6. Exhale completely through your mouth for 8 counts, making the whoosh sound.",
+            "7. This completes one breath cycle. Repeat for 3-4 complete breaths."
+        ],
+        "benefits": "Developed by Dr. Andrew Weil, this technique acts as a natural tranquilizer for the nervous system, helping with anxiety, sleep issues, and stress response."
+    },
+    {
+        "name": "Diaphragmatic (Belly) Breathing",
+        "steps": [
+            "1. Lie on your back with knees bent (or sit comfortably).",
+            "2. Place one hand on your upper chest and the other on your abdomen.",
+            "3. Breathe in slowly through your nose, feeling your stomach push against your hand.",
+            "4. Your chest should remain relatively still.",
+            "5. Purse your lips as if sipping through a straw.",
+            "6. Exhale slowly through pursed lips while gently pressing on your abdomen.",
+            "7. Repeat for 5-10 minutes, focusing on the movement of your breath."
+        ],
+        "benefits": "This activates the parasympathetic nervous system, reduces blood pressure, improves core muscle stability, and increases oxygen supply to your body."
+    }
+]
+
+def _exercise_text(exercise):
     response = f"**{exercise['name']}**\n\n"
     response += "\n".join(exercise['steps']) + "\n\n"
     response += f"**Benefits:** {exercise['benefits']}\n\n"
@@ -300,11 +188,164 @@ def get_detailed_breathing_exercise():
     
     return response
 
+def get_detailed_breathing_exercise():
+    """Return a detailed breathing exercise with step-by-step instructions"""
+    return _exercise_text(random.choice(DETAILED_BREATHING_EXERCISES))
+
+# The baseline is_question line was cut off after "when"; these are the words it still listed.
+# Anything else counts as a question only with a "?".
+QUESTION_WORDS = ("what", "how", "why", "can", "could", "when")
+
+GREETING_RESPONSES = [
+    "Hello! How are you feeling today?",
+    "Hi there! I'm here to support you. What's on your mind?",
+    "Hey! How can I help you today?",
+    "Welcome back! How are you doing right now?",
+    "Hello! I'm here for you. How's your day going?"
+]
+
+CRISIS_RESPONSE = "I'm concerned about what you're sharing. If you're in immediate danger, please call emergency services or a crisis helpline right away. Would you like me to provide some crisis resources?"
+
+DEFAULT_RESPONSE = "I appreciate you sharing that with me. I'm here to support you through whatever you're experiencing. What's on your mind right now? Feel free to ask me any questions or just talk about what you're going through."
+
+# Answers to "what is ..." style questions, keyed by the topic they mention
+TOPIC_ANSWERS = {
+    "depression": ("Depression is a mental health condition that causes persistent feelings of sadness and loss of interest. It can affect how you feel, think, and handle daily activities. It's more than just feeling sad temporarily - it's a serious medical condition that usually requires treatment. Have you been experiencing symptoms of depression?", "informative"),
+    "anxiety": ("Anxiety is your body's natural response to stress. It's a feeling of fear or apprehension about what's to come. Everyone experiences anxiety at times, but anxiety disorders involve excessive worry and fear that interfere with daily activities. Is anxiety something you've been struggling with?", "informative"),
+    "meditation": ("Meditation is a practice where you focus your mind on a particular object, thought, or activity to train attention and awareness. It can help reduce stress, control anxiety, improve sleep, and promote emotional health. Would you like me to guide you through a simple meditation exercise?", "calm"),
+    "therapy": ("Therapy or counseling is a process where you work with a mental health professional to address emotional issues, develop coping skills, and improve well-being. There are many types, including cognitive-behavioral therapy (CBT), dialectical behavior therapy (DBT), and psychodynamic therapy. Have you considered talking to a therapist?", "informative"),
+    "mindfulness": ("Mindfulness is the practice of being fully present and engaged in the moment, aware of your thoughts and feelings without judgment. It can help reduce stress, improve focus, and promote well-being. A simple way to practice is by focusing on your breath or paying attention to your senses. Would you like to try a quick mindfulness exercise?", "calm"),
+    "sleep": ("Good sleep is crucial for mental health. Adults typically need 7-9 hours of quality sleep. Try keeping a consistent schedule, creating a relaxing bedtime routine, limiting screen time before bed, and making your bedroom comfortable. If you're having persistent sleep problems, it might be worth discussing with a healthcare provider. What's your sleep routine like?", "helpful"),
+    "self care": ("Self-care includes activities that help maintain your physical, emotional, and mental health. It could be as simple as taking a walk, reading a book, or spending time with loved ones. It also includes basics like proper nutrition, exercise, and adequate sleep. What self-care activities do you enjoy or would like to try?", "supportive")
+}
+
+# (reply when asked a question, reply otherwise) per classified emotion
+EMOTION_RESPONSES = {
+    "happy": (
+        "I'm glad you're feeling good! To answer your question about {topic}: {info}. Is there anything else about this that you'd like to explore?",
+        "That's wonderful to hear! I'm genuinely happy for you. What specifically brought you joy today? I'd love to hear more about what's working well for you right now."
+    ),
+    "sad": (
+        "I understand you might be feeling down right now. Regarding your question about {topic}: {info}. I hope that helps, and I'm here to talk more about how you're feeling too.",
+        "I hear that you're feeling down, and I want you to know that's completely valid. Sometimes life gets heavy. Would you like to talk about what's contributing to these feelings? I'm here to listen without judgment."
+    ),
+    "angry": (
+        "I can sense your frustration. To address your question about {topic}: {info}. Would you like to discuss what's causing these feelings of frustration too?",
+        "I can hear that you're feeling frustrated or angry, which is a completely valid response. Sometimes anger protects us or signals that boundaries have been crossed. What triggered these feelings? Talking it through might help."
+    ),
+    "anxious": (
+        "I understand anxiety can make it hard to focus. For your question about {topic}: {info}. Taking slow, deep breaths might help with the anxiety you're feeling. Would you like to try a quick breathing exercise?",
+        "It sounds like you're feeling anxious, which can be really uncomfortable. Sometimes just naming what we're worried about can reduce its power over us. What specific concerns are on your mind right now? We can tackle them one by one."
+    ),
+    "confused": (
+        "It's okay to feel uncertain. Regarding your question about {topic}: {info}. Does that clarify things, or would you like me to explain further?",
+        "It sounds like things feel a bit unclear right now, which happens to all of us. Let's try to break this down together. What's the most confusing aspect of what you're dealing with? Sometimes talking it through step by step can help find clarity."
+    ),
+    "grateful": (
+        "It's wonderful to hear that positive tone! To answer your question about {topic}: {info}. I appreciate you sharing these positive reflections with me.",
+        "I really appreciate you sharing that gratitude. Noticing the positive things, even small ones, is so powerful for our wellbeing. What other aspects of your life bring you feelings of appreciation? Building on these positive elements can be really helpful."
+    ),
+    "overwhelmed": (
+        "I can tell things feel like a lot right now. For your question about {topic}: {info}. When feeling overwhelmed, breaking things down into smaller steps can really help. What feels most urgent to address?",
+        "I hear that you're feeling overwhelmed, which is completely understandable. When everything feels too much, let's just focus on one thing at a time. What's the most pressing concern right now? We can start there and work through things step by step."
+    ),
+    "lonely": (
+        "I'm sorry you're feeling disconnected. About your question on {topic}: {info}. Feelings of loneliness are common but can be really difficult. Would you like to talk about ways to feel more connected?",
+        "I hear that you're feeling lonely, which can be really painful. Connection is a fundamental human need. What kind of connection are you missing most right now? Sometimes even small interactions or reaching out to one person can help reduce these feelings."
+    )
+}
+
+def _fixed_response(response, emotion, is_crisis=False):
+    return lambda normalized_input, is_question: (response, emotion, is_crisis)
+
+def _breathing_response(normalized_input, is_question):
+    return get_detailed_breathing_exercise(), "calm", False
+
+def _playlist_response(normalized_input, is_question):
+    return get_calm_playlist(), "calm", False
+
+def _greeting_response(normalized_input, is_question):
+    return random.choice(GREETING_RESPONSES), "neutral", False
+
+def _emotion_response(emotion):
+    question_reply, reply = EMOTION_RESPONSES[emotion]
+    def respond(normalized_input, is_question):
+        if is_question:
+            return question_reply.format(topic=get_topic(normalized_input), info=get_mental_health_info(normalized_input)), emotion, False
+        return reply, emotion, False
+    return respond
+
+def _fallback_response(normalized_input, is_question):
+    if is_question:
+        return get_mental_health_info(normalized_input), "informative", False
+    return DEFAULT_RESPONSE, "neutral", False
+
+# Checked in priority order: crisis > breathing/music requests > greeting > topic question > emotion
+INTENTS = [
+    Intent("crisis", 0, _fixed_response(CRISIS_RESPONSE, "concerned", True), source="raw",
+           keywords=("suicide", "kill myself", "end my life", "don't want to live", "want to die", "harm myself", "hurt myself")),
+    Intent("breathing", 10, _breathing_response, source="raw", chat_only=True,
+           keywords=("breathing", "breathe", "breath", "breathing exercise", "calm breathing", "relaxation breathing")),
+    Intent("playlist", 20, _playlist_response, source="raw", chat_only=True,
+           keywords=("playlist", "music", "spotify", "song", "calm", "relax", "peace")),
+    Intent("greeting", 30, _greeting_response,
+           tokens=("hi", "hello", "hey", "greetings", "howdy", "good morning", "good afternoon", "good evening")),
+] + [
+    Intent(f"topic:{topic}", 40 + rank, _fixed_response(answer, label), keywords=(topic,), requires_question=True)
+    for rank, (topic, (answer, label)) in enumerate(TOPIC_ANSWERS.items())
+] + [
+    Intent(f"emotion:{emotion}", 60, _emotion_response(emotion), emotion=emotion)
+    for emotion in EMOTION_RESPONSES
+]
+
+intent_router = IntentRouter("app.intents", INTENTS, Intent("fallback", 100, _fallback_response))
+
+# Crisis messages get a reserved worker pool here, and a reserved speech worker in tts_service
+admission = AdmissionController(screen_phrases=intent_router.intents["crisis"].keywords)
+BUSY_RESPONSE = {'error': "I'm getting a lot of messages right now. Please try again in a moment."}
+
+# Rolling crisis risk per conversation, keyed by the client's session_id
+session_risk = SessionRiskTracker()
+
+def chat_reply(message):
+    """get_response as /chat calls it, routed once per analyzed message"""
+    return message.stage('chat_reply', lambda: get_response(message, chat=True))
+
+def chat_emotions(messages):
+    return [chat_reply(message)[1] for message in messages]
+
+def chat_crises(messages):
+    return [chat_reply(message)[2] for message in messages]
+
+# Bulk scoring for transcripts and audits, with the emotion and crisis flag /chat returns; chunks are admitted
+# in the normal lane, and large inputs are scored in worker processes, forked here before any thread starts
+batch_scorer = PooledBatchScorer(chat_emotions, chat_crises).start()
+
+# Speech synthesis runs in worker processes, one pyttsx3 engine each, with its own bounded queue and a worker
+# reserved for crisis replies; the processes start on first use, not at import
+tts_service = TTSService()
+
+# Synthesized audio is cached in memory by text and voice settings; canned responses are pre-rendered at
+# startup and are the only audio kept on disk
+tts = CachedTTS(tts_service, AudioCache('tts_cache'))
+
+# With ?audio=url, /voice and /speak reply at once with a link; speech is synthesized when it is fetched
+audio_links = AudioLinks(tts)
+
+def canned_responses():
+    """Every fixed response text the bot can send, for pre-rendering speech"""
+    texts = [_playlist_text(playlist) for playlist in CALM_PLAYLISTS]
+    texts += [_exercise_text(exercise) for exercise in DETAILED_BREATHING_EXERCISES]
+    texts += GREETING_RESPONSES + [CRISIS_RESPONSE, DEFAULT_RESPONSE]
+    texts += [answer for answer, _ in TOPIC_ANSWERS.values()]
+    texts += [reply for _, reply in EMOTION_RESPONSES.values()]
+    return texts
+
 def load_speech_components():
     global recognizer, engine
     try:
         from voice_handler import VoiceHandler
-        voice_handler = VoiceHandler()
+        voice_handler = VoiceHandler(tts)
         print("Loaded speech recognition and synthesis components")
         return voice_handler
     except Exception as e:
@@ -321,24 +362,15 @@ def home():
 def chat():
     data = request.json
     message = data.get('message', '')
-    
-    if any(word in message.lower() for word in ["breathing", "breathe", "breath", "breathing exercise", "calm breathing", "relaxation breathing"]):
-        return jsonify({
-            'response': get_detailed_breathing_exercise(),
-            'emotion': 'calm',
-            'is_crisis': False
-        })
-
-    if any(word in message.lower() for word in ["playlist", "music", "spotify", "song", "calm", "relax", "peace"]):
-        return jsonify({
-            'response': get_calm_playlist(),
-            'emotion': 'calm',
-            'is_crisis': False
-        })
+    session_id = data.get('session_id')
     
     try:
-        response, emotion, is_crisis = get_response(message)
-        return jsonify({'response': response, 'emotion': emotion, 'is_crisis': is_crisis})
+        priority = admission.priority_for(message)
+        response, emotion, is_crisis = admission.run(priority, get_response, message, chat=True)
+        risk = session_risk.update(str(session_id) if session_id else None, message)
+        return jsonify({'response': response, 'emotion': emotion, 'is_crisis': is_crisis, 'risk': risk})
+    except Overloaded:
+        return jsonify(BUSY_RESPONSE), 503
     except Exception as e:
         return jsonify({
             'response': "Something feels off on my end. Let's try that again?",
@@ -346,12 +378,39 @@ def chat():
             'is_crisis': False
         })
 
+@app.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    """Score many messages: a JSON {"messages": [...]} body, or NDJSON lines in and out"""
+    run = lambda fn, *args: admission.run(NORMAL, fn, *args)
+    if request.mimetype == NDJSON:
+        items = read_items(request.stream)
+    else:
+        items = (request.get_json(silent=True) or {}).get('messages')
+        if not isinstance(items, list):
+            return jsonify({'error': "Expected a JSON body with a 'messages' list"}), 400
+    
+    # Large inputs stream back one result per line as they are scored
+    if request.mimetype == NDJSON or NDJSON in request.headers.get('Accept', ''):
+        # Headers are already sent when a chunk is rejected, so it becomes an error line instead of a 503
+        results = batch_scorer.stream(items, run, skip_overloaded=True)
+        return Response(stream_with_context(ndjson_lines(results)), mimetype=NDJSON)
+    try:
+        return jsonify({'results': list(batch_scorer.stream(items, run))})
+    except Overloaded:
+        return jsonify(BUSY_RESPONSE), 503
+
 @app.route('/voice', methods=['POST'])
 def voice():
     
     if 'audio' not in request.files:
         return jsonify({'error': 'No audio file provided'}), 400
     
+    # Output profile for the spoken reply, e.g. ?profile=mulaw8k for mobile clients
+    try:
+        profile = requested_profile(request)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     try:
         audio_file = request.files['audio']
         
@@ -382,7 +441,8 @@ def voice():
                 
                  
                 try:
-                    text = voice_handler.recognizer.recognize_google(audio)
+                    # Transcription runs in the normal lane; the transcript decides the priority of the rest
+                    text = admission.run(NORMAL, voice_handler.recognizer.recognize_google, audio)
                 except sr.UnknownValueError:
                     return jsonify({'error': "Sorry, I couldn't understand the audio. Please speak clearly and try again."}), 400
                 except sr.RequestError as e:
@@ -390,22 +450,37 @@ def voice():
                     return jsonify({'error': "Could not request results from speech recognition service. Please check your internet connection and try again."}), 500
                 
                 
-                response_text, emotion, is_crisis = get_response(text)
+                priority = admission.priority_for(text)
+                response_text, emotion, is_crisis = admission.run(priority, get_response, text)
                 
+                reply = {
+                    'text': text,
+                    'response': response_text,
+                    'emotion': emotion,
+                    'is_crisis': is_crisis
+                }
+                
+                if wants_audio_url(request):
+                    token = audio_links.issue(response_text, priority, rate=voice_handler.rate, volume=voice_handler.volume,
+                                              profile=profile)
+                    reply['audio_url'] = url_for('audio_file', token=token)
+                    return jsonify(reply)
              
                 try:
-                    audio_response = voice_handler.text_to_speech(response_text)
+                    reply['audio_response'] = voice_handler.text_to_speech(response_text, priority, profile)
+                except Overloaded:
+                    # The reply is ready; only the speech waits, behind a link the client can fetch later
+                    reply['audio_response'] = None
+                    token = audio_links.issue(response_text, priority, rate=voice_handler.rate, volume=voice_handler.volume,
+                                              profile=profile)
+                    reply['audio_url'] = url_for('audio_file', token=token)
                 except Exception as e:
                     print(f"Text-to-speech error: {str(e)}")
-                    audio_response = None
+                    reply['audio_response'] = None
                 
-                return jsonify({
-                    'text': text,
-                    'response': response_text,
-                    'emotion': emotion,
-                    'is_crisis': is_crisis,
-                    'audio_response': audio_response
-                })
+                return jsonify(reply)
+            except Overloaded:
+                return jsonify(BUSY_RESPONSE), 503
             except Exception as e:
                 print(f"Voice processing error: {str(e)}")
                 return jsonify({'error': f'Error processing voice: {str(e)}'}), 500
@@ -424,15 +499,55 @@ def speak():
     text = request.json['text']
     
     try:
-        if voice_handler:
-            audio_base64 = voice_handler.text_to_speech(text)
+        profile = requested_profile(request)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        if voice_handler and wants_audio_url(request):
+            token = audio_links.issue(text, rate=voice_handler.rate, volume=voice_handler.volume, profile=profile)
+            return jsonify({'audio_url': url_for('audio_file', token=token)})
+        elif voice_handler:
+            audio_base64 = voice_handler.text_to_speech(text, profile=profile)
             return jsonify({'audio': audio_base64})
         else:
             return jsonify({'error': 'Text-to-speech not available'}), 500
+    except Overloaded:
+        return jsonify(BUSY_RESPONSE), 503
     except Exception as e:
         print(f"Text-to-speech error: {str(e)}")
         return jsonify({'error': f'Error converting text to speech: {str(e)}'}), 500
 
+@app.route('/admission', methods=['GET'])
+def admission_status():
+    """Queue depth and wait times per priority lane"""
+    return jsonify(admission.stats())
+
+@app.route('/tts', methods=['GET'])
+def tts_status():
+    """Text-to-speech queue depth, failures, synthesis latency, cache hits and audio links"""
+    return jsonify(dict(tts.stats(), links=audio_links.stats()))
+
+@app.route('/audio/<token>', methods=['GET'])
+def audio_file(token):
+    """Speech for a reply sent with ?audio=url; supports Range requests and Accept-negotiated profiles"""
+    try:
+        profile = requested_profile(request)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        result = audio_links.fetch(token, profile)
+        if result is None:
+            return jsonify({'error': 'Audio link not found or expired'}), 404
+        key, audio = result
+        return send_audio(audio, key, max_age=int(audio_links.ttl))
+    except Overloaded:
+        return jsonify(BUSY_RESPONSE), 503
+    except Exception as e:
+        print(f"Text-to-speech error: {str(e) or type(e).__name__}")
+        return jsonify({'error': 'Could not synthesize audio'}), 500
+
 if __name__ == '__main__':
     # 
     try:
@@ -455,6 +570,9 @@ if __name__ == '__main__':
             training_data = minimal_data
 
     voice_handler = load_speech_components()
+    # Warm the speech engines before the first request
+    tts_service.start()
+    tts.prerender_in_background(canned_responses())
     
     app.run(host='0.0.0.0', port=5000, debug=True)
     
\ No newline at end of file
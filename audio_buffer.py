@@ -0,0 +1,66 @@
+import io
+import os
+import tempfile
+from contextlib import contextmanager
+
+import speech_recognition as sr
+
+# Memory-backed filesystems tried for spool files, in order
+SPOOL_CANDIDATES = ('/dev/shm', '/run/shm')
+
+
+def _spool_dir():
+    for directory in SPOOL_CANDIDATES:
+        if os.path.isdir(directory) and os.access(directory, os.W_OK):
+            return directory
+    return tempfile.gettempdir()
+
+
+SPOOL_DIR = _spool_dir()
+
+
+@contextmanager
+def spooled_path(suffix='.wav'):
+    """A fresh file path in SPOOL_DIR (tmpfs where available), removed on exit even after errors.
+
+    Only for libraries that insist on a path, such as pyttsx3's
+    save_to_file; everything else should pass audio as bytes or BytesIO.
+    """
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix='chatbot-audio-', dir=SPOOL_DIR)
+    os.close(fd)
+    try:
+        yield path
+    finally:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def read_file(path):
+    """Contents of path as bytes; unbuffered, so it is one fstat-sized read"""
+    with open(path, 'rb', buffering=0) as f:
+        return f.read()
+
+
+def is_wav(data):
+    return bytes(memoryview(data)[:4]) == b'RIFF'
+
+
+@contextmanager
+def audio_source(data):
+    """An open speech_recognition AudioFile over audio bytes.
+
+    WAV, which is what the recorders send, is read straight from memory.
+    AudioFile only detects AIFF and FLAC from a file it can reopen, so
+    those formats go through a spooled file that is removed afterwards.
+    """
+    if is_wav(data):
+        with sr.AudioFile(io.BytesIO(data)) as source:
+            yield source
+        return
+    with spooled_path() as path:
+        with open(path, 'wb') as f:
+            f.write(data)
+        with sr.AudioFile(path) as source:
+            yield source
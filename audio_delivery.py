@@ -0,0 +1,83 @@
+import io
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from flask import send_file
+
+from admission import NORMAL
+
+AUDIO_WAV = 'audio/wav'
+
+
+def wants_audio_url(request):
+    """True if the client asked for an audio URL (?audio=url) instead of inline base64"""
+    return request.args.get('audio') == 'url'
+
+
+class AudioLinks:
+    """Short-lived tokens for speech that is synthesized when first fetched.
+
+    ``issue`` records what to say and returns an unguessable token at
+    once, so a reply's text goes out without waiting for synthesis; the
+    client then fetches ``/audio/<token>``, which synthesizes through
+    ``tts`` (a CachedTTS, so repeated text and canned responses are cache
+    hits). Tokens expire ``ttl`` seconds after they are issued, and at
+    most ``max_links`` are kept, oldest dropped first.
+    """
+
+    def __init__(self, tts, ttl=300.0, max_links=10000, clock=time.monotonic):
+        self.tts = tts
+        self.ttl = ttl
+        self.max_links = max_links
+        self.clock = clock
+        self.issued = 0
+        self.fetched = 0
+        self.expired = 0
+        self._links = OrderedDict()
+        self._lock = threading.Lock()
+
+    def issue(self, text, priority=NORMAL, **settings):
+        token = secrets.token_urlsafe(16)
+        with self._lock:
+            self._expire()
+            self._links[token] = (self.clock() + self.ttl, text, priority, settings)
+            self.issued += 1
+        return token
+
+    def _expire(self):
+        now = self.clock()
+        links = self._links
+        while links and (len(links) > self.max_links or next(iter(links.values()))[0] <= now):
+            links.popitem(last=False)
+            self.expired += 1
+
+    def fetch(self, token, profile=None):
+        """(cache key, WAV bytes) for a live token, or None; profile applies if the link has none"""
+        with self._lock:
+            link = self._links.get(token)
+        if link is None or link[0] <= self.clock():
+            return None
+        _, text, priority, settings = link
+        if profile and not settings.get('profile'):
+            settings = dict(settings, profile=profile)
+        audio = self.tts.synthesize(text, priority=priority, **settings)
+        with self._lock:
+            self.fetched += 1
+        return self.tts.key_for(text, **settings), audio
+
+    def stats(self):
+        with self._lock:
+            return {'active': len(self._links), 'issued': self.issued, 'fetched': self.fetched,
+                    'expired': self.expired, 'ttl': self.ttl}
+
+
+def send_audio(audio, key, max_age=300):
+    """A WAV response that honours Range and If-None-Match requests; the body is sent in blocks"""
+    response = send_file(io.BytesIO(audio), mimetype=AUDIO_WAV, conditional=True, etag=key, max_age=max_age)
+    # Replies to one user's messages: only their own browser may keep a copy, never a shared cache
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.vary.add('Accept')  # the output profile can be negotiated
+    return response
@@ -0,0 +1,193 @@
+import io
+import struct
+import warnings
+import wave
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore', DeprecationWarning)
+    import audioop  # standard library before Python 3.13, the audioop-lts package after
+
+# rate None keeps the engine's native rate (and the WAV exactly as synthesized)
+AudioProfile = namedtuple('AudioProfile', ['name', 'rate', 'encoding'])
+
+PROFILES = {
+    'wav': AudioProfile('wav', None, 'pcm'),
+    'pcm16k': AudioProfile('pcm16k', 16000, 'pcm'),
+    'pcm8k': AudioProfile('pcm8k', 8000, 'pcm'),
+    'mulaw8k': AudioProfile('mulaw8k', 8000, 'mulaw'),
+    'adpcm8k': AudioProfile('adpcm8k', 8000, 'adpcm'),
+}
+DEFAULT_PROFILE = 'wav'
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_MULAW = 7
+WAVE_FORMAT_IMA_ADPCM = 0x11
+
+# IMA ADPCM block size for mono up to 11 kHz; the header holds one sample, the rest are 4-bit codes
+ADPCM_BLOCK_ALIGN = 256
+ADPCM_SAMPLES_PER_BLOCK = (ADPCM_BLOCK_ALIGN - 4) * 2 + 1
+
+WAV_TYPES = ('audio/wav', 'audio/wave', 'audio/x-wav', 'audio/*', '*/*')
+
+
+def read_wav(data):
+    """(int16 mono samples, sample rate) from WAV bytes of any PCM width and channel count"""
+    with wave.open(io.BytesIO(data), 'rb') as f:
+        channels, width, rate = f.getnchannels(), f.getsampwidth(), f.getframerate()
+        frames = f.readframes(f.getnframes())
+    if width == 1:
+        frames = audioop.bias(frames, 1, -128)  # 8-bit WAV is unsigned
+    if width != 2:
+        frames = audioop.lin2lin(frames, width, 2)
+    samples = np.frombuffer(frames, dtype='<i2')
+    if channels > 1:
+        samples = samples[:len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+@lru_cache(maxsize=16)
+def _lowpass(from_rate, to_rate, taps=101):
+    """Hamming-windowed sinc filter cutting off just below the target Nyquist frequency"""
+    cutoff = 0.45 * to_rate / from_rate
+    n = np.arange(taps) - (taps - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+    return h / h.sum()
+
+
+def resample(samples, from_rate, to_rate):
+    """float64 samples at to_rate; downsampling low-pass filters first so nothing aliases"""
+    samples = np.asarray(samples, dtype=np.float64)
+    if from_rate == to_rate or not len(samples):
+        return samples
+    if to_rate < from_rate:
+        samples = np.convolve(samples, _lowpass(from_rate, to_rate), mode='same')
+    positions = np.arange(int(len(samples) * to_rate / from_rate)) * (from_rate / to_rate)
+    return np.interp(positions, np.arange(len(samples)), samples)
+
+
+def _to_pcm16(samples):
+    return np.clip(np.rint(samples), -32768, 32767).astype('<i2').tobytes()
+
+
+def _wav(format_tag, rate, bits, block_align, byte_rate, data, extra=b'', samples=None):
+    """Mono WAV bytes; non-PCM formats get cbSize, their extra fmt bytes and a fact chunk"""
+    fmt = struct.pack('<HHIIHH', format_tag, 1, rate, byte_rate, block_align, bits)
+    if format_tag != WAVE_FORMAT_PCM:
+        fmt += struct.pack('<H', len(extra)) + extra
+    chunks = [b'fmt ' + struct.pack('<I', len(fmt)) + fmt]
+    if samples is not None:
+        chunks.append(b'fact' + struct.pack('<II', 4, samples))
+    chunks.append(b'data' + struct.pack('<I', len(data)) + data + (b'\0' if len(data) % 2 else b''))
+    body = b'WAVE' + b''.join(chunks)
+    return b'RIFF' + struct.pack('<I', len(body)) + body
+
+
+def _swap_nibbles(codes):
+    # audioop packs the first code in the high nibble; WAV IMA ADPCM puts it in the low one
+    codes = np.frombuffer(codes, dtype=np.uint8)
+    return ((codes << 4) | (codes >> 4)).astype(np.uint8).tobytes()
+
+
+def _ima_adpcm(pcm):
+    """IMA ADPCM blocks for int16 mono PCM; the last block is padded with silence"""
+    samples = np.frombuffer(pcm, dtype='<i2')
+    per_block = ADPCM_SAMPLES_PER_BLOCK
+    padded = np.zeros(-(-len(samples) // per_block) * per_block, dtype='<i2')
+    padded[:len(samples)] = samples
+    blocks = []
+    index = 0
+    for start in range(0, len(padded), per_block):
+        first = int(padded[start])
+        header = struct.pack('<hBx', first, index)
+        codes, (_, index) = audioop.lin2adpcm(padded[start + 1:start + per_block].tobytes(), 2, (first, index))
+        blocks.append(header + _swap_nibbles(codes))
+    return b''.join(blocks)
+
+
+def encode(data, profile):
+    """WAV bytes in the named profile, converted from synthesized WAV bytes in memory"""
+    profile = PROFILES[profile]
+    if profile.rate is None:
+        return data
+    samples, rate = read_wav(data)
+    pcm = _to_pcm16(resample(samples, rate, profile.rate))
+    rate = profile.rate
+    if profile.encoding == 'mulaw':
+        return _wav(WAVE_FORMAT_MULAW, rate, 8, 1, rate, audioop.lin2ulaw(pcm, 2), samples=len(pcm) // 2)
+    if profile.encoding == 'adpcm':
+        byte_rate = rate * ADPCM_BLOCK_ALIGN // ADPCM_SAMPLES_PER_BLOCK
+        return _wav(WAVE_FORMAT_IMA_ADPCM, rate, 4, ADPCM_BLOCK_ALIGN, byte_rate, _ima_adpcm(pcm),
+                    extra=struct.pack('<H', ADPCM_SAMPLES_PER_BLOCK), samples=len(pcm) // 2)
+    return _wav(WAVE_FORMAT_PCM, rate, 16, 2, rate * 2, pcm)
+
+
+def decode(data):
+    """(int16 samples, rate) from WAV bytes in any profile's format"""
+    chunks = {}
+    position = 12
+    while position + 8 <= len(data):
+        name, size = data[position:position + 4], struct.unpack_from('<I', data, position + 4)[0]
+        chunks[name] = data[position + 8:position + 8 + size]
+        position += 8 + size + size % 2
+    format_tag, _, rate = struct.unpack_from('<HHI', chunks[b'fmt '])
+    body = chunks[b'data']
+    if format_tag == WAVE_FORMAT_MULAW:
+        return np.frombuffer(audioop.ulaw2lin(body, 2), dtype='<i2'), rate
+    if format_tag == WAVE_FORMAT_IMA_ADPCM:
+        pieces = []
+        for start in range(0, len(body), ADPCM_BLOCK_ALIGN):
+            block = body[start:start + ADPCM_BLOCK_ALIGN]
+            first, index = struct.unpack_from('<hB', block)
+            pcm, _ = audioop.adpcm2lin(_swap_nibbles(block[4:]), 2, (first, index))
+            pieces.append(struct.pack('<h', first) + pcm)
+        samples = np.frombuffer(b''.join(pieces), dtype='<i2')
+        return samples[:struct.unpack('<I', chunks[b'fact'])[0]] if b'fact' in chunks else samples, rate
+    return read_wav(data)
+
+
+def negotiate(accept):
+    """Profile name for an Accept header, or None for the default.
+
+    Audio profiles are requested as WAV media-type parameters, e.g.
+    ``audio/wav; rate=8000; codec=mulaw`` or ``audio/wav; profile=adpcm8k``.
+    Every profile is a WAV container, so ``audio/basic`` (headerless
+    mu-law) is not offered. The highest q wins.
+    """
+    best, best_q = None, 0.0
+    for media_range in (accept or '').split(','):
+        parts = [part.strip() for part in media_range.split(';')]
+        media_type = parts[0].lower()
+        params = {}
+        for part in parts[1:]:
+            if '=' in part:
+                key, value = part.split('=', 1)
+                params[key.strip().lower()] = value.strip().strip('"')
+        try:
+            q = float(params.pop('q', 1))
+        except ValueError:
+            continue
+        if media_type in WAV_TYPES and 'profile' in params:
+            name = params['profile'] if params['profile'] in PROFILES else None
+        elif media_type in WAV_TYPES and ('rate' in params or 'codec' in params):
+            rate, codec = params.get('rate'), params.get('codec', 'pcm')
+            name = next((p.name for p in PROFILES.values()
+                         if p.encoding == codec and (rate is None or str(p.rate) == rate)), None)
+        else:
+            continue
+        if name and q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def requested_profile(request):
+    """Profile for a request: ?profile=name, else negotiated from Accept; ValueError for an unknown name"""
+    name = request.args.get('profile')
+    if name is None:
+        return negotiate(request.headers.get('Accept'))
+    if name not in PROFILES:
+        raise ValueError(f"Unknown audio profile '{name}'; choose from {', '.join(PROFILES)}")
+    return name
@@ -0,0 +1,171 @@
+import argparse
+import itertools
+import json
+import sys
+import time
+
+from admission import Overloaded
+from analyzed_message import AnalyzedMessage
+from crisis_detector import CrisisDetector
+from emotion_analyzer import EmotionAnalyzer
+
+NDJSON = 'application/x-ndjson'
+
+
+def read_items(lines):
+    """Messages from NDJSON lines: a JSON string, or an object with 'message' and an optional 'id'"""
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def ndjson_lines(results):
+    """Encode results one JSON document per line; an error ends the stream with an error line"""
+    try:
+        for result in results:
+            yield json.dumps(result) + '\n'
+    except Exception as e:
+        print(f"Error in batch scoring: {str(e)}")
+        yield json.dumps({'error': str(e)}) + '\n'
+
+
+class BatchScorer:
+    """Normalization, emotion and crisis scoring for many messages at once.
+
+    Messages are taken ``chunk_size`` at a time. Each chunk is analyzed
+    once (``AnalyzedMessage``), then labeled with one call each to
+    ``classify_emotions`` and ``detect_crisis``. The apps pass the emotion
+    and crisis logic of their own ``/chat``, so a batch gives the same
+    answers and can be used to audit it. Without ``detect_crisis``,
+    ``CrisisDetector.assess_many`` checks the chunk, and results also
+    carry the tier and reason. Results come back in input order, and ``stream`` yields them
+    chunk by chunk, so inputs of any size run in constant memory.
+    """
+
+    def __init__(self, classify_emotions=None, detect_crisis=None, crisis_phrases=(), chunk_size=500):
+        self.detector = None
+        if detect_crisis is None:
+            self.detector = CrisisDetector()
+            if crisis_phrases:
+                # Same extra phrases as the app's admission screen
+                self.detector.crisis_keywords['app'] = list(crisis_phrases)
+                self.detector.compile_screen()
+        self.classify_emotions = classify_emotions or self._analyzer_emotions
+        self.detect_crisis = detect_crisis
+        self.chunk_size = chunk_size
+        self._analyzer = None
+
+    def _analyzer_emotions(self, messages):
+        if self._analyzer is None:
+            self._analyzer = EmotionAnalyzer()
+        return [self._analyzer.analyze_emotion(message) for message in messages]
+
+    def score(self, items, start=0):
+        """Results for one chunk of messages (strings or {'id', 'message'} objects), in input order"""
+        ids, messages = [], []
+        for item in items:
+            if isinstance(item, dict):
+                ids.append(item.get('id'))
+                item = item.get('message', '')
+            else:
+                ids.append(None)
+            messages.append(AnalyzedMessage(str(item)))
+
+        emotions = self.classify_emotions(messages)
+        if self.detect_crisis is not None:
+            crises = self.detect_crisis(messages)
+        else:
+            assessments = self.detector.assess_many(messages)
+            crises = [assessment.is_crisis for assessment in assessments]
+
+        results = []
+        for offset, message in enumerate(messages):
+            result = {'index': start + offset}
+            if ids[offset] is not None:
+                result['id'] = ids[offset]
+            result.update({
+                'normalized': message.normalized,
+                'emotion': emotions[offset],
+                'is_crisis': bool(crises[offset])
+            })
+            if self.detect_crisis is None:
+                result.update({
+                    'crisis_tier': assessments[offset].tier,
+                    'crisis_reason': assessments[offset].reason
+                })
+            results.append(result)
+        return results
+
+    def stream(self, items, run=None, skip_overloaded=False):
+        """Yield results in input order, scoring chunk_size messages at a time.
+
+        ``run(fn, chunk, start)`` executes each chunk, e.g. in an admission
+        lane; by default chunks run in the calling thread. With
+        ``skip_overloaded``, a chunk that ``run`` rejects with ``Overloaded``
+        yields one error item naming its index range, for the client to
+        resend, and the stream goes on with the next chunk.
+        """
+        iterator = iter(items)
+        start = 0
+        while True:
+            chunk = list(itertools.islice(iterator, self.chunk_size))
+            if not chunk:
+                return
+            try:
+                results = run(self.score, chunk, start) if run else self.score(chunk, start)
+            except Overloaded as e:
+                if not skip_overloaded:
+                    raise
+                results = [{'index': start, 'count': len(chunk), 'error': str(e)}]
+            yield from results
+            start += len(chunk)
+
+
+def score_messages(texts, **kwargs):
+    """Score a list of messages with a default BatchScorer"""
+    return list(BatchScorer(**kwargs).stream(texts))
+
+
+if __name__ == '__main__':
+    from parallel import EMOTION_MODES, ParallelScorer, build_scorer
+
+    parser = argparse.ArgumentParser(description="Score messages in bulk and write NDJSON results")
+    parser.add_argument('input', nargs='?', help="NDJSON or JSON array file of messages (default: stdin)")
+    parser.add_argument('--text', action='store_true', help="input is plain text, one message per line")
+    parser.add_argument('--field', default='message', help="key that holds the message in object items")
+    parser.add_argument('--workers', type=int, default=1, help="worker processes; 0 for one per core")
+    parser.add_argument('--emotions', choices=EMOTION_MODES, default='model')
+    parser.add_argument('--model-dir', default='model_store')
+    parser.add_argument('--chunk-size', type=int, default=500)
+    args = parser.parse_args()
+
+    # Results own stdout; progress and resource messages go to stderr
+    output, sys.stdout = sys.stdout, sys.stderr
+    if args.workers == 1:
+        scorer = build_scorer(args.emotions, args.model_dir, chunk_size=args.chunk_size)
+    else:
+        scorer = ParallelScorer(args.workers or None, args.emotions, args.model_dir, chunk_size=args.chunk_size)
+
+    source = open(args.input, encoding='utf-8') if args.input else sys.stdin
+    with source:
+        if args.text:
+            items = (line.rstrip('\n') for line in source)
+        elif args.input and args.input.endswith('.json'):
+            items = json.load(source)
+        else:
+            items = read_items(source)
+        if args.field != 'message':
+            items = ({'message': item.get(args.field, '')} if isinstance(item, dict) else item for item in items)
+        started = time.perf_counter()
+        count = 0
+        try:
+            for line in ndjson_lines(scorer.stream(items)):
+                output.write(line)
+                count += 1
+        finally:
+            if args.workers != 1:
+                scorer.close()
+    print(f"Scored {count} messages in {time.perf_counter() - started:.2f}s", file=sys.stderr)
@@ -0,0 +1,105 @@
+"""Crisis latency while the server is saturated with bulk work.
+
+Floods the normal lane with slow jobs standing in for voice transcription
+and speech synthesis, then times crisis messages submitted in the middle
+of the flood. It runs once with a single shared pool and once with
+AdmissionController's reserved crisis lane, and prints per-lane queue
+stats. It also checks that urgent but ordinary messages screen as normal
+work and that a crisis flood past the crisis lane's bound spills into the
+normal queue rather than growing without limit.
+
+    python benchmarks/bench_admission.py
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from admission import CRISIS, NORMAL, AdmissionController, Overloaded
+
+BULK_SECONDS = 0.05
+CRISIS_SECONDS = 0.002
+
+
+def slow_job(seconds):
+    time.sleep(seconds)
+
+
+def shared_pool_latency(bulk_jobs, crisis_jobs):
+    pool = ThreadPoolExecutor(max_workers=8)
+    for _ in range(bulk_jobs):
+        pool.submit(slow_job, BULK_SECONDS)
+    latencies = []
+    for _ in range(crisis_jobs):
+        started = time.perf_counter()
+        pool.submit(slow_job, CRISIS_SECONDS).result()
+        latencies.append(time.perf_counter() - started)
+    pool.shutdown(wait=True, cancel_futures=True)
+    return latencies
+
+
+def admission_latency(bulk_jobs, crisis_jobs):
+    admission = AdmissionController(normal_workers=8, crisis_workers=2, max_queue=bulk_jobs)
+    rejected = 0
+    for _ in range(bulk_jobs + 50):
+        try:
+            admission.submit(NORMAL, slow_job, BULK_SECONDS)
+        except Overloaded:
+            rejected += 1
+    latencies = []
+    for _ in range(crisis_jobs):
+        started = time.perf_counter()
+        admission.run(admission.priority_for("I want to end my life"), slow_job, CRISIS_SECONDS)
+        latencies.append(time.perf_counter() - started)
+    stats = admission.stats()
+    for lane in admission.lanes.values():
+        lane.executor.shutdown(wait=True, cancel_futures=True)
+    return latencies, rejected, stats
+
+
+def screen_and_overflow_check(crisis_max_queue=4):
+    admission = AdmissionController(normal_workers=1, crisis_workers=1, max_queue=64,
+                                    crisis_max_queue=crisis_max_queue)
+    priorities = {text: admission.priority_for(text) for text in (
+        "I need to finish this report right now",
+        "I feel useless and my heart racing won't stop",
+        "I want to end my life"
+    )}
+    for _ in range(crisis_max_queue + 10):
+        admission.submit(CRISIS, slow_job, CRISIS_SECONDS)
+    stats = admission.stats()
+    for lane in admission.lanes.values():
+        lane.executor.shutdown(wait=True, cancel_futures=True)
+    return priorities, stats
+
+
+def main():
+    bulk_jobs, crisis_jobs = 200, 20
+    shared = shared_pool_latency(bulk_jobs, crisis_jobs)
+    lanes, rejected, stats = admission_latency(bulk_jobs, crisis_jobs)
+    print(f"{bulk_jobs} bulk jobs of {BULK_SECONDS * 1e3:.0f} ms on 8 workers, {crisis_jobs} crisis jobs")
+    print(f"shared pool:    crisis mean {sum(shared) / len(shared) * 1e3:8.1f} ms, max {max(shared) * 1e3:8.1f} ms")
+    print(f"priority lanes: crisis mean {sum(lanes) / len(lanes) * 1e3:8.1f} ms, max {max(lanes) * 1e3:8.1f} ms")
+    print(f"normal lane rejected {rejected} jobs beyond its queue bound")
+    for name in (CRISIS, NORMAL):
+        lane = stats[name]
+        print(f"  {name}: queued {lane['queued']}, running {lane['running']}, completed {lane['completed']}, "
+              f"wait p99 {lane['wait']['p99_us'] / 1e3:.1f} ms")
+
+    priorities, stats = screen_and_overflow_check()
+    for text, priority in priorities.items():
+        print(f"  {priority:>6}: {text}")
+    spilled = stats[CRISIS]['rejected']
+    print(f"crisis flood: {spilled} jobs past the crisis bound went to the normal queue "
+          f"(crisis queued {stats[CRISIS]['queued']}, normal queued {stats[NORMAL]['queued']})")
+    expected = [NORMAL, NORMAL, CRISIS]
+    if list(priorities.values()) != expected or spilled == 0:
+        print("FAIL: crisis screen or crisis lane bound")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
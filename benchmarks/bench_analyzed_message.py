@@ -0,0 +1,74 @@
+"""Work saved by sharing one AnalyzedMessage across analyzers.
+
+Runs each message through EmotionAnalyzer, CrisisDetector,
+MentalHealthChatbot and the shortcut normalizer, first with the raw
+string (each analyzer lowercases, scans and scores sentiment itself) and
+then with one shared AnalyzedMessage, and prints the per-stage timings and
+reuse counts of the shared document.
+
+Since sentiment moved to the fast polarity scorer, every stage costs a few
+microseconds, so sharing saves about 10% per message (1.07-1.14x here);
+the larger gain came from running TextBlob once instead of three times.
+
+    python benchmarks/bench_analyzed_message.py
+"""
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import keyword_matcher
+import text_normalizer
+from analyzed_message import AnalyzedMessage
+from chatbot import MentalHealthChatbot
+from crisis_detector import CrisisDetector
+from emotion_analyzer import EmotionAnalyzer
+
+
+def run_all(message, analyzer, detector, chatbot):
+    emotion = analyzer.analyze_emotion(message)
+    detector.detect_crisis(message)
+    chatbot.get_response(message, 'other')
+    if isinstance(message, AnalyzedMessage):
+        return message.normalized
+    return text_normalizer.normalize(message.lower().strip())
+
+
+def main():
+    with open(os.path.join(ROOT, 'datasets', 'processed_training_data.json'), encoding='utf-8') as f:
+        data = json.load(f)
+    rng = random.Random(0)
+    corpus = [rng.choice(data)['input'] for _ in range(2000)]
+
+    analyzer, detector, chatbot = EmotionAnalyzer(), CrisisDetector(), MentalHealthChatbot()
+    run_all(AnalyzedMessage("warm up"), analyzer, detector, chatbot)
+
+    timings = {}
+    for label, wrap in (('separate strings', str), ('shared message', AnalyzedMessage)):
+        started = time.perf_counter()
+        for text in corpus:
+            keyword_matcher.shared_matcher.clear_cache()
+            run_all(wrap(text), analyzer, detector, chatbot)
+        timings[label] = (time.perf_counter() - started) / len(corpus) * 1e3
+        print(f"{label}: {timings[label]:.3f} ms/message")
+    print(f"speedup: {timings['separate strings'] / timings['shared message']:.2f}x")
+
+    stage_ms, reuses = {}, {}
+    for text in corpus:
+        message = AnalyzedMessage(text)
+        run_all(message, analyzer, detector, chatbot)
+        for name, seconds in message.timings.items():
+            stage_ms[name] = stage_ms.get(name, 0) + seconds * 1e3 / len(corpus)
+        for name, count in message.reuses.items():
+            reuses[name] = reuses.get(name, 0) + count / len(corpus)
+    print(f"{'stage':>20} {'ms/message':>11} {'reuses/message':>15}")
+    for name in stage_ms:
+        print(f"{name:>20} {stage_ms[name]:>11.4f} {reuses.get(name, 0):>15.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Voice request audio handling: temp files vs in-memory buffers.
+
+Times the audio handling around a voice request, old path and new:
+- speech-to-text preparation: an uploaded WAV is saved to a
+  NamedTemporaryFile, opened with AudioFile, recorded and unlinked,
+  vs audio_buffer.audio_source reading the upload from memory
+- text-to-speech rendering: the engine writes a temp file that is
+  read back and unlinked, vs a tmpfs spool file (tts_service._render)
+
+An audit hook counts file opens and removals per request. The script
+also feeds each path a corrupt upload and counts the files left behind.
+It exits 1 if the new paths open files for WAV uploads or leak any file.
+Recognition and synthesis are left out: recognition needs the network,
+and synthesis uses the simulated engine from bench_tts_service.py.
+
+    python benchmarks/bench_audio_buffer.py [requests]
+"""
+import io
+import math
+import os
+import struct
+import sys
+import tempfile
+import time
+import wave
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import speech_recognition as sr
+from werkzeug.datastructures import FileStorage
+
+import bench_tts_service
+import tts_service
+from audio_buffer import SPOOL_DIR, audio_source
+
+COUNTED = {'open': 'opens', 'os.remove': 'removes'}
+counts = {'opens': 0, 'removes': 0}
+
+
+def audit(event, args):
+    name = COUNTED.get(event)
+    if name:
+        counts[name] += 1
+
+
+def recorded_wav(seconds=3.0, rate=16000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(b''.join(struct.pack('<h', int(8000 * math.sin(i / 20.0))) for i in range(int(seconds * rate))))
+    return buffer.getvalue()
+
+
+def old_stt(upload, recognizer):
+    temp_audio = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
+    upload.save(temp_audio.name)
+    temp_audio.close()
+    with sr.AudioFile(temp_audio.name) as source:
+        audio_data = recognizer.record(source)
+    os.unlink(temp_audio.name)
+    return audio_data
+
+
+def new_stt(upload, recognizer):
+    with audio_source(upload.read()) as source:
+        return recognizer.record(source)
+
+
+def old_tts(text):
+    temp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
+    temp_filename = temp_file.name
+    temp_file.close()
+    tts_service._engine.save_to_file(text, temp_filename)
+    tts_service._engine.runAndWait()
+    with open(temp_filename, 'rb') as f:
+        audio_data = f.read()
+    os.unlink(temp_filename)
+    return audio_data
+
+
+def measure(name, fn, make_args, requests):
+    for key in counts:
+        counts[key] = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        fn(*make_args())
+    elapsed = time.perf_counter() - started
+    print(f"{name:<22} {elapsed / requests * 1e6:9.1f} us/request  "
+          f"{counts['opens'] / requests:4.1f} opens  {counts['removes'] / requests:4.1f} removes")
+    return dict(counts)
+
+
+def leftovers(fn, make_args):
+    """Files left in the temp and spool directories after fn fails on a corrupt upload"""
+    directories = {tempfile.gettempdir(), SPOOL_DIR}
+    before = {d: set(os.listdir(d)) for d in directories}
+    try:
+        fn(*make_args())
+    except Exception:
+        pass
+    left = []
+    for d in directories:
+        for name in set(os.listdir(d)) - before[d]:
+            left.append(os.path.join(d, name))
+    for path in left:
+        os.unlink(path)
+    return len(left)
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    wav = recorded_wav()
+    recognizer = sr.Recognizer()
+    bench_tts_service.SYNTHESIS_SECONDS = 0
+    tts_service._engine = bench_tts_service.SimulatedEngine()
+    text = "Take a slow breath in for four counts, hold it, and let it go. " * 8
+
+    sys.addaudithook(audit)
+    print(f"{requests} requests, {len(wav):,} byte WAV upload, spool directory {SPOOL_DIR}, "
+          f"temp directory {tempfile.gettempdir()}")
+    upload = lambda data=wav: (FileStorage(io.BytesIO(data), 'recording.wav'), recognizer)
+    measure("STT temp file", old_stt, upload, requests)
+    new_counts = measure("STT in memory", new_stt, upload, requests)
+    measure("TTS temp file", old_tts, lambda: (text,), requests)
+    measure("TTS tmpfs spool", tts_service._render, lambda: (text,), requests)
+
+    corrupt_wav = lambda: upload(b'RIFF' + bytes(200))
+    corrupt_other = lambda: upload(b'FORM' + bytes(200))
+    old_leaks = leftovers(old_stt, corrupt_wav)
+    new_leaks = leftovers(new_stt, corrupt_wav) + leftovers(new_stt, corrupt_other)
+    print(f"files left after a corrupt upload: temp file path {old_leaks}, in-memory path {new_leaks}")
+
+    if new_counts['opens'] or new_leaks:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
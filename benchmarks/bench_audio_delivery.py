@@ -0,0 +1,86 @@
+"""Audio delivery: base64 in JSON vs a link fetched on demand.
+
+Speaks app.py's detailed breathing exercises (its longest replies)
+through /speak in both modes via Flask's test client, with a fresh audio
+cache for each mode so every reply is synthesized once. It reports how
+long the JSON reply took, how long until the audio was in hand, and the
+bytes sent for the audio, plus time to the first 64 KiB with a Range
+request. It exits 1 if the linked audio differs from the inline audio or
+may be stored by a shared cache.
+
+Like bench_tts_service.py, a simulated engine stands in when pyttsx3
+cannot start here.
+
+    python benchmarks/bench_audio_delivery.py [--synthesis-ms MS]
+"""
+import argparse
+import base64
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import bench_tts_service
+from tts_cache import AudioCache, CachedTTS
+from tts_service import TTSService
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--synthesis-ms', type=float, default=50.0)
+    args = parser.parse_args()
+    bench_tts_service.SYNTHESIS_SECONDS = args.synthesis_ms / 1000.0
+
+    import app
+    factory, kind = bench_tts_service.engine_factory()
+    texts = [app._exercise_text(exercise) for exercise in app.DETAILED_BREATHING_EXERCISES]
+    client = app.app.test_client()
+    ok = True
+
+    with TTSService(workers=1, engine_factory=factory) as service:
+        def fresh_cache():
+            tts = CachedTTS(service, AudioCache(None))
+            app.voice_handler.tts = app.audio_links.tts = tts
+
+        fresh_cache()
+        inline_reply = inline_bytes = 0.0
+        inline_audio = []
+        for text in texts:
+            started = time.perf_counter()
+            response = client.post('/speak', json={'text': text})
+            inline_reply += time.perf_counter() - started
+            inline_bytes += len(response.data)
+            inline_audio.append(base64.b64decode(response.json['audio']))
+
+        fresh_cache()
+        link_reply = link_audio_time = link_bytes = first_chunk = 0.0
+        private = True
+        for text, expected in zip(texts, inline_audio):
+            started = time.perf_counter()
+            url = client.post('/speak?audio=url', json={'text': text}).json['audio_url']
+            link_reply += time.perf_counter() - started
+            head = client.get(url, headers={'Range': 'bytes=0-65535'})
+            first_chunk += time.perf_counter() - started
+            response = client.get(url)
+            audio = response.data
+            private = private and response.cache_control.private and not response.cache_control.public
+            link_audio_time += time.perf_counter() - started
+            link_bytes += len(audio)
+            ok = ok and audio == expected and head.status_code == 206 and head.data == audio[:65536]
+
+    count = len(texts)
+    print(f"{count} breathing exercises, {kind} engine")
+    print(f"inline base64: reply + audio {inline_reply / count * 1000:8.2f} ms, {inline_bytes / count:9,.0f} bytes")
+    print(f"audio link:    reply         {link_reply / count * 1000:8.2f} ms")
+    print(f"               first 64 KiB  {first_chunk / count * 1000:8.2f} ms")
+    print(f"               whole audio   {link_audio_time / count * 1000:8.2f} ms, {link_bytes / count:9,.0f} bytes")
+    print("linked audio matches inline audio" if ok else "MISMATCH between linked and inline audio")
+    print("audio is marked Cache-Control: private" if private else "audio is CACHEABLE by shared caches")
+    if not (ok and private):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""TTS output profiles: bytes, CPU time and quality.
+
+Encodes one long spoken reply into every profile in audio_profiles and
+reports, for each:
+- payload bytes and the ratio to the native WAV
+- CPU time to encode
+- SNR against the same audio band-limited to the profile's rate, which
+  is the loss from the encoding alone
+- SNR against the original, after decoding and resampling back to the
+  native rate, which also counts the lost bandwidth
+
+The reply is synthesized with pyttsx3 when an engine can start here.
+Otherwise a speech-like test signal stands in: 22.05 kHz, gliding pitch,
+formant-shaped harmonics and noise bursts. The script exits 1 if a
+profile decodes to the wrong length or its encoding SNR falls below
+its floor.
+
+    python benchmarks/bench_audio_profiles.py [seconds]
+"""
+import io
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from audio_profiles import PROFILES, decode, encode, read_wav, resample
+
+# Minimum SNR in dB against the band-limited signal
+SNR_FLOOR = {'pcm': 40.0, 'mulaw': 25.0, 'adpcm': 15.0}
+
+
+def spoken_reply():
+    try:
+        from tts_service import TTSService
+        import app
+        with TTSService(workers=1) as service:
+            return service.synthesize(app._exercise_text(app.DETAILED_BREATHING_EXERCISES[1])), "pyttsx3"
+    except Exception as e:
+        print(f"pyttsx3 unavailable ({str(e) or type(e).__name__}); using a speech-like test signal")
+        return None, None
+
+
+def speech_like(seconds, rate=22050, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * rate)) / rate
+    f0 = 140 + 40 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / rate
+    signal = np.zeros_like(t)
+    for harmonic in range(1, 40):
+        frequency = harmonic * f0
+        # Two formants near 700 Hz and 1.2 kHz, rolling off above
+        envelope = np.exp(-((frequency - 700) / 300) ** 2) + 0.6 * np.exp(-((frequency - 1200) / 400) ** 2) + 0.05
+        signal += envelope / harmonic ** 0.5 * np.sin(harmonic * phase) * (frequency < rate / 2)
+    syllables = 0.5 + 0.5 * np.sin(2 * np.pi * 3.5 * t) ** 2
+    noise = rng.normal(0, 0.15, len(t)) * (np.sin(2 * np.pi * 0.9 * t) > 0.8)
+    signal = (signal * syllables + noise) / np.abs(signal).max() * 12000
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(np.clip(signal, -32768, 32767).astype('<i2').tobytes())
+    return buffer.getvalue()
+
+
+def snr(reference, test):
+    n = min(len(reference), len(test))
+    reference, test = reference[:n], np.asarray(test[:n], dtype=np.float64)
+    error = np.sum((reference - test) ** 2)
+    return float('inf') if error == 0 else 10 * np.log10(np.sum(reference ** 2) / error)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    wav, kind = spoken_reply()
+    if wav is None:
+        wav, kind = speech_like(seconds), "speech-like test signal"
+    original, native_rate = read_wav(wav)
+    original = original.astype(np.float64)
+    print(f"{kind}: {len(original) / native_rate:.1f}s at {native_rate} Hz, {len(wav):,} bytes\n")
+    print(f"{'profile':<9} {'bytes':>10} {'ratio':>6} {'encode ms':>10} {'SNR band dB':>12} {'SNR full dB':>12}")
+
+    ok = True
+    for name, profile in PROFILES.items():
+        started = time.process_time()
+        payload = encode(wav, name)
+        cpu = time.process_time() - started
+        decoded, rate = decode(payload)
+        rate = rate or native_rate
+        band_limited = resample(original, native_rate, rate)
+        band_snr = snr(band_limited, decoded)
+        full_snr = snr(original, resample(decoded, rate, native_rate))
+        if len(decoded) != len(band_limited) or band_snr < SNR_FLOOR[profile.encoding]:
+            ok = False
+        print(f"{name:<9} {len(payload):>10,} {len(wav) / len(payload):>5.1f}x {cpu * 1000:>10.2f} "
+              f"{band_snr:>12.1f} {full_snr:>12.1f}")
+
+    if not ok:
+        print("a profile decoded to the wrong length or fell below its SNR floor")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Bulk scoring: BatchScorer vs one message at a time.
+
+Scores dataset and randomized messages with BatchScorer and with the
+per-message path it replaces (normalize, EmotionAnalyzer, CrisisDetector
+per message), checks that every result matches, and compares throughput.
+It then times app.py's /chat one request per message against a single
+/chat/batch request through Flask's test client. It exits 1 on any
+mismatch.
+
+    python benchmarks/bench_batch.py [messages]
+"""
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import keyword_matcher
+import sentiment
+from analyzed_message import AnalyzedMessage
+from batch import BatchScorer
+from crisis_detector import CrisisDetector
+from emotion_analyzer import EmotionAnalyzer
+
+
+def clear_caches():
+    keyword_matcher.shared_matcher.clear_cache()
+    sentiment.default_scorer.polarity.cache_clear()
+
+
+def one_at_a_time(texts):
+    detector = CrisisDetector()
+    analyzer = EmotionAnalyzer()
+    results = []
+    for index, text in enumerate(texts):
+        message = AnalyzedMessage(text)
+        assessment = detector.assess(message)
+        results.append({
+            'index': index,
+            'normalized': message.normalized,
+            'emotion': analyzer.analyze_emotion(message),
+            'is_crisis': assessment.is_crisis,
+            'crisis_tier': assessment.tier,
+            'crisis_reason': assessment.reason
+        })
+    return results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with open(os.path.join(ROOT, 'datasets', 'processed_training_data.json'), encoding='utf-8') as f:
+        data = json.load(f)
+    texts = [item['input'] for item in data] + [item['response'] for item in data]
+    words = ' '.join(texts).split()
+    rng = random.Random(0)
+    messages = [' '.join(rng.choice(words) for _ in range(rng.randint(3, 25))) for _ in range(count)]
+
+    EmotionAnalyzer().analyze_emotion("warm up")
+    CrisisDetector().warm_up()
+
+    clear_caches()
+    started = time.perf_counter()
+    expected = one_at_a_time(messages)
+    single = time.perf_counter() - started
+
+    clear_caches()
+    started = time.perf_counter()
+    results = list(BatchScorer().stream(messages))
+    batched = time.perf_counter() - started
+
+    mismatches = sum(result != want for result, want in zip(results, expected)) + abs(len(results) - len(expected))
+    print(f"{count} messages, {mismatches} mismatches")
+    print(f"one at a time: {single:.2f}s ({count / single:,.0f} msg/s)")
+    print(f"BatchScorer:   {batched:.2f}s ({count / batched:,.0f} msg/s), {single / batched:.2f}x")
+
+    import app
+    client = app.app.test_client()
+    sample = messages[:1000]
+    started = time.perf_counter()
+    for message in sample:
+        client.post('/chat', json={'message': message})
+    per_request = time.perf_counter() - started
+    started = time.perf_counter()
+    response = client.post('/chat/batch', json={'messages': sample})
+    one_request = time.perf_counter() - started
+    print(f"app /chat x{len(sample)}: {per_request:.2f}s; /chat/batch: {one_request:.2f}s "
+          f"({len(response.json['results'])} results), {per_request / one_request:.1f}x")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
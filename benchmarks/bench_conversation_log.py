@@ -0,0 +1,91 @@
+"""Cost of persisting one conversation turn in simple_app.
+
+Compares re-pickling the whole conversation history on every message (the
+old conversation_history.pkl) with appending one record to ConversationLog,
+as the history grows, and times startup replay of the log. It then
+appends a long history to a log with a retention window, as simple_app
+uses, and reports the slowest appends (compaction runs in the
+background, so none should wait for it) and how many records startup
+replay reads.
+
+    python benchmarks/bench_conversation_log.py
+"""
+import datetime
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from conversation_log import ConversationLog
+
+
+def make_record(i):
+    return {
+        'user_input': f'I have been feeling anxious about work again, day {i}',
+        'response': "It sounds like work has been weighing on you. What part feels hardest right now?",
+        'emotion': 'anxiety',
+        'timestamp': datetime.datetime.now()
+    }
+
+
+def main():
+    workdir = tempfile.mkdtemp()
+    try:
+        print(f"{'history':>8} {'pickle (ms)':>12} {'pickle bytes':>13} {'log (ms)':>9} {'log bytes':>10}")
+        for size in (100, 1000, 10000):
+            history = [make_record(i) for i in range(size)]
+            pickle_path = os.path.join(workdir, 'conversation_history.pkl')
+            log = ConversationLog(os.path.join(workdir, f'log-{size}'), retain_records=size)
+
+            samples = 50
+            started = time.perf_counter()
+            for i in range(samples):
+                history.append(make_record(size + i))
+                with open(pickle_path, 'wb') as f:
+                    pickle.dump(history, f)
+            pickle_ms = (time.perf_counter() - started) / samples * 1e3
+            pickle_bytes = os.path.getsize(pickle_path)
+
+            for record in history[:-samples]:
+                log.append(record)
+            before = sum(os.path.getsize(os.path.join(log.directory, n)) for n in os.listdir(log.directory))
+            started = time.perf_counter()
+            for record in history[-samples:]:
+                log.append(record)
+            log_ms = (time.perf_counter() - started) / samples * 1e3
+            after = sum(os.path.getsize(os.path.join(log.directory, n)) for n in os.listdir(log.directory))
+            log.close()
+
+            print(f"{size:>8} {pickle_ms:>12.3f} {pickle_bytes:>13} {log_ms:>9.3f} {(after - before) // samples:>10}")
+
+        started = time.perf_counter()
+        count = sum(1 for _ in ConversationLog(os.path.join(workdir, 'log-10000')).replay())
+        print(f"replayed {count} records in {(time.perf_counter() - started) * 1e3:.1f} ms")
+
+        total, retain = 100000, 2000
+        log = ConversationLog(os.path.join(workdir, 'log-retained'), segment_bytes=256 * 1024,
+                              retain_records=retain)
+        latencies = []
+        for i in range(total):
+            record = make_record(i)
+            started = time.perf_counter()
+            log.append(record)
+            latencies.append(time.perf_counter() - started)
+        log.close()
+        latencies.sort()
+        started = time.perf_counter()
+        count = sum(1 for _ in ConversationLog(log.directory, retain_records=retain).replay())
+        print(f"{total} appends with retain_records={retain}: p99 {latencies[int(total * 0.99)] * 1e3:.3f} ms, "
+              f"max {latencies[-1] * 1e3:.1f} ms; replayed {count} records in "
+              f"{(time.perf_counter() - started) * 1e3:.1f} ms")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
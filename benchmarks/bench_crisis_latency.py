@@ -0,0 +1,82 @@
+"""Latency budget check for the tiered CrisisDetector.
+
+Replays dataset messages, crisis phrases and randomized messages through
+CrisisDetector.assess with a cold keyword-scan cache. It checks that every
+answer matches the original single-pass detect_crisis, prints per-tier
+latency histograms, and exits with status 1 when the tier 1 p99 exceeds
+crisis_detector.TIER1_P99_BUDGET.
+
+    python benchmarks/bench_crisis_latency.py
+"""
+import json
+import os
+import random
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from textblob import TextBlob
+
+import keyword_matcher
+from crisis_detector import TIER1_P99_BUDGET, CrisisDetector
+
+
+def original_detect_crisis(detector, text):
+    text = text.lower()
+    for keywords in detector.crisis_keywords.values():
+        if any(keyword in text for keyword in keywords):
+            return True
+    if TextBlob(text).sentiment.polarity < -0.8:
+        return True
+    for pattern in [r'going to (kill|hurt) myself', r'right now', r'immediately', r'this instant']:
+        if re.search(pattern, text):
+            return True
+    return False
+
+
+def main():
+    with open(os.path.join(ROOT, 'datasets', 'processed_training_data.json'), encoding='utf-8') as f:
+        data = json.load(f)
+    detector = CrisisDetector()
+    detector.warm_up()
+
+    phrases = [keyword for keywords in detector.crisis_keywords.values() for keyword in keywords]
+    phrases += ["I'm going to hurt myself", "I need to talk right now", "this is the worst, most horrible day"]
+    texts = [item['input'] for item in data] + [item['response'] for item in data]
+    rng = random.Random(0)
+    words = ' '.join(texts).split()
+    messages = texts + phrases
+    for _ in range(5000):
+        message = [rng.choice(words) for _ in range(rng.randint(1, 30))]
+        if rng.random() < 0.2:
+            message.insert(rng.randrange(len(message) + 1), rng.choice(phrases))
+        messages.append(' '.join(message))
+
+    mismatches = 0
+    tiers = {1: 0, 2: 0}
+    for message in messages:
+        keyword_matcher.shared_matcher.clear_cache()
+        result = detector.assess(message)
+        tiers[result.tier] += 1
+        if result.is_crisis != original_detect_crisis(detector, message):
+            mismatches += 1
+            print("mismatch:", repr(message))
+
+    print(f"{len(messages)} messages, {mismatches} mismatches; answered by tier 1: {tiers[1]}, tier 2: {tiers[2]}")
+    print(f"{'tier':>6} {'count':>6} {'mean us':>8} {'p50 us':>8} {'p99 us':>8} {'max us':>9}")
+    for name, summary in detector.latency_report().items():
+        print(f"{name:>6} {summary['count']:>6} {summary['mean_us']:>8} {summary['p50_us']:>8} "
+              f"{summary['p99_us']:>8} {summary['max_us']:>9}")
+
+    p99 = detector.metrics['tier1'].percentile(99)
+    within_budget = p99 <= TIER1_P99_BUDGET
+    print(f"tier 1 p99 {p99 * 1e6:.1f} us, budget {TIER1_P99_BUDGET * 1e6:.0f} us: "
+          f"{'ok' if within_budget else 'OVER BUDGET'}")
+    if mismatches or not within_budget:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
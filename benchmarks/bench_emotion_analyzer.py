@@ -0,0 +1,72 @@
+"""EmotionAnalyzer.analyze_emotion on a replayed chat corpus.
+
+Compares the original per-token lemmatize + nested keyword loop (with
+sentiment always computed) against the cached lemmas and keyword index,
+checks both return the same emotion for every message, and reports the
+lemma cache hit rate.
+
+    python benchmarks/bench_emotion_analyzer.py
+"""
+import json
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from textblob import TextBlob
+
+from emotion_analyzer import EmotionAnalyzer
+
+
+def original_analyze_emotion(analyzer, text):
+    tokens = analyzer.resources.tokenizer(re.sub(r'[^a-zA-Z\s]', '', text.lower()))
+    tokens = [analyzer.lemmatizer.lemmatize(token) for token in tokens if token not in analyzer.stop_words]
+    sentiment = TextBlob(text).sentiment.polarity
+    emotion_counts = {emotion: 0 for emotion in analyzer.emotion_keywords}
+    for token in tokens:
+        for emotion, keywords in analyzer.emotion_keywords.items():
+            if token in keywords:
+                emotion_counts[emotion] += 1
+    max_emotion = max(emotion_counts.items(), key=lambda x: x[1])
+    if max_emotion[1] == 0:
+        if sentiment < -0.3:
+            return 'sadness'
+        elif sentiment > 0.3:
+            return 'joy'
+        return 'neutral'
+    return max_emotion[0]
+
+
+def main():
+    with open(os.path.join(ROOT, 'datasets', 'processed_training_data.json'), encoding='utf-8') as f:
+        data = json.load(f)
+    messages = [item['input'] for item in data]
+    rng = random.Random(0)
+    corpus = [rng.choice(messages) for _ in range(5000)]
+
+    analyzer = EmotionAnalyzer()
+    analyzer.preprocess_text("warm up")  # load NLTK resources outside the timings
+    analyzer.lemma_for.cache_clear()
+
+    started = time.perf_counter()
+    expected = [original_analyze_emotion(analyzer, text) for text in corpus]
+    original_ms = (time.perf_counter() - started) / len(corpus) * 1e3
+
+    started = time.perf_counter()
+    actual = [analyzer.analyze_emotion(text) for text in corpus]
+    cached_ms = (time.perf_counter() - started) / len(corpus) * 1e3
+
+    assert actual == expected, "emotions differ"
+    info = analyzer.lemma_cache_info()
+    print(f"{len(corpus)} messages, identical results")
+    print(f"original: {original_ms:.3f} ms/message, cached: {cached_ms:.3f} ms/message "
+          f"({original_ms / cached_ms:.1f}x)")
+    print(f"lemma cache: {info.hits} hits, {info.misses} misses, hit rate {info.hits / (info.hits + info.misses):.1%}")
+
+
+if __name__ == '__main__':
+    main()
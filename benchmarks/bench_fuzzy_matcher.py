@@ -0,0 +1,116 @@
+"""Recall and latency of typo-tolerant crisis matching.
+
+Plants misspelled crisis phrases (one or two random edits) inside dataset
+messages and compares the exact substring screen with the exact screen
+plus FuzzyMatcher. It also counts fuzzy-only hits on messages that carry
+no crisis phrase (false positives), and times both matchers on random
+messages of growing length built from dataset words. It exits 1 if the
+fuzzy matcher misses a correctly spelled phrase.
+
+    python benchmarks/bench_fuzzy_matcher.py
+"""
+import json
+import os
+import random
+import string
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from crisis_detector import CrisisDetector
+from fuzzy_matcher import FuzzyMatcher
+
+
+def misspell(phrase, edits, rng):
+    """phrase with random letter edits inside its words of four or more letters"""
+    chars = list(phrase)
+    for _ in range(edits):
+        positions = [i for i, c in enumerate(chars) if c.isalpha()]
+        i = rng.choice(positions)
+        operation = rng.choice(['insert', 'delete', 'substitute', 'transpose'])
+        if operation == 'insert':
+            chars.insert(i, rng.choice(string.ascii_lowercase))
+        elif operation == 'delete':
+            del chars[i]
+        elif operation == 'substitute':
+            chars[i] = rng.choice(string.ascii_lowercase)
+        elif i + 1 < len(chars) and chars[i + 1].isalpha():
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    return ''.join(chars)
+
+
+def exact_match(phrases, text):
+    text = text.lower()
+    return any(phrase in text for phrase in phrases)
+
+
+def time_per_message(fn, messages, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for message in messages:
+            fn(message)
+        best = min(best, time.perf_counter() - started)
+    return best / len(messages)
+
+
+def main():
+    with open(os.path.join(ROOT, 'datasets', 'processed_training_data.json'), encoding='utf-8') as f:
+        data = json.load(f)
+    detector = CrisisDetector()
+    phrases = [keyword.lower() for keywords in detector.crisis_keywords.values() for keyword in keywords]
+    matcher = FuzzyMatcher(phrases)
+    matcher.resources.known_words  # load the word list outside the timings
+
+    missed = [phrase for phrase in phrases if matcher.search(phrase) is None]
+    for phrase in missed:
+        print("fuzzy matcher misses exact phrase:", phrase)
+
+    rng = random.Random(0)
+    texts = [item['input'] for item in data] + [item['response'] for item in data]
+    benign = [text for text in texts if not exact_match(phrases, text)]
+
+    print(f"{'edits':>5} {'cases':>6} {'exact recall':>13} {'fuzzy recall':>13}")
+    for edits in (1, 2):
+        cases = exact_hits = fuzzy_hits = 0
+        for phrase in phrases:
+            for _ in range(40):
+                words = rng.choice(benign).split()
+                words.insert(rng.randrange(len(words) + 1), misspell(phrase, edits, rng))
+                message = ' '.join(words)
+                exact = exact_match(phrases, message)
+                cases += 1
+                exact_hits += exact
+                fuzzy_hits += exact or matcher.search(message) is not None
+        print(f"{edits:>5} {cases:>6} {exact_hits / cases:>13.3f} {fuzzy_hits / cases:>13.3f}")
+
+    false_positives = [text for text in benign if matcher.search(text) is not None]
+    print(f"false positives: {len(false_positives)} of {len(benign)} messages without a crisis phrase")
+    for text in false_positives[:5]:
+        print("  ", matcher.search(text).phrase, "<-", repr(text[:80]))
+
+    vocabulary = ' '.join(benign).split()
+    random_false_positives = 0
+    print(f"{'words':>6} {'exact us':>9} {'fuzzy cold us':>14} {'fuzzy warm us':>14}")
+    for length in (10, 50, 200, 800):
+        messages = [' '.join(rng.choice(vocabulary) for _ in range(length)) for _ in range(200)]
+        exact = time_per_message(lambda m: exact_match(phrases, m), messages)
+
+        def cold(message):
+            matcher.match_word.cache_clear()
+            matcher.find(message)
+
+        fuzzy_cold = time_per_message(cold, messages)
+        fuzzy_warm = time_per_message(matcher.find, messages)
+        random_false_positives += sum(matcher.search(message) is not None for message in messages)
+        print(f"{length:>6} {exact * 1e6:>9.1f} {fuzzy_cold * 1e6:>14.1f} {fuzzy_warm * 1e6:>14.1f}")
+
+    print(f"false positives in the random messages above: {random_false_positives} of 800")
+    if missed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
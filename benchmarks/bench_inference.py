@@ -0,0 +1,88 @@
+"""Emotion classifier latency: sklearn calls versus the NumPy engine.
+
+Checks that NaiveBayesEngine returns bit-for-bit the same labels and
+confidences as transform/predict/predict_proba, then reports per-message
+latency and batch throughput.
+
+    python benchmarks/bench_inference.py
+"""
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from inference import SPARSE_BATCH, NaiveBayesEngine
+from model_trainer import fit_model
+
+
+def sklearn_predict(model, text):
+    X = model.vectorizer.transform([text])
+    return model.classifier.predict(X)[0], max(model.classifier.predict_proba(X)[0])
+
+
+def main():
+    with open(os.path.join(ROOT, 'datasets', 'processed_training_data.json'), encoding='utf-8') as f:
+        data = json.load(f)
+    texts = [item['input'] for item in data]
+    model = fit_model(texts, [item['emotion'] for item in data])
+    engine = NaiveBayesEngine.for_model(model)
+
+    rng = random.Random(0)
+    words = ' '.join(texts + [item['response'] for item in data]).split()
+    queries = texts + [' '.join(rng.choice(words) for _ in range(rng.randint(0, 30))) for _ in range(2000)]
+
+    X = model.vectorizer.transform(queries)
+    labels, confidences = engine.predict(queries)
+    assert np.array_equal(labels, model.classifier.predict(X)), "labels differ"
+    assert np.array_equal(confidences, model.classifier.predict_proba(X).max(axis=1)), "confidences differ"
+    for query in queries[:200]:
+        assert engine.predict_one(query) == sklearn_predict(model, query), query
+    for size in (SPARSE_BATCH - 1, SPARSE_BATCH):
+        batch = queries[-size:]
+        assert np.array_equal(engine.predict(batch)[1], model.classifier.predict_proba(
+            model.vectorizer.transform(batch)).max(axis=1)), f"batch of {size} differs"
+    print(f"parity: {len(queries)} messages identical")
+
+    sample = queries[:500]
+    started = time.perf_counter()
+    for query in sample:
+        sklearn_predict(model, query)
+    sklearn_us = (time.perf_counter() - started) / len(sample) * 1e6
+    started = time.perf_counter()
+    for query in sample:
+        engine.predict_one(query)
+    engine_us = (time.perf_counter() - started) / len(sample) * 1e6
+    print(f"per message: sklearn {sklearn_us:.0f} us, engine {engine_us:.0f} us")
+
+    def sklearn_batch(batch):
+        X = model.vectorizer.transform(batch)
+        model.classifier.predict(X)
+        model.classifier.predict_proba(X)
+
+    def rate(predict, batch, rounds):
+        # Best of five timings of about 2000 messages each, to ride out scheduler noise
+        best = float('inf')
+        for _ in range(5):
+            started = time.perf_counter()
+            for _ in range(rounds):
+                predict(batch)
+            best = min(best, time.perf_counter() - started)
+        return len(batch) * rounds / best
+
+    print(f"{'batch':>6} {'sklearn (msg/s)':>16} {'engine (msg/s)':>15}")
+    for size in (1, 16, 256, 2000):
+        batch = queries[:size]
+        rounds = max(1, 2000 // size)
+        sklearn_rate = rate(sklearn_batch, batch, rounds)
+        engine_rate = rate(engine.predict, batch, rounds)
+        print(f"{size:>6} {sklearn_rate:>16.0f} {engine_rate:>15.0f}")
+
+
+if __name__ == '__main__':
+    main()
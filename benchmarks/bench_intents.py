@@ -0,0 +1,138 @@
+"""Parity and latency benchmark for the compiled intent table in app.py.
+
+Replays a corpus through the old if/elif chain and through the intent
+router, checks that they make the same decision, and times both. Messages
+that mention a crisis keyword together with a greeting, breathing or music
+word are reported separately: the intent table puts crisis first on
+purpose, where the old chain answered the greeting or exercise instead.
+
+    python benchmarks/bench_intents.py
+"""
+import json
+import os
+import random
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app
+import keyword_matcher
+from intent_router import Intent, IntentRouter
+
+BREATHING_WORDS = ["breathing", "breathe", "breath", "breathing exercise", "calm breathing", "relaxation breathing"]
+PLAYLIST_WORDS = ["playlist", "music", "spotify", "song", "calm", "relax", "peace"]
+CRISIS_WORDS = ["suicide", "kill myself", "end my life", "don't want to live", "want to die", "harm myself", "hurt myself"]
+GREETINGS = ["hi", "hello", "hey", "greetings", "howdy", "good morning", "good afternoon", "good evening"]
+
+EXTRA_MESSAGES = [
+    "hi", "hello there", "hey, I want to die", "what is depression?", "how does therapy work",
+    "can meditation help with anxiety?", "why can't I sleep", "what is self care", "I'm so happy today",
+    "idk why im so sad rn", "I feel lonely and left out", "thanks for listening", "I'm overwhelmed at work",
+    "can you suggest some music?", "I need a breathing exercise", "I can't breathe and I want to die",
+    "I don't know what to do", "is stress normal?", "ngl I'm lowkey anxious", "I'm furious with my boss",
+]
+
+
+def legacy_chat(message):
+    """The decision chain as it was before the intent table"""
+    lowered = message.lower()
+    if any(word in lowered for word in BREATHING_WORDS):
+        return app.get_detailed_breathing_exercise(), 'calm', False
+    if any(word in lowered for word in PLAYLIST_WORDS):
+        return app.get_calm_playlist(), 'calm', False
+
+    is_crisis = any(keyword in lowered for keyword in CRISIS_WORDS)
+    normalized_input = app.normalize_text_shortcuts(lowered.strip())
+    emotion = app.classify_emotion(normalized_input)
+    is_question = ("?" in normalized_input) or any(normalized_input.startswith(word) for word in app.QUESTION_WORDS)
+
+    if any(greeting in normalized_input.split() for greeting in GREETINGS):
+        return random.choice(app.GREETING_RESPONSES), "neutral", False
+    if is_crisis:
+        return app.CRISIS_RESPONSE, "concerned", True
+    for topic, (answer, label) in app.TOPIC_ANSWERS.items():
+        if topic in normalized_input and is_question:
+            return answer, label, False
+    if emotion in app.EMOTION_RESPONSES:
+        question_reply, reply = app.EMOTION_RESPONSES[emotion]
+        if is_question:
+            return question_reply.format(topic=app.get_topic(normalized_input),
+                                         info=app.get_mental_health_info(normalized_input)), emotion, False
+        return reply, emotion, False
+    if is_question:
+        return app.get_mental_health_info(normalized_input), "informative", False
+    return app.DEFAULT_RESPONSE, "neutral", False
+
+
+def load_corpus():
+    with open(os.path.join(ROOT, 'datasets', 'processed_training_data.json'), encoding='utf-8') as f:
+        data = json.load(f)
+    corpus = [item['input'] for item in data] + EXTRA_MESSAGES
+    # Sentences from the bot's own replies give longer, more varied inputs
+    for item in data:
+        corpus.extend(sentence.strip() + '.' for sentence in item['response'].split('.') if sentence.strip())
+    return corpus
+
+
+def decide(fn, message, seed):
+    # Each message starts cold, as a new request would
+    keyword_matcher.shared_matcher.clear_cache()
+    random.seed(seed)
+    return fn(message)
+
+
+def check_parity(corpus):
+    matches, reordered, mismatches = 0, [], []
+    for seed, message in enumerate(corpus):
+        old = decide(legacy_chat, message, seed)
+        new = decide(lambda m: app.get_response(m, chat=True), message, seed)
+        if old == new:
+            matches += 1
+        elif new[2] and any(keyword in message.lower() for keyword in CRISIS_WORDS):
+            reordered.append(message)
+        else:
+            mismatches.append((message, old[1], new[1]))
+    return matches, reordered, mismatches
+
+
+def time_router_growth(corpus):
+    print(f"\n{'intents':>8} {'route (us/msg)':>15}")
+    for extra in (0, 100, 1000, 5000):
+        rng = random.Random(extra)
+        intents = list(app.INTENTS) + [
+            Intent(f"synthetic:{i}", 80, app._fallback_response,
+                   keywords=(''.join(rng.choice('qxzjv') for _ in range(8)),))
+            for i in range(extra)
+        ]
+        router = IntentRouter(f"bench{extra}", intents, app.intent_router.fallback)
+        prepared = [(m.lower(), app.normalize_text_shortcuts(m.lower().strip())) for m in corpus]
+        router.route(*prepared[0])
+        number = 20
+        seconds = timeit.timeit(lambda: [(keyword_matcher.shared_matcher.clear_cache(), router.route(raw, norm))
+                                         for raw, norm in prepared], number=number)
+        print(f"{len(intents):>8} {seconds / (number * len(prepared)) * 1e6:>15.2f}")
+
+
+def main():
+    corpus = load_corpus()
+    matches, reordered, mismatches = check_parity(corpus)
+    print(f"messages: {len(corpus)}  identical: {matches}  crisis promoted: {len(reordered)}  mismatched: {len(mismatches)}")
+    for message in reordered:
+        print(f"  crisis now wins: {message!r}")
+    for message, old, new in mismatches:
+        print(f"  MISMATCH {old} -> {new}: {message!r}")
+
+    number = 20
+    legacy = timeit.timeit(lambda: [decide(legacy_chat, m, 0) for m in corpus], number=number)
+    routed = timeit.timeit(lambda: [decide(lambda x: app.get_response(x, chat=True), m, 0) for m in corpus], number=number)
+    per = number * len(corpus)
+    print(f"\nlegacy chain: {legacy / per * 1e6:.2f} us/msg   intent table: {routed / per * 1e6:.2f} us/msg")
+
+    time_router_growth(corpus)
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
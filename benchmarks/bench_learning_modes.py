@@ -0,0 +1,90 @@
+"""Accuracy and update latency of the batch and online learning modes.
+
+Both modes learn the inputs of datasets/processed_training_data.json (the
+batch mode in one TF-IDF + MultinomialNB fit, the online mode one message at
+a time through partial_fit) and are scored on those inputs and on the
+dataset's replies, labeled with their example's emotion. Update latency is
+the cost of learning one new message once the history holds N examples;
+the online update is also timed at several hashed feature-space sizes,
+which it should not depend on.
+
+    python benchmarks/bench_learning_modes.py
+"""
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model_trainer import OnlineNaiveBayes, fit_model, make_online_vectorizer
+
+
+def accuracy(texts, labels, eval_texts, eval_labels):
+    model = fit_model(texts, labels)
+    batch = model.classifier.predict(model.vectorizer.transform(eval_texts))
+
+    vectorizer = make_online_vectorizer()
+    classifier = OnlineNaiveBayes(vectorizer.n_features)
+    for text, label in zip(texts, labels):
+        classifier.partial_fit(vectorizer.transform([text]), [label])
+    online = classifier.predict(vectorizer.transform(eval_texts))
+
+    score = lambda predicted: sum(p == l for p, l in zip(predicted, eval_labels)) / len(eval_labels)
+    agreement = sum(b == o for b, o in zip(batch, online)) / len(eval_labels)
+    return score(batch), score(online), agreement
+
+
+def history(texts, labels, history_size):
+    scale = history_size // len(texts) + 1
+    return (texts * scale)[:history_size], (labels * scale)[:history_size]
+
+
+def update_latency(texts, labels, history_size, repeats=5):
+    history_texts, history_labels = history(texts, labels, history_size)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fit_model(history_texts + [texts[0]], history_labels + [labels[0]])
+    batch_ms = (time.perf_counter() - started) / repeats * 1e3
+    return batch_ms, online_update_latency(texts, labels, history_size, repeats=repeats)
+
+
+def online_update_latency(texts, labels, history_size, n_features=2 ** 18, repeats=5):
+    history_texts, history_labels = history(texts, labels, history_size)
+    vectorizer = make_online_vectorizer(n_features)
+    classifier = OnlineNaiveBayes(vectorizer.n_features)
+    classifier.partial_fit(vectorizer.transform(history_texts), history_labels)
+    # Featurizing is the same for any history or feature-space size; time the update alone
+    messages = [vectorizer.transform([text]) for text in texts]
+    started = time.perf_counter()
+    for i in range(repeats * 20):
+        classifier = classifier.updated(messages[i % len(texts)], [labels[i % len(labels)]])
+    return (time.perf_counter() - started) / (repeats * 20) * 1e3
+
+
+def main():
+    with open(os.path.join(ROOT, 'datasets', 'processed_training_data.json'), encoding='utf-8') as f:
+        data = json.load(f)
+    texts = [item['input'] for item in data]
+    labels = [item['emotion'] for item in data]
+
+    # Most labels occur once, so hold out the bot replies rather than inputs
+    replies = [item['response'] for item in data]
+    for name, eval_texts in (('training inputs', texts), ('held-out replies', replies)):
+        batch_accuracy, online_accuracy, agreement = accuracy(texts, labels, eval_texts, labels)
+        print(f"{name:>16}: batch {batch_accuracy:.3f}  online {online_accuracy:.3f}  agreement {agreement:.3f}")
+
+    print(f"\n{'history':>8} {'batch refit (ms)':>17} {'online update (ms)':>19}  (featurizing excluded)")
+    for history_size in (43, 1000, 10000, 50000):
+        batch_ms, online_ms = update_latency(texts, labels, history_size)
+        print(f"{history_size:>8} {batch_ms:>17.2f} {online_ms:>19.3f}")
+
+    print(f"\n{'features':>8} {'online update (ms)':>19}")
+    for bits in (14, 18, 20):
+        online_ms = online_update_latency(texts, labels, 10000, n_features=2 ** bits)
+        print(f"{'2^' + str(bits):>8} {online_ms:>19.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Startup cost of loading the simple_app emotion model.
+
+Compares unpickling the old ml_model.pkl tuple, which also carried the
+whole conversation history, with ModelStore's memory-mapped arrays, and
+checks that the loaded model predicts exactly like the original.
+
+    python benchmarks/bench_model_store.py
+"""
+import datetime
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model_store import ModelStore
+from model_trainer import fit_model
+
+
+def best_of(function, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best * 1e3
+
+
+def main():
+    with open(os.path.join(ROOT, 'datasets', 'processed_training_data.json'), encoding='utf-8') as f:
+        data = json.load(f)
+    texts = [item['input'] for item in data]
+    labels = [item['emotion'] for item in data]
+    model = fit_model(texts, labels)
+
+    workdir = tempfile.mkdtemp()
+    try:
+        store = ModelStore(os.path.join(workdir, 'model_store'))
+        store.save(model)
+        loaded = store.load()
+        queries = texts + [item['response'] for item in data]
+        expected = model.classifier.predict_proba(model.vectorizer.transform(queries))
+        actual = loaded.classifier.predict_proba(loaded.vectorizer.transform(queries))
+        assert np.array_equal(expected, actual), "stored model predicts differently"
+
+        store_ms = best_of(store.load)
+        store_bytes = sum(os.path.getsize(os.path.join(root, name))
+                          for root, _, names in os.walk(store.directory) for name in names)
+        print(f"model store: {store_ms:.2f} ms, {store_bytes} bytes (any history size)")
+
+        print(f"{'history':>8} {'pickle (ms)':>12} {'pickle bytes':>13}")
+        for size in (0, 1000, 10000, 50000):
+            history = [{'user_input': f'{texts[i % len(texts)]} {i}', 'response': data[i % len(data)]['response'],
+                        'emotion': labels[i % len(labels)], 'timestamp': datetime.datetime.now()}
+                       for i in range(size)]
+            path = os.path.join(workdir, 'ml_model.pkl')
+            with open(path, 'wb') as f:
+                pickle.dump((model.vectorizer, model.classifier, {}, history), f)
+
+            def load_pickle():
+                with open(path, 'rb') as f:
+                    pickle.load(f)
+
+            print(f"{size:>8} {best_of(load_pickle):>12.2f} {os.path.getsize(path):>13}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
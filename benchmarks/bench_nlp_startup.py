@@ -0,0 +1,55 @@
+"""Startup cost of EmotionAnalyzer with lazily loaded NLTK resources.
+
+Reports the time to construct analyzers (no I/O), the one-time cost of
+loading the lemmatizer, stopwords and tokenizer on first use, and checks
+that every analyzer shares one loaded copy.
+
+    python benchmarks/bench_nlp_startup.py
+"""
+import gc
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+started = time.perf_counter()
+from emotion_analyzer import EmotionAnalyzer
+from nlp_resources import shared_resources
+import_seconds = time.perf_counter() - started
+
+
+def main():
+    # Collect the import garbage first, or the first full collection is charged to construction
+    gc.collect()
+    construct_ms = float('inf')
+    for _ in range(5):
+        started = time.perf_counter()
+        analyzers = [EmotionAnalyzer() for _ in range(100)]
+        construct_ms = min(construct_ms, (time.perf_counter() - started) / len(analyzers) * 1e3)
+
+    started = time.perf_counter()
+    analyzers[0].preprocess_text("I have been feeling sad and worried lately")
+    first_use_ms = (time.perf_counter() - started) * 1e3
+
+    started = time.perf_counter()
+    for analyzer in analyzers:
+        analyzer.preprocess_text("I have been feeling sad and worried lately")
+    warm_ms = (time.perf_counter() - started) / len(analyzers) * 1e3
+
+    assert all(analyzer.lemmatizer is analyzers[0].lemmatizer for analyzer in analyzers)
+    assert all(analyzer.stop_words is analyzers[0].stop_words for analyzer in analyzers)
+
+    print(f"import: {import_seconds * 1e3:.0f} ms")
+    print(f"construct: {construct_ms * 1e3:.1f} us per analyzer")
+    print(f"first use (loads resources): {first_use_ms:.1f} ms")
+    print(f"warm preprocess: {warm_ms:.3f} ms")
+    for key, seconds in sorted(shared_resources.timings.items()):
+        print(f"  {key}: {seconds * 1e3:.1f} ms")
+    if shared_resources.fallbacks:
+        print("fallbacks in use:", ', '.join(sorted(shared_resources.fallbacks)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Microbenchmark for the shortcut normalizer.
+
+Times per-message normalization as the shortcut table grows, next to the
+old approach of one re.sub per shortcut. Run from the repository root:
+
+    python benchmarks/bench_normalizer.py
+"""
+import os
+import random
+import re
+import string
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_normalizer import SHORTCUTS, ShortcutNormalizer
+
+MESSAGES = [
+    "idk why im so tired rn, ngl it's been a rough week tbh",
+    "ur right, i cant keep doing this lol",
+    "no cap the vibes at work are lowkey sus",
+    "I feel anxious about my exams and I dont know what to do",
+    "thanks for listening, that was really helpful",
+]
+
+
+def per_shortcut_regex(text, shortcuts):
+    for shortcut, full_form in shortcuts.items():
+        text = re.sub(rf'\b{re.escape(shortcut)}\b', full_form, text, flags=re.IGNORECASE)
+    return text.strip()
+
+
+def synthetic_shortcuts(count, seed=0):
+    rng = random.Random(seed)
+    table = dict(SHORTCUTS)
+    while len(table) < count:
+        word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+        table[word] = word.upper()
+    return table
+
+
+def time_per_message(fn, number):
+    seconds = timeit.timeit(lambda: [fn(m) for m in MESSAGES], number=number)
+    return seconds / (number * len(MESSAGES)) * 1e6
+
+
+def main():
+    print(f"{'shortcuts':>10} {'trie (us/msg)':>15} {'re.sub loop (us/msg)':>22}")
+    for size in (50, 500, 5000):
+        table = synthetic_shortcuts(size)
+        normalizer = ShortcutNormalizer(table)
+
+        for message in MESSAGES:
+            assert normalizer.normalize(message) == per_shortcut_regex(message, table), message
+
+        trie_us = time_per_message(normalizer.normalize, 2000)
+        loop_us = time_per_message(lambda m: per_shortcut_regex(m, table), max(1, 20000 // size))
+        print(f"{size:>10} {trie_us:>15.2f} {loop_us:>22.2f}")
+
+
+if __name__ == '__main__':
+    main()
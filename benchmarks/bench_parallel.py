@@ -0,0 +1,64 @@
+"""Throughput of ParallelScorer as worker processes are added.
+
+Builds a replay corpus from datasets/processed_training_data.json
+(randomized recombinations of its messages), scores it in-process with
+build_scorer, then with ParallelScorer at 1, 2, 4, ... workers up to the
+core count. Pool start-up is excluded from the timings. Every parallel
+run must match the in-process results exactly; the script exits 1 if
+one does not.
+
+    python benchmarks/bench_parallel.py [messages]
+"""
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # the scorers find the model store and legacy model here
+
+from parallel import ParallelScorer, build_scorer
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40000
+    with open(os.path.join(ROOT, 'datasets', 'processed_training_data.json'), encoding='utf-8') as f:
+        data = json.load(f)
+    texts = [item['input'] for item in data] + [item['response'] for item in data]
+    words = ' '.join(texts).split()
+    rng = random.Random(0)
+    corpus = [' '.join(rng.choice(words) for _ in range(rng.randint(3, 30))) for _ in range(count)]
+
+    scorer = build_scorer()
+    started = time.perf_counter()
+    expected = list(scorer.stream(corpus))
+    serial = time.perf_counter() - started
+    print(f"{count} messages on {os.cpu_count()} cores")
+    print(f"{'workers':>8} {'seconds':>8} {'msg/s':>9} {'speedup':>8} {'efficiency':>10}")
+    print(f"{'inline':>8} {serial:>8.2f} {count / serial:>9,.0f} {1.0:>8.2f} {'':>10}")
+
+    failed = False
+    workers = 1
+    while True:
+        with ParallelScorer(workers) as pool:
+            pool.score(corpus[:workers * pool.chunk_size])  # start and warm every worker
+            started = time.perf_counter()
+            results = pool.score(corpus)
+            elapsed = time.perf_counter() - started
+        speedup = serial / elapsed
+        print(f"{workers:>8} {elapsed:>8.2f} {count / elapsed:>9,.0f} {speedup:>8.2f} {speedup / workers:>10.0%}")
+        if results != expected:
+            print(f"FAIL: results with {workers} workers differ from the in-process run")
+            failed = True
+        if workers >= (os.cpu_count() or 1):
+            break
+        workers = min(workers * 2, os.cpu_count())
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
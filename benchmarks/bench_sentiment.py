@@ -0,0 +1,57 @@
+"""Polarity latency: TextBlob versus the built-in PolarityScorer.
+
+Checks that PolarityScorer returns exactly TextBlob(text).sentiment.polarity
+for the dataset and for randomized messages with negations, intensifiers,
+punctuation, contractions and emoticons, then reports per-message latency.
+Exits with status 1 on any mismatch.
+
+    python benchmarks/bench_sentiment.py
+"""
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from textblob import TextBlob
+
+from sentiment import PolarityScorer
+
+EXTRA_TOKENS = ['not', 'never', 'no', "don't", "isn't", "can't", "I'm", 'very', 'really', 'extremely', '!', '!!',
+                '?', '...', '.', ',', '(!)', ':)', ':-(', ': (', 'XD', '<3', 'Mr.', 'U.S.', '"', '\n\n']
+
+
+def main():
+    with open(os.path.join(ROOT, 'datasets', 'processed_training_data.json'), encoding='utf-8') as f:
+        data = json.load(f)
+    texts = [item['input'] for item in data] + [item['response'] for item in data]
+    rng = random.Random(0)
+    words = ' '.join(texts).split() + EXTRA_TOKENS * 20
+    texts += [' '.join(rng.choice(words) for _ in range(rng.randint(0, 25))) for _ in range(5000)]
+
+    expected = [TextBlob(text).sentiment.polarity for text in texts]
+    scorer = PolarityScorer(cache_size=0)
+    mismatches = [text for text, value in zip(texts, expected) if scorer.polarity(text) != value]
+    print(f"parity: {len(texts) - len(mismatches)}/{len(texts)} identical")
+    if mismatches:
+        print("first mismatch:", repr(mismatches[0]))
+        sys.exit(1)
+
+    sample = texts[:2000]
+    started = time.perf_counter()
+    for text in sample:
+        TextBlob(text).sentiment.polarity
+    textblob_us = (time.perf_counter() - started) / len(sample) * 1e6
+    started = time.perf_counter()
+    for text in sample:
+        scorer.polarity(text)
+    scorer_us = (time.perf_counter() - started) / len(sample) * 1e6
+    print(f"TextBlob: {textblob_us:.1f} us/message")
+    print(f"PolarityScorer: {scorer_us:.1f} us/message ({textblob_us / scorer_us:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Memory and update cost of per-session crisis risk tracking.
+
+Streams messages from far more sessions than the tracker may hold and
+checks that traced memory stops growing once it is full, then times
+single updates. A short scripted conversation checks that repeated
+worrying messages escalate and that the score fades afterwards; the
+script exits 1 if that does not happen.
+
+    python benchmarks/bench_session_risk.py [sessions]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from metrics import LatencyHistogram
+from session_risk import SessionRiskTracker
+
+MESSAGES = [
+    "had a long day at work",
+    "i feel hopeless about everything",
+    "i had a panic attack on the bus",
+    "sometimes i think i want to die",
+    "thanks, that helps a bit",
+    "i feel worthless and useless",
+    "what should i cook tonight",
+]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def escalation_check():
+    clock = FakeClock()
+    tracker = SessionRiskTracker(clock=clock)
+    levels = []
+    for text in ["i feel hopeless", "i feel worthless", "i want to die", "i want to die"]:
+        clock.now += 30
+        levels.append(tracker.update('s', text)['level'])
+    clock.now += 6 * 3600 / 10  # many half-lives later, still inside the idle TTL
+    faded = tracker.update('s', "hello again")['level']
+    print(f"escalation: {' -> '.join(levels)}, after a quiet hour: {faded}")
+    return levels[-1] == 'high' and levels[0] != 'high' and faded == 'none'
+
+
+def memory_profile(sessions, max_sessions):
+    clock = FakeClock()
+    tracker = SessionRiskTracker(max_sessions=max_sessions, clock=clock)
+    rng = random.Random(0)
+    tracemalloc.start()
+    checkpoints = {}
+    for index in range(sessions):
+        clock.now += 0.01
+        tracker.update(f"session-{index}", rng.choice(MESSAGES))
+        if index + 1 in (max_sessions // 2, max_sessions, sessions):
+            checkpoints[index + 1] = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    for count, size in sorted(checkpoints.items()):
+        held = min(count, max_sessions)
+        print(f"  after {count:>7} sessions: {size / 2**20:7.1f} MiB traced, {size / held:6.0f} B per held session")
+    print(f"  held {len(tracker.sessions)}, {tracker.stats()}")
+    return checkpoints
+
+
+def update_latency(sessions, updates):
+    tracker = SessionRiskTracker(max_sessions=sessions)
+    rng = random.Random(1)
+    histogram = LatencyHistogram()
+    ids = [f"session-{index}" for index in range(sessions)]
+    for session_id in ids:
+        tracker.update(session_id, "warm up")
+    for _ in range(updates):
+        session_id, text = rng.choice(ids), rng.choice(MESSAGES)
+        started = time.perf_counter()
+        tracker.update(session_id, text)
+        histogram.record(time.perf_counter() - started)
+    return histogram.summary()
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 250000
+    max_sessions = 100000
+    print(f"memory, {sessions} sessions through a tracker capped at {max_sessions}:")
+    checkpoints = memory_profile(sessions, max_sessions)
+    full, final = checkpoints[max_sessions], checkpoints[sessions]
+    print(f"  growth after the cap: {(final - full) / full * 100:+.1f}%")
+
+    print(f"update latency with {max_sessions} live sessions:", update_latency(max_sessions, 50000))
+
+    if not escalation_check():
+        print("FAIL: risk did not escalate and fade as expected")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Latency of nearest-template retrieval in simple_app.get_ml_response.
+
+Compares the old per-template transform + cosine_similarity loop with
+TemplateIndex as the number of stored templates grows.
+
+    python benchmarks/bench_template_retrieval.py
+"""
+import json
+import os
+import random
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+
+from template_index import TemplateIndex
+
+
+def per_template_loop(text, templates, vectorizer):
+    similar = []
+    for template_input, response in templates:
+        similarity = cosine_similarity(vectorizer.transform([text]), vectorizer.transform([template_input]))[0][0]
+        if similarity > 0.3:
+            similar.append((response, similarity))
+    similar.sort(key=lambda x: x[1], reverse=True)
+    return similar[:1]
+
+
+def main():
+    with open(os.path.join(ROOT, 'datasets', 'processed_training_data.json'), encoding='utf-8') as f:
+        data = json.load(f)
+    texts = [item['input'] for item in data]
+    vectorizer = TfidfVectorizer(analyzer='word', ngram_range=(1, 2), max_features=5000).fit(texts)
+
+    rng = random.Random(0)
+    words = ' '.join(texts + [item['response'] for item in data]).split()
+    queries = [' '.join(rng.choice(words) for _ in range(8)) for _ in range(50)]
+
+    print(f"{'templates':>10} {'index (ms/query)':>17} {'loop (ms/query)':>16}")
+    for size in (100, 1000, 10000, 50000):
+        templates = [(' '.join(rng.choice(words) for _ in range(rng.randint(3, 12))), f'response {i}')
+                     for i in range(size)]
+        index = TemplateIndex()
+        for template_input, response in templates:
+            index.add(template_input, response)
+        index.search(queries[0], vectorizer)  # build the matrix outside the timed loop
+
+        seconds = timeit.timeit(lambda: [index.search(q, vectorizer, k=1, threshold=0.3) for q in queries], number=5)
+        index_ms = seconds / (5 * len(queries)) * 1e3
+
+        # Reference ranking from one full sparse product, at every size
+        matrix = normalize(vectorizer.transform([t for t, _ in templates]))
+        for q in queries[:5]:
+            scores = (matrix @ normalize(vectorizer.transform([q])).T).toarray().ravel()
+            best = [templates[i][1] for i in np.argsort(-scores, kind='stable')[:1] if scores[i] > 0.3]
+            assert [r for r, _ in index.search(q, vectorizer, k=1, threshold=0.3)] == best, q
+
+        loop_ms = float('nan')
+        if size <= 1000:
+            sample = queries[:5]
+            for q in sample:
+                expected = [r for r, _ in per_template_loop(q, templates, vectorizer)]
+                assert [r for r, _ in index.search(q, vectorizer, k=1, threshold=0.3)] == expected, q
+            seconds = timeit.timeit(lambda: [per_template_loop(q, templates, vectorizer) for q in sample], number=1)
+            loop_ms = seconds / len(sample) * 1e3
+
+        print(f"{size:>10} {index_ms:>17.3f} {loop_ms:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Speech for canned responses: AudioCache hits vs synthesis.
+
+Pre-renders app.py's canned responses through CachedTTS into a scratch
+cache directory, then times each response again as a memory hit, as a
+disk hit (a fresh cache over the same directory, as after a restart) and,
+for comparison, as a fresh synthesis. Checks that every hit returns the
+same bytes that were synthesized, and that speech for other text is not
+written to disk, and exits 1 if not.
+
+Like bench_tts_service.py, a simulated engine stands in when pyttsx3
+cannot start here.
+
+    python benchmarks/bench_tts_cache.py [--synthesis-ms MS]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import bench_tts_service
+from tts_cache import AudioCache, CachedTTS
+from tts_service import TTSService
+
+
+def timed(tts, texts):
+    """Audio for each text and the per-call latencies in seconds"""
+    audio, latencies = [], []
+    for text in texts:
+        started = time.perf_counter()
+        audio.append(tts.synthesize(text))
+        latencies.append(time.perf_counter() - started)
+    return audio, sorted(latencies)
+
+
+def describe(name, latencies):
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:<16} p50 {p50 * 1e6:10.1f} us   p99 {p99 * 1e6:10.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--synthesis-ms', type=float, default=50.0)
+    args = parser.parse_args()
+    bench_tts_service.SYNTHESIS_SECONDS = args.synthesis_ms / 1000.0
+
+    import app
+    texts = list(dict.fromkeys(app.canned_responses()))
+    factory, kind = bench_tts_service.engine_factory()
+    directory = tempfile.mkdtemp(prefix='tts_cache_')
+    ok = True
+    try:
+        with TTSService(workers=2, engine_factory=factory) as service:
+            tts = CachedTTS(service, AudioCache(directory))
+            started = time.perf_counter()
+            rendered, cached, failed = tts.prerender(texts)
+            print(f"{len(texts)} canned responses ({kind} engine): pre-rendered {rendered} in "
+                  f"{time.perf_counter() - started:.2f}s, {failed} failed")
+            expected = [tts.cache.get(tts.key_for(text)) for text in texts]
+
+            audio, memory = timed(tts, texts)
+            ok = ok and audio == expected
+            restarted = CachedTTS(service, AudioCache(directory))
+            audio, disk = timed(restarted, texts)
+            ok = ok and audio == expected
+            uncached = CachedTTS(service, AudioCache(None, max_bytes=0))
+            _, synthesis = timed(uncached, texts)
+
+            # Speech for anything but a canned response must stay in memory
+            disk_bytes = tts.cache.stats()['disk_bytes']
+            tts.synthesize("My own words, spoken once.")
+            private = tts.cache.stats()['disk_bytes'] == disk_bytes
+            private = private and not tts.cache.persisted(tts.key_for("My own words, spoken once."))
+            ok = ok and private
+
+            describe("memory hit", memory)
+            describe("disk hit", disk)
+            describe("synthesis", synthesis)
+            print(f"cache: {tts.cache.stats()}")
+            print(f"after restart: {restarted.cache.stats()}")
+            print(f"ad-hoc text {'kept out of' if private else 'WRITTEN to'} the disk tier")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print("hits match synthesized audio" if ok else "MISMATCH between cached and synthesized audio")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
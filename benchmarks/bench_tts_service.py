@@ -0,0 +1,172 @@
+"""Text-to-speech throughput: TTSService worker pool vs one shared engine.
+
+Sends the same burst of concurrent synthesis jobs through one engine
+behind a lock (how /voice and /speak used to share pyttsx3) and through
+TTSService with 1, 2 and 4 worker processes, and reports jobs per second
+plus the service's queue and latency metrics. It then checks that a hung
+job times out and only its worker is replaced, that time spent queued
+for a worker does not count toward the timeout, and that a crisis job
+sent behind a backlog of normal jobs runs at once on the reserved
+worker; it exits 1 if not.
+
+pyttsx3 is used when an engine can be created here. Otherwise (e.g. no
+eSpeak) a simulated engine that takes --synthesis-ms per job stands in,
+so only the pool mechanics are measured; the output says which.
+
+    python benchmarks/bench_tts_service.py [jobs] [--synthesis-ms MS]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pyttsx3
+
+from admission import CRISIS
+from tts_service import TTSService
+
+HANG = "[hang]"
+SYNTHESIS_SECONDS = 0.05
+
+
+class SimulatedEngine:
+    """Writes a short WAV after SYNTHESIS_SECONDS; hangs on HANG"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def setProperty(self, name, value):
+        pass
+
+    def save_to_file(self, text, filename):
+        self.jobs.append((text, filename))
+
+    def runAndWait(self):
+        for text, filename in self.jobs:
+            time.sleep(3600 if text == HANG else SYNTHESIS_SECONDS)
+            with open(filename, 'wb') as f:
+                f.write(b'RIFF' + bytes(44 + len(text) * 100))
+        self.jobs = []
+
+
+def engine_factory():
+    try:
+        pyttsx3.init()
+        return pyttsx3.init, "pyttsx3"
+    except Exception as e:
+        print(f"pyttsx3 unavailable ({str(e)}); using a simulated {SYNTHESIS_SECONDS * 1000:.0f} ms engine")
+        return SimulatedEngine, "simulated"
+
+
+def burst(synthesize, texts):
+    """Run one synthesis per text from its own thread; returns (seconds, failures)"""
+    failures = []
+
+    def job(text):
+        try:
+            if not synthesize(text):
+                failures.append(text)
+        except Exception as e:
+            failures.append(str(e))
+
+    threads = [threading.Thread(target=job, args=(text,)) for text in texts]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, failures
+
+
+def shared_engine(factory):
+    """The old path: one engine for every request thread, serialized by a lock"""
+    engine = factory()
+    lock = threading.Lock()
+
+    def synthesize(text):
+        temp_file = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
+        temp_file.close()
+        try:
+            with lock:
+                engine.save_to_file(text, temp_file.name)
+                engine.runAndWait()
+            with open(temp_file.name, 'rb') as f:
+                return f.read()
+        finally:
+            os.unlink(temp_file.name)
+    return synthesize
+
+
+def main():
+    global SYNTHESIS_SECONDS
+    parser = argparse.ArgumentParser()
+    parser.add_argument('jobs', nargs='?', type=int, default=40)
+    parser.add_argument('--synthesis-ms', type=float, default=50.0)
+    args = parser.parse_args()
+    SYNTHESIS_SECONDS = args.synthesis_ms / 1000.0
+
+    factory, kind = engine_factory()
+    texts = [f"Response number {i}. Take a slow breath and notice how you feel." for i in range(args.jobs)]
+    print(f"{args.jobs} concurrent jobs, {kind} engine, {os.cpu_count()} CPU cores")
+
+    seconds, failures = burst(shared_engine(factory), texts)
+    print(f"shared engine + lock:  {seconds:6.2f}s  {args.jobs / seconds:7.1f} jobs/s  {len(failures)} failed")
+
+    for workers in (1, 2, 4):
+        with TTSService(workers=workers, max_queue=args.jobs, engine_factory=factory) as service:
+            service.synthesize("warm up")
+            seconds, failures = burst(service.synthesize, texts)
+            stats = service.stats()
+        print(f"TTSService {workers} worker(s): {seconds:6.2f}s  {args.jobs / seconds:7.1f} jobs/s  "
+              f"{len(failures)} failed  latency p50 {stats['latency']['p50_us'] / 1000:.0f} ms  "
+              f"p99 {stats['latency']['p99_us'] / 1000:.0f} ms  synthesis p50 "
+              f"{stats['synthesis']['p50_us'] / 1000:.0f} ms")
+
+    ok = True
+    if kind == "simulated":
+        with TTSService(workers=2, max_queue=args.jobs, timeout=1.0, engine_factory=factory) as service:
+            service.start()
+            hung = threading.Thread(target=burst, args=(service.synthesize, [HANG]))
+            hung.start()
+            time.sleep(0.1)
+            # Starts on the other worker and must finish even though the hung job's worker is killed meanwhile
+            seconds, failures = burst(service.synthesize, ["beside the hang"] * args.jobs)
+            hung.join()
+            recovered = service.synthesize("after the hang")
+            stats = service.stats()
+        ok = ok and not failures and bool(recovered) and stats['timeouts'] == 1 and stats['restarts'] == 1
+        print(f"hung job: timeouts {stats['timeouts']}, restarts {stats['restarts']}, "
+              f"{len(failures)} of the jobs beside it failed, next job {'ok' if recovered else 'failed'}")
+
+        jobs = int(3 / SYNTHESIS_SECONDS)
+        with TTSService(workers=1, max_queue=jobs, timeout=1.0, engine_factory=factory) as service:
+            service.synthesize("warm up")
+            seconds, failures = burst(service.synthesize, texts[:1] * jobs)
+            stats = service.stats()
+        ok = ok and not failures and stats['timeouts'] == 0
+        print(f"{jobs} jobs queued {seconds:.1f}s for one worker with a 1s timeout: "
+              f"{stats['timeouts']} timed out, {len(failures)} failed")
+
+        with TTSService(workers=1, max_queue=jobs, engine_factory=factory) as service:
+            service.synthesize("warm up")
+            service.synthesize("warm up", priority=CRISIS)
+            backlog = threading.Thread(target=burst, args=(service.synthesize, texts[:1] * 20))
+            backlog.start()
+            time.sleep(2 * SYNTHESIS_SECONDS)
+            started = time.perf_counter()
+            service.synthesize("crisis reply", priority=CRISIS)
+            crisis_seconds = time.perf_counter() - started
+            backlog.join()
+        ok = ok and crisis_seconds < 5 * SYNTHESIS_SECONDS
+        print(f"crisis job behind 20 normal jobs: {crisis_seconds * 1000:.0f} ms")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
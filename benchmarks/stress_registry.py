@@ -0,0 +1,181 @@
+"""Concurrency stress test for the model and template registry.
+
+Part 1 drives a Registry directly. Writer threads publish templates and
+retrained models while reader threads take snapshots and check them:
+versions never go backwards, template lists respect their cap, every
+index matches the dict templates of its snapshot, searches only return
+responses from that index, and each model's vectorizer and classifier
+belong together.
+
+Part 2 hammers simple_app's /chat from many threads through Flask's test
+client, in a scratch directory so the repository's model files and logs
+are untouched, and then checks the published snapshot the same way. It is
+skipped when simple_app cannot be imported here (e.g. no speech engine).
+
+Exits 1 on any failed check or request.
+
+    python benchmarks/stress_registry.py [threads] [seconds]
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model_trainer import fit_model
+from registry import Registry
+
+EMOTIONS = ['sadness', 'anxiety', 'anger', 'joy', 'fear']
+WORDS = "sad tired anxious happy angry scared lonely calm work exam family sleep friends future".split()
+
+
+def snapshot_problems(snapshot, max_templates, probe="feeling anxious about work"):
+    problems = []
+    for emotion, entries in snapshot.templates.items():
+        if len(entries) > max_templates:
+            problems.append(f"{emotion}: {len(entries)} templates over the cap")
+    for emotion, index in snapshot.indexes.items():
+        dict_entries = [entry for entry in snapshot.templates.get(emotion, ()) if isinstance(entry, dict)]
+        tail = dict_entries[-len(index):] if len(index) else []
+        if [entry['input'] for entry in tail] != index.inputs or [entry['response'] for entry in tail] != index.responses:
+            problems.append(f"{emotion}: index does not match the snapshot's templates")
+        if snapshot.model is not None and len(index):
+            for response, _ in index.search(probe, snapshot.model.vectorizer, k=3):
+                if response not in index.responses:
+                    problems.append(f"{emotion}: search returned a response from another snapshot")
+    model = snapshot.model
+    if model is not None and len(model.vectorizer.vocabulary_) != model.classifier.feature_log_prob_.shape[1]:
+        problems.append(f"model {model.version}: vectorizer and classifier from different versions")
+    return problems
+
+
+def stress_registry(threads, seconds):
+    registry = Registry(max_templates=20)
+    stop = threading.Event()
+    problems = []
+    checks = [0]
+    lock = threading.Lock()
+
+    def text(rng):
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 8)))
+
+    def writer(seed):
+        rng = random.Random(seed)
+        count = 0
+        while not stop.is_set():
+            count += 1
+            if count % 50 == 0:
+                examples = [(text(rng), rng.choice(EMOTIONS)) for _ in range(rng.randint(20, 200))]
+                registry.publish_model(fit_model([t for t, _ in examples], [e for _, e in examples], count))
+            elif count % 7 == 0:
+                registry.add_response(rng.choice(EMOTIONS), f"canned {rng.randint(0, 30)}")
+            else:
+                registry.add_template(rng.choice(EMOTIONS), {'input': text(rng), 'response': f"w{seed}-{count}"})
+
+    def reader():
+        last_version = -1
+        found = []
+        done = 0
+        while not stop.is_set():
+            snapshot = registry.current
+            if snapshot.version < last_version:
+                found.append("snapshot version went backwards")
+            last_version = snapshot.version
+            found.extend(snapshot_problems(snapshot, registry.max_templates))
+            done += 1
+        with lock:
+            problems.extend(found)
+            checks[0] += done
+
+    registry.publish_model(fit_model(WORDS, [EMOTIONS[i % len(EMOTIONS)] for i in range(len(WORDS))]))
+    workers = [threading.Thread(target=writer, args=(seed,)) for seed in range(max(1, threads // 4))]
+    workers += [threading.Thread(target=reader) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+
+    print(f"registry: {checks[0]} snapshots checked by {threads} readers, "
+          f"{registry.current.version} publications, {len(problems)} problems")
+    for problem in sorted(set(problems))[:10]:
+        print("  ", problem)
+    return not problems
+
+
+def stress_chat(threads, seconds):
+    scratch = tempfile.mkdtemp(prefix='stress_registry_')
+    os.chdir(scratch)
+    try:
+        return hammer_chat(threads, seconds)
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def hammer_chat(threads, seconds):
+    try:
+        import simple_app
+    except Exception as e:
+        print(f"/chat: skipped, simple_app could not be imported here ({str(e)})")
+        return True
+
+    messages = ["I feel so sad and alone", "I'm anxious about my exam", "work is stressing me out",
+                "I am so angry at everyone", "I'm scared of the future", "I'm happy today", "I feel lonely",
+                "my family makes me sad", "I can't sleep, I'm worried"]
+    stop = threading.Event()
+    failures = []
+    counts = []
+    lock = threading.Lock()
+
+    def client_thread(seed):
+        rng = random.Random(seed)
+        client = simple_app.app.test_client()
+        sent = 0
+        while not stop.is_set():
+            response = client.post('/chat', json={'message': f"{rng.choice(messages)} {rng.randint(0, 10 ** 6)}"})
+            sent += 1
+            if response.status_code != 200 or not response.json.get('response'):
+                with lock:
+                    failures.append(f"status {response.status_code}: {response.data[:80]!r}")
+        with lock:
+            counts.append(sent)
+
+    history_before = len(simple_app.conversation_history)
+    workers = [threading.Thread(target=client_thread, args=(seed,)) for seed in range(threads)]
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    simple_app.model_trainer.stop(timeout=30)
+
+    snapshot = simple_app.registry.current
+    problems = snapshot_problems(snapshot, simple_app.registry.max_templates)
+    print(f"/chat: {sum(counts)} requests from {threads} threads, {len(failures)} failed; "
+          f"history +{len(simple_app.conversation_history) - history_before}, "
+          f"registry version {snapshot.version}, model version {snapshot.model.version}, "
+          f"{len(problems)} snapshot problems")
+    for problem in (failures + problems)[:10]:
+        print("  ", problem)
+    return not failures and not problems
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    ok = stress_registry(threads, seconds)
+    ok = stress_chat(threads, seconds) and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,11 @@
 import random
-from textblob import TextBlob
+import keyword_matcher
+from analyzed_message import AnalyzedMessage
+
+GREETING_WORDS = ['hi', 'hello', 'hey']
+CRISIS_WORDS = ['suicide', 'kill myself', 'end it all', 'want to die']
+
+keyword_matcher.register_lexicon('chatbot', {'greeting': GREETING_WORDS, 'crisis': CRISIS_WORDS})
 
 class MentalHealthChatbot:
     def __init__(self):
@@ -38,20 +44,21 @@ class MentalHealthChatbot:
 
     def get_response(self, user_input, emotion):
 
-        user_input = user_input.lower()
+        message = AnalyzedMessage.of(user_input)
+        matched = message.keywords.matched('chatbot')
         
        
-        if any(word in user_input for word in ['hi', 'hello', 'hey']):
+        if 'greeting' in matched:
             return random.choice(self.responses['greeting'])
         
         
-        if any(word in user_input for word in ['suicide', 'kill myself', 'end it all', 'want to die']):
+        if 'crisis' in matched:
             return random.choice(self.responses['crisis'])
     
         if emotion in self.responses:
             return random.choice(self.responses[emotion])
         
-        sentiment = TextBlob(user_input).sentiment.polarity
+        sentiment = message.sentiment
         if sentiment < -0.5:
             return random.choice(self.responses['sadness'])
         elif sentiment > 0.5:
@@ -0,0 +1,226 @@
+import datetime
+import json
+import os
+import re
+import threading
+import time
+
+# segment-<n>.jsonl, or segment-<first>-<last>.jsonl for a compaction of segments first..last
+_SEGMENT_RE = re.compile(r'^segment-(\d{8})(?:-(\d{8}))?\.jsonl$')
+
+
+def _span(name):
+    """(first, last) segment numbers covered by a segment file name, or None"""
+    match = _SEGMENT_RE.match(name)
+    if match is None:
+        return None
+    return int(match.group(1)), int(match.group(2) or match.group(1))
+
+
+def _live(names):
+    """Segment names in write order, without those a compaction has replaced"""
+    spans = {name: _span(name) for name in names}
+    spans = {name: span for name, span in spans.items() if span is not None}
+    live = [name for name, (first, last) in spans.items()
+            if not any(other != name and other_first <= first and last <= other_last
+                       and other_last - other_first > last - first
+                       for other, (other_first, other_last) in spans.items())]
+    return sorted(live, key=lambda name: spans[name][1])
+
+
+def _encode(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+class ConversationLog:
+    """Append-only conversation log split into JSONL segment files.
+
+    Each record is one JSON line, so appending a message writes only that
+    message. Writes are flushed on every append and fsynced in batches
+    (every ``fsync_every`` records or ``fsync_interval`` seconds). When the
+    active segment passes ``segment_bytes`` a new one is started, and once
+    more than ``max_segments`` exist the closed ones are compacted into a
+    single segment on a background thread, so appends never wait for it.
+    Compaction keeps every record unless ``retain_records`` is set; then
+    only the newest ``retain_records`` stay in the log and the older ones
+    are moved to ``<directory>/archive``, which replay does not read, so
+    replay stays bounded however long the history grows. A compacted
+    segment is written under a new name that records the segments it
+    replaces, and those are unlinked only afterwards, so a crash at any
+    point leaves each record exactly once in the log. A torn last line
+    from a crash is skipped on replay.
+    """
+
+    def __init__(self, directory, segment_bytes=1024 * 1024, max_segments=8, retain_records=None,
+                 fsync_every=32, fsync_interval=1.0):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.retain_records = retain_records
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._compaction_lock = threading.Lock()  # one compaction at a time
+        self._compactor = None
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.archive_directory = os.path.join(directory, 'archive')
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+    def _segments(self):
+        return [os.path.join(self.directory, name) for name in _live(os.listdir(self.directory))]
+
+    def _recover(self):
+        """Finish or undo a compaction that a crash interrupted"""
+        names = os.listdir(self.directory)
+        live = set(_live(names))
+        for name in names:
+            if name.endswith('.compact') or _span(name) is not None and name not in live:
+                os.unlink(os.path.join(self.directory, name))
+        # An archive is only complete once its compacted segment was renamed into place
+        covered = [_span(name) for name in live]
+        if os.path.isdir(self.archive_directory):
+            for name in os.listdir(self.archive_directory):
+                span = _span(name)
+                if span is not None and not any(first <= span[0] and span[1] <= last for first, last in covered):
+                    os.unlink(os.path.join(self.archive_directory, name))
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f'segment-{number:08d}.jsonl')
+
+    def _open_active(self):
+        segments = self._segments()
+        # A compacted segment is never reopened; it may still be part of a running compaction
+        span = _span(os.path.basename(segments[-1])) if segments else None
+        if span and span[0] == span[1] and os.path.getsize(segments[-1]) < self.segment_bytes:
+            path = segments[-1]
+        else:
+            path = self._segment_path(self._last_number(segments) + 1)
+        self._file = open(path, 'ab')
+
+    def append(self, record):
+        line = json.dumps(record, default=_encode, ensure_ascii=False).encode('utf-8') + b'\n'
+        with self._lock:
+            if self._file is None:
+                self._open_active()
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+
+            now = time.monotonic()
+            if self._unsynced >= self.fsync_every or now - self._last_sync >= self.fsync_interval:
+                self._sync(now)
+
+            if self._file.tell() >= self.segment_bytes:
+                self._rotate()
+
+    def _sync(self, now=None):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic() if now is None else now
+
+    def _rotate(self):
+        self._sync()
+        self._file.close()
+        self._file = None
+        # Every segment is closed now, and the next one gets a higher number, so the compactor has them to itself
+        segments = self._segments()
+        if len(segments) >= self.max_segments and not (self._compactor and self._compactor.is_alive()):
+            self._compactor = threading.Thread(target=self._compact, args=(self._last_number(segments),),
+                                               name='conversation-log-compact', daemon=True)
+            self._compactor.start()
+
+    @staticmethod
+    def _last_number(segments):
+        return _span(os.path.basename(segments[-1]))[1] if segments else 0
+
+    def _compact(self, upto):
+        """Rewrite the segments numbered up to upto as one; records beyond retain_records go to the archive"""
+        with self._compaction_lock:
+            with self._lock:
+                segments = [path for path in self._segments() if _span(os.path.basename(path))[1] <= upto]
+            if len(segments) < 2:
+                return
+            first = _span(os.path.basename(segments[0]))[0]
+            last = _span(os.path.basename(segments[-1]))[1]
+            name = f'segment-{first:08d}-{last:08d}.jsonl'
+            records = [record for path in segments for record in self._read_segment(path)]
+
+            if self.retain_records is not None and len(records) > self.retain_records:
+                archived, records = records[:-self.retain_records], records[-self.retain_records:]
+                os.makedirs(self.archive_directory, exist_ok=True)
+                self._write_segment(os.path.join(self.archive_directory, name), archived)
+                print(f"Archived {len(archived)} conversation records to {self.archive_directory}")
+
+            # The new name covers first..last, so replay ignores the old segments from the moment it exists
+            self._write_segment(os.path.join(self.directory, name), records)
+            # replay opens its segments under the lock, so none disappears between listing and opening
+            with self._lock:
+                for path in segments:
+                    os.unlink(path)
+
+    def _write_segment(self, path, records):
+        temp_path = path + '.compact'
+        with open(temp_path, 'wb') as f:
+            for record in records:
+                f.write(json.dumps(record, default=_encode, ensure_ascii=False).encode('utf-8') + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        directory = os.open(os.path.dirname(path), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+    def compact(self):
+        """Compact every segment now, in the calling thread"""
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+            upto = self._last_number(self._segments())
+        self._compact(upto)
+
+    @staticmethod
+    def _read_lines(f):
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Torn write from a crash; everything before it is intact
+                continue
+
+    @classmethod
+    def _read_segment(cls, path):
+        with open(path, 'rb') as f:
+            yield from cls._read_lines(f)
+
+    def replay(self):
+        """Yield every record in write order"""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            files = [open(path, 'rb') for path in self._segments()]
+        try:
+            for f in files:
+                yield from self._read_lines(f)
+        finally:
+            for f in files:
+                f.close()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+            compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
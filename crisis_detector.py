@@ -1,5 +1,26 @@
-import re
-from textblob import TextBlob
+import hashlib
+import time
+from collections import namedtuple
+import keyword_matcher
+from analyzed_message import AnalyzedMessage
+from fuzzy_matcher import FuzzyMatcher
+from metrics import LatencyHistogram
+
+# tier is the tier that produced the answer; reason names the check that fired
+CrisisAssessment = namedtuple('CrisisAssessment', ['is_crisis', 'tier', 'reason'])
+
+# Phrases that signal immediate danger
+DANGER_PHRASES = [
+    'going to kill myself',
+    'going to hurt myself',
+    'right now',
+    'immediately',
+    'this instant'
+]
+
+# p99 latency budget for the tier 1 screen. It includes the message's one shared keyword
+# scan (cold in the budget test), which every later analyzer of the message reuses
+TIER1_P99_BUDGET = 150e-6
 
 class CrisisDetector:
     def __init__(self):
@@ -30,35 +51,97 @@ class CrisisDetector:
             'Crisis Text Line': '741741',
             'Emergency Services': '911'
         }
-
-    def detect_crisis(self, text):
-        
-        text = text.lower()
         
+        self.compile_screen()
         
-        for category, keywords in self.crisis_keywords.items():
-            for keyword in keywords:
-                if keyword in text:
-                    return True
-        
-        
-        sentiment = TextBlob(text).sentiment.polarity
-        if sentiment < -0.8:  # Very negative sentiment
-            return True
-        
-      
-        danger_patterns = [
-            r'going to (kill|hurt) myself',
-            r'right now',
-            r'immediately',
-            r'this instant'
+        # (name, check) pairs run in order when the tier 1 screen is inconclusive
+        self.tier2_checks = [
+            ('fuzzy_keyword', self._fuzzy_keyword),
+            ('negative_sentiment', self._very_negative)
         ]
+        self.metrics = {
+            'tier1': LatencyHistogram(),
+            'tier2': LatencyHistogram(),
+            'total': LatencyHistogram()
+        }
+
+    def detect_crisis(self, text):
         
-        for pattern in danger_patterns:
-            if re.search(pattern, text):
-                return True
+        return self.assess(text).is_crisis
+
+    def assess(self, text):
+        """Run the tiers in order and stop at the first one that finds a crisis"""
+        started = time.perf_counter()
+        message = AnalyzedMessage.of(text)
+        
+        # Tier 1: keyword and danger-phrase hits from the message's shared keyword scan
+        reason = self._screen(message)
+        tier1_done = time.perf_counter()
+        self.metrics['tier1'].record(tier1_done - started)
+        if reason:
+            self.metrics['total'].record(tier1_done - started)
+            return CrisisAssessment(True, 1, reason)
         
-        return False
+        # Tier 2: slower checks, only when tier 1 found nothing
+        result = self._tier2(message)
+        finished = time.perf_counter()
+        self.metrics['tier2'].record(finished - tier1_done)
+        self.metrics['total'].record(finished - started)
+        return result
+
+    def assess_many(self, texts):
+        """assess for each message of a batch, in order"""
+        messages = [AnalyzedMessage.of(text) for text in texts]
+        results = []
+        for message in messages:
+            reason = self._screen(message)
+            results.append(CrisisAssessment(True, 1, reason) if reason else self._tier2(message))
+        return results
+
+    def _tier2(self, message):
+        for name, check in self.tier2_checks:
+            if check(message):
+                return CrisisAssessment(True, 2, name)
+        return CrisisAssessment(False, 2, None)
+
+    def compile_screen(self):
+        """Register crisis keywords and danger phrases for tier 1; call after editing crisis_keywords"""
+        lexicon = {
+            'keyword': [keyword.lower() for keywords in self.crisis_keywords.values() for keyword in keywords],
+            'danger_phrase': list(DANGER_PHRASES)
+        }
+        # Detectors with the same phrases share one lexicon in the shared matcher
+        digest = hashlib.sha1(repr(sorted(lexicon['keyword'])).encode('utf-8')).hexdigest()[:12]
+        self.screen_lexicon = f'crisis_detector.screen.{digest}'
+        keyword_matcher.register_lexicon(self.screen_lexicon, lexicon)
+        # Misspelled keywords ("suicde", "kil myself") are left to tier 2
+        self.fuzzy_matcher = FuzzyMatcher(keyword for keywords in self.crisis_keywords.values() for keyword in keywords)
+
+    def screen(self, text):
+        """Tier 1 only: the reason a crisis phrase was found, or None"""
+        return self._screen(AnalyzedMessage.of(text))
+
+    def _screen(self, message):
+        # The message's one shared keyword scan; keywords win over danger phrases
+        hits = message.keywords.for_lexicon(self.screen_lexicon)
+        if not hits:
+            return None
+        return 'keyword' if any(hit.category == 'keyword' for hit in hits) else 'danger_phrase'
+
+    def _fuzzy_keyword(self, message):
+        return self.fuzzy_matcher.search(message.lower) is not None
+
+    def _very_negative(self, message):
+        return message.sentiment < -0.8
+
+    def warm_up(self):
+        """Build the fuzzy index, word list and sentiment table before serving, then clear the metrics"""
+        self.assess("warm up")
+        for histogram in self.metrics.values():
+            histogram.reset()
+
+    def latency_report(self):
+        return {name: histogram.summary() for name, histogram in self.metrics.items()}
 
     def get_emergency_contacts(self):
         return self.emergency_contacts 
\ No newline at end of file
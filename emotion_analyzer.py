@@ -1,20 +1,16 @@
-from textblob import TextBlob
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-import re
+import functools
+from nlp_resources import shared_resources
+from analyzed_message import AnalyzedMessage
 
 class EmotionAnalyzer:
-    def __init__(self):
+    def __init__(self, resources=None, lemma_cache_size=10000):
         
-        nltk.download('punkt')
-        nltk.download('stopwords')
-        nltk.download('wordnet')
-        nltk.download('averaged_perceptron_tagger')
+        # NLTK data is found locally and loaded on first use, shared by every analyzer
+        self.resources = resources or shared_resources
         
-        self.lemmatizer = WordNetLemmatizer()
-        self.stop_words = set(stopwords.words('english'))
+        # token -> lemma (None for stopwords), created on first use; cache_info() has the hit/miss counts
+        self.lemma_cache_size = lemma_cache_size
+        self._lemma_cache = None
         
         
         self.emotion_keywords = {
@@ -25,42 +21,79 @@ class EmotionAnalyzer:
             'fear': ['afraid', 'scared', 'terrified', 'frightened', 'horrified'],
             'disgust': ['disgusted', 'revolted', 'repulsed', 'sickened', 'appalled']
         }
+        self._keyword_emotions = None
+
+    def build_keyword_index(self):
+        """Map each keyword to its emotions; call again after changing emotion_keywords"""
+        index = {}
+        for emotion, keywords in self.emotion_keywords.items():
+            for keyword in keywords:
+                if emotion not in index.setdefault(keyword, ()):
+                    index[keyword] += (emotion,)
+        self._keyword_emotions = index
+        return index
+
+    @property
+    def keyword_emotions(self):
+        # Built on first use, so constructing an analyzer stays cheap
+        if self._keyword_emotions is None:
+            return self.build_keyword_index()
+        return self._keyword_emotions
+
+    @property
+    def lemma_for(self):
+        if self._lemma_cache is None:
+            self._lemma_cache = functools.lru_cache(maxsize=self.lemma_cache_size)(self._lemma_for)
+        return self._lemma_cache
+
+    @property
+    def lemmatizer(self):
+        return self.resources.lemmatizer
+
+    @property
+    def stop_words(self):
+        return self.resources.stop_words
+
+    def _lemma_for(self, token):
+        if token in self.stop_words:
+            return None
+        return self.lemmatizer.lemmatize(token)
+
+    def lemma_cache_info(self):
+        return self.lemma_for.cache_info()
 
     def preprocess_text(self, text):
         
-        text = text.lower()
-        
-      
-        text = re.sub(r'[^a-zA-Z\s]', '', text)
-        
+        # Lowercasing, cleaning and tokenizing are shared stages of the message
+        message = AnalyzedMessage.of(text, self.resources)
         
-        tokens = word_tokenize(text)
         
+        def lemmatize():
+            lemmas = (self.lemma_for(token) for token in message.tokens)
+            return [lemma for lemma in lemmas if lemma is not None]
         
-        tokens = [self.lemmatizer.lemmatize(token) for token in tokens if token not in self.stop_words]
-        
-        return tokens
+        return message.stage('lemmas', lemmatize)
 
     def analyze_emotion(self, text):
         
-        tokens = self.preprocess_text(text)
-        
-        
-        sentiment = TextBlob(text).sentiment.polarity
+        message = AnalyzedMessage.of(text, self.resources)
+        tokens = self.preprocess_text(message)
         
         
         emotion_counts = {emotion: 0 for emotion in self.emotion_keywords}
+        keyword_emotions = self.keyword_emotions
         
         for token in tokens:
-            for emotion, keywords in self.emotion_keywords.items():
-                if token in keywords:
-                    emotion_counts[emotion] += 1
+            for emotion in keyword_emotions.get(token, ()):
+                emotion_counts[emotion] += 1
         
        
         max_emotion = max(emotion_counts.items(), key=lambda x: x[1])
         
         
         if max_emotion[1] == 0:
+            # Sentiment is only needed when no keyword matched
+            sentiment = message.sentiment
             if sentiment < -0.3:
                 return 'sadness'
             elif sentiment > 0.3:
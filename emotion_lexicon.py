@@ -0,0 +1,27 @@
+import keyword_matcher
+
+EMOTION_KEYWORDS = {
+    "happy": ["happy", "excited", "yay", "glad", "good", "great", "joy", "awesome", "love", "delighted", "pleased", "content"],
+    "sad": ["sad", "upset", "depressed", "cry", "down", "miserable", "hurt", "unhappy", "grief", "blue", "heartbroken"],
+    "angry": ["angry", "mad", "furious", "irritated", "pissed", "annoyed", "rage", "frustrat", "bitter", "resentful"],
+    "anxious": ["anxious", "nervous", "scared", "worried", "stress", "panic", "fear", "tense", "restless", "uneasy", "dread"],
+    "confused": ["confused", "lost", "unsure", "uncertain", "puzzled", "perplexed", "bewildered", "doubt"],
+    "grateful": ["thank", "grateful", "appreciate", "thanks", "thankful", "blessed", "appreciative"],
+    "overwhelmed": ["overwhelmed", "too much", "can't handle", "exhausted", "burnout", "tired", "drained", "fatigued"],
+    "lonely": ["lonely", "alone", "isolated", "abandoned", "disconnected", "rejected", "left out"]
+}
+
+keyword_matcher.register_lexicon('app.emotion', EMOTION_KEYWORDS)
+
+def classify_emotion(text):
+    matched_emotions = {emotion: len(keywords)
+                        for emotion, keywords in keyword_matcher.scan(text).matched('app.emotion').items()}
+
+    if matched_emotions:
+        # Return the emotion with the most matches
+        return max(matched_emotions.items(), key=lambda x: x[1])[0]
+    return "neutral"
+
+def classify_emotions(messages):
+    """classify_emotion for a batch of AnalyzedMessages"""
+    return [classify_emotion(message.normalized) for message in messages]
@@ -0,0 +1,147 @@
+import functools
+import re
+from collections import namedtuple
+
+from nlp_resources import shared_resources
+
+# start and end are word positions in the message; distance is the total edits
+FuzzyMatch = namedtuple('FuzzyMatch', ['phrase', 'start', 'end', 'distance'])
+
+_WORD = re.compile(r"[a-z]+")
+_END = None  # trie key marking the last word of a phrase
+
+# Longest message word that is looked up; longer tokens are never misspelled keywords
+MAX_WORD_LENGTH = 24
+
+
+def words(text):
+    """Lowercase letter runs, with apostrophes dropped so "don't" reads as "dont" """
+    return _WORD.findall(text.lower().replace("'", "").replace("’", ""))
+
+
+def word_budget(word):
+    """Edits a keyword word tolerates: none for short words, where typos collide with real words"""
+    if len(word) <= 3:
+        return 0
+    return 1 if len(word) <= 7 else 2
+
+
+def deletes(word, depth):
+    """Every string reachable from word by deleting up to depth characters"""
+    found = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        found |= frontier
+    return found
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance with adjacent transpositions, or limit + 1 once it is exceeded"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class FuzzyMatcher:
+    """Typo-tolerant phrase matching over a small lexicon.
+
+    Phrases are split into words and stored in a word trie. Every lexicon
+    word is indexed by its symmetric-delete variants (the strings left after
+    removing up to ``word_budget`` characters), so a message word finds its
+    candidate keywords by generating its own deletes and looking them up,
+    then confirming each with a bounded edit distance. The cost per message
+    word depends only on its length, and the result is cached, so a message
+    costs a dictionary lookup per word plus a short trie walk from each
+    position: close to linear in the message.
+
+    Message words that are correctly spelled English (``known_words``) only
+    match exactly, so "homeless" does not read as a typo of "hopeless".
+    Multi-word phrases also match with their spaces dropped ("killmyself").
+    """
+
+    def __init__(self, phrases=(), max_distance=2, resources=None, cache_size=20000):
+        self.max_distance = max_distance
+        self.resources = resources or shared_resources
+        self.trie = {}
+        self.vocabulary = set()
+        self.delete_index = {}
+        self.match_word = functools.lru_cache(maxsize=cache_size)(self._match_word)
+        for phrase in phrases:
+            self.add(phrase)
+
+    def add(self, phrase):
+        parts = tuple(words(phrase))
+        if not parts:
+            return
+        forms = [parts]
+        if len(parts) > 1 and len(''.join(parts)) >= 8:
+            forms.append((''.join(parts),))
+        for form in forms:
+            budget = min(self.max_distance, 1 if len(''.join(form)) < 10 else 2)
+            node = self.trie
+            for word in form:
+                node = node.setdefault(word, {})
+                if word not in self.vocabulary:
+                    self.vocabulary.add(word)
+                    for variant in deletes(word, word_budget(word)):
+                        self.delete_index.setdefault(variant, set()).add(word)
+            node.setdefault(_END, (phrase, budget))
+        self.match_word.cache_clear()
+
+    def _match_word(self, token):
+        """(keyword word, edits) pairs a message word can stand for"""
+        if token in self.vocabulary:
+            return ((token, 0),)
+        if len(token) > MAX_WORD_LENGTH or token in self.resources.known_words:
+            return ()
+        found = []
+        for variant in deletes(token, self.max_distance):
+            for word in self.delete_index.get(variant, ()):
+                limit = min(self.max_distance, word_budget(word))
+                distance = edit_distance(token, word, limit)
+                if distance <= limit and (word, distance) not in found:
+                    found.append((word, distance))
+        return tuple(found)
+
+    def find(self, text):
+        """Every lexicon phrase in text within its edit budget"""
+        match_word = self.match_word
+        candidates = [match_word(token) for token in words(text)]
+        matches = []
+        for start, first in enumerate(candidates):
+            if not first:
+                continue  # most words are not keyword words
+            frontier = [(self.trie, 0)]
+            position = start
+            while frontier and position < len(candidates):
+                advanced = []
+                for node, distance in frontier:
+                    for word, edits in candidates[position]:
+                        child = node.get(word)
+                        if child is not None and distance + edits <= self.max_distance:
+                            advanced.append((child, distance + edits))
+                position += 1
+                for node, distance in advanced:
+                    end = node.get(_END)
+                    if end is not None and distance <= end[1]:
+                        matches.append(FuzzyMatch(end[0], start, position, distance))
+                frontier = advanced
+        return matches
+
+    def search(self, text):
+        """The first phrase found in text, or None"""
+        matches = self.find(text)
+        return matches[0] if matches else None
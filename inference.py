@@ -0,0 +1,202 @@
+import itertools
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+
+
+def _logsumexp(jll):
+    """Row-wise log-sum-exp, computed the same way as scikit-learn's NB"""
+    row_max = jll.max(axis=1, keepdims=True)
+    is_max = jll == row_max
+    rest = jll.copy()
+    rest[is_max] = -np.inf
+    max_count = is_max.sum(axis=1, keepdims=True, dtype=jll.dtype)
+    shift = np.where(np.isfinite(row_max), row_max, 0)
+    total = np.exp(rest - shift).sum(axis=1, keepdims=True, dtype=jll.dtype)
+    total = np.where(total == 0, total, total / max_count)
+    return (np.log1p(total) + np.log(max_count) + row_max)[:, 0]
+
+
+# Batches at least this large are scored as one sparse matrix; smaller ones,
+# down to a single chat message, are cheaper with plain padded arrays
+SPARSE_BATCH = 32
+
+
+class NaiveBayesEngine:
+    """TF-IDF + Multinomial Naive Bayes inference on plain NumPy arrays.
+
+    Built once per model version from its fitted vectorizer and
+    classifier. A message goes through the vectorizer's own analyzer, a
+    vocabulary dict lookup, idf weighting and L2 normalization, and is then
+    scored against the class log-probabilities, without the per-call input
+    validation of ``transform``/``predict``. A large batch is counted and
+    sorted in one ``np.unique`` call and scored with one sparse product.
+    Every step accumulates in the same order as scikit-learn's sparse code,
+    so labels and confidences are bit-for-bit identical to
+    ``predict``/``predict_proba``.
+    """
+
+    def __init__(self, analyzer, vocabulary, idf, sublinear_tf, binary, norm,
+                 classes, class_log_prior, feature_log_prob):
+        self.analyzer = analyzer
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.sublinear_tf = sublinear_tf
+        self.binary = binary
+        self.norm = norm
+        self.classes = classes
+        self.class_log_prior = np.asarray(class_log_prior)
+        # One contiguous row of class log-probabilities per feature
+        self.feature_log_prob = np.ascontiguousarray(np.asarray(feature_log_prob).T)
+
+    @classmethod
+    def for_model(cls, model):
+        """Return an engine for a ModelVersion, or None when the model is not TF-IDF + MultinomialNB"""
+        vectorizer, classifier = model.vectorizer, model.classifier
+        if not isinstance(vectorizer, TfidfVectorizer) or not isinstance(classifier, MultinomialNB):
+            return None
+        if vectorizer.norm not in (None, 'l2'):
+            return None
+        return cls(vectorizer.build_analyzer(), vectorizer.vocabulary_,
+                   vectorizer.idf_ if vectorizer.use_idf else None, vectorizer.sublinear_tf, vectorizer.binary,
+                   vectorizer.norm, classifier.classes_, classifier.class_log_prior_, classifier.feature_log_prob_)
+
+    def vectorize(self, texts):
+        """CSR matrix of tf-idf weights, one row per message, columns sorted within each row"""
+        get = self.vocabulary.get
+        analyzer = self.analyzer
+        terms = [[get(term, -1) for term in analyzer(text)] for text in texts]
+        count = len(terms)
+        flat = np.fromiter(itertools.chain.from_iterable(terms), dtype=np.intp)
+        owners = np.repeat(np.arange(count, dtype=np.intp), [len(row) for row in terms])
+        known = flat >= 0
+        # Sorting (row, column) keys counts every term and orders each row by column, as CSR does
+        keys, counts = np.unique(owners[known] * len(self.vocabulary) + flat[known], return_counts=True)
+        rows, columns = np.divmod(keys, len(self.vocabulary))
+        indptr = np.zeros(count + 1, dtype=np.intp)
+        np.cumsum(np.bincount(rows, minlength=count), out=indptr[1:])
+
+        values = np.ones(len(keys)) if self.binary else counts.astype(np.float64)
+        if self.sublinear_tf:
+            values = np.log(values) + 1.0
+        if self.idf is not None:
+            values *= self.idf[columns]
+        if self.norm == 'l2' and len(values):
+            # Running sum along each row, like the sequential loop in
+            # scikit-learn's normalizer; padding adds exact zeros
+            positions = np.arange(len(values)) - indptr[rows]
+            squares = np.zeros((count, positions.max() + 1))
+            squares[rows, positions] = values * values
+            norms = np.sqrt(np.cumsum(squares, axis=1)[:, -1])
+            norms[norms == 0] = 1.0
+            values /= norms[rows]
+        return sp.csr_matrix((values, columns, indptr), shape=(count, len(self.vocabulary)))
+
+    def joint_log_likelihood(self, texts):
+        """Unnormalized class log-probabilities, one row per message"""
+        if len(texts) < SPARSE_BATCH:
+            return self._padded_log_likelihood(texts)
+        # The same sparse product as MultinomialNB, so each row sums in column order
+        return self.vectorize(texts) @ self.feature_log_prob + self.class_log_prior
+
+    def _padded(self, texts):
+        """Padded (columns, tf-idf weights) arrays, one row per message in column order"""
+        lengths = []
+        flat_columns = []
+        flat_counts = []
+        for text in texts:
+            counts = {}
+            for term in self.analyzer(text):
+                column = self.vocabulary.get(term)
+                if column is not None:
+                    counts[column] = counts.get(column, 0) + 1
+            row = sorted(counts)
+            lengths.append(len(row))
+            flat_columns.extend(row)
+            flat_counts.extend(counts[column] for column in row)
+
+        width = max(lengths, default=0)
+        present = np.arange(width) < np.array(lengths, dtype=np.intp)[:, None]
+        columns = np.zeros((len(lengths), width), dtype=np.intp)
+        values = np.zeros((len(lengths), width))
+        columns[present] = flat_columns
+        values[present] = 1.0 if self.binary else flat_counts
+
+        if self.sublinear_tf:
+            values[present] = np.log(values[present]) + 1.0
+        if self.idf is not None:
+            values *= self.idf[columns]
+        if self.norm == 'l2' and width:
+            # Running sum along each row, like the sequential loop in
+            # scikit-learn's normalizer; padding adds exact zeros
+            norms = np.sqrt(np.cumsum(values * values, axis=1)[:, -1])
+            nonzero = norms != 0
+            values[nonzero] /= norms[nonzero, None]
+        return columns, values
+
+    def _padded_log_likelihood(self, texts):
+        columns, values = self._padded(texts)
+
+        # Add one feature per step so each row sums in column order, exactly
+        # as a CSR matrix product does; padded slots add 0.0
+        jll = np.zeros((len(values), len(self.classes)))
+        for position in range(values.shape[1]):
+            jll += values[:, position, None] * self.feature_log_prob[columns[:, position]]
+        return jll + self.class_log_prior
+
+    def predict(self, texts):
+        """Return (labels, confidences) for a batch of messages"""
+        jll = self.joint_log_likelihood(texts)
+        labels = self.classes[np.argmax(jll, axis=1)]
+        probabilities = np.exp(jll - _logsumexp(jll)[:, None])
+        return labels, probabilities.max(axis=1)
+
+    def predict_one(self, text):
+        """Return (label, confidence) for one message"""
+        labels, confidences = self.predict([text])
+        return labels[0], confidences[0]
+
+
+_engines = {}
+
+
+def engine_for(model):
+    """Cached engine for a ModelVersion; None when the model needs the sklearn path"""
+    key = (id(model.vectorizer), id(model.classifier))
+    cached = _engines.get(key)
+    # The entry holds both objects, so their ids cannot be reused while it exists
+    if cached is not None and cached[0] is model.vectorizer and cached[1] is model.classifier:
+        return cached[2]
+    engine = NaiveBayesEngine.for_model(model)
+    # Only the newest few versions are in use at any time
+    if len(_engines) >= 4:
+        _engines.clear()
+    _engines[key] = (model.vectorizer, model.classifier, engine)
+    return engine
+
+
+# Model labels below this confidence fall back to keyword analysis
+MIN_CONFIDENCE = 0.6
+
+
+class ModelEmotions:
+    """Model predictions for a batch, with keyword analysis below min_confidence"""
+
+    def __init__(self, model, fallback, min_confidence=MIN_CONFIDENCE):
+        self.model = model
+        self.fallback = fallback
+        self.min_confidence = min_confidence
+
+    def __call__(self, messages):
+        texts = [message.text for message in messages]
+        engine = engine_for(self.model)
+        if engine is not None:
+            labels, confidences = engine.predict(texts)
+        else:
+            X = self.model.vectorizer.transform(texts)
+            labels = self.model.classifier.predict(X)
+            confidences = self.model.classifier.predict_proba(X).max(axis=1)
+        return [str(label) if confidence >= self.min_confidence else self.fallback(message)
+                for message, label, confidence in zip(messages, labels, confidences)]
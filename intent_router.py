@@ -0,0 +1,60 @@
+from collections import namedtuple
+
+import keyword_matcher
+
+# An intent fires when one of its keywords appears in the chosen text
+# ('raw' message or 'normalized' input), when one of its tokens is a whole
+# word of the normalized input, or when its emotion was classified. The
+# lowest priority number among the fired intents wins.
+Intent = namedtuple('Intent', ['name', 'priority', 'respond', 'keywords', 'tokens', 'emotion',
+                               'source', 'requires_question', 'chat_only'])
+Intent.__new__.__defaults__ = ((), (), None, 'normalized', False, False)
+
+
+class IntentRouter:
+    """Compile a declarative intent table into one lookup.
+
+    Keyword intents are registered with the shared keyword matcher, token
+    intents go into a token -> intents dict and emotion intents into an
+    emotion -> intents dict. Routing a message is one scan per distinct text
+    plus dict lookups, so its cost does not grow with the number of intents.
+    """
+
+    def __init__(self, name, intents, fallback):
+        self.name = name
+        self.fallback = fallback
+        self.intents = {intent.name: intent for intent in intents}
+        self._by_token = {}
+        self._by_emotion = {}
+
+        lexicons = {'raw': {}, 'normalized': {}}
+        for intent in intents:
+            if intent.keywords:
+                lexicons[intent.source][intent.name] = intent.keywords
+            for token in intent.tokens:
+                self._by_token.setdefault(token, []).append(intent)
+            if intent.emotion:
+                self._by_emotion.setdefault(intent.emotion, []).append(intent)
+
+        for source, lexicon in lexicons.items():
+            keyword_matcher.register_lexicon(f'{name}.{source}', lexicon)
+
+    def route(self, raw_text, normalized_text, emotion=None, is_question=False, chat=False):
+        """Return the highest-priority intent that fires for the message"""
+        candidates = []
+        for source, text in (('raw', raw_text), ('normalized', normalized_text)):
+            for intent_name in keyword_matcher.scan(text).matched(f'{self.name}.{source}'):
+                candidates.append(self.intents[intent_name])
+        for token in set(normalized_text.split()):
+            candidates.extend(self._by_token.get(token, ()))
+        candidates.extend(self._by_emotion.get(emotion, ()))
+
+        best = self.fallback
+        for intent in candidates:
+            if intent.requires_question and not is_question:
+                continue
+            if intent.chat_only and not chat:
+                continue
+            if intent.priority < best.priority:
+                best = intent
+        return best
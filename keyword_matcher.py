@@ -0,0 +1,186 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+KeywordHit = namedtuple('KeywordHit', ['lexicon', 'category', 'keyword', 'start', 'end', 'whole_word'])
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+def _at_boundary(text, pos):
+    """Same test as the regex ``\\b`` assertion at ``pos``"""
+    before = pos > 0 and _is_word_char(text[pos - 1])
+    after = pos < len(text) and _is_word_char(text[pos])
+    return before != after
+
+
+class ScanResult:
+    """All keyword hits found in one message"""
+
+    def __init__(self, text, hits, order):
+        self.text = text
+        self.hits = hits
+        self._order = order
+        self._by_lexicon = None
+
+    def for_lexicon(self, lexicon):
+        if self._by_lexicon is None:
+            by_lexicon = {}
+            for hit in self.hits:
+                by_lexicon.setdefault(hit.lexicon, []).append(hit)
+            self._by_lexicon = by_lexicon
+        return self._by_lexicon.get(lexicon, ())
+
+    def matched(self, lexicon):
+        """Return {category: {keyword: whole_word}} in the lexicon's category order.
+
+        ``whole_word`` is True when at least one occurrence of the keyword sits
+        on word boundaries on both sides.
+        """
+        found = {}
+        for hit in self.for_lexicon(lexicon):
+            keywords = found.setdefault(hit.category, {})
+            keywords[hit.keyword] = keywords.get(hit.keyword, False) or hit.whole_word
+
+        order = self._order.get(lexicon, {})
+        return {category: found[category] for category in sorted(found, key=order.get)}
+
+    def any(self, lexicon, whole_word=False):
+        return any(hit.whole_word or not whole_word for hit in self.for_lexicon(lexicon))
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over every registered keyword lexicon.
+
+    A lexicon is a named ``{category: [keywords]}`` mapping. All lexicons are
+    compiled into one automaton, so a message is scanned once in O(n + hits)
+    and callers pick out the hits for their own lexicon. Matching is on the
+    lowercased text and reports every substring occurrence, with a flag for
+    whole-word occurrences. Recent scan results are cached by text so several
+    analyzers looking at the same message share a single pass.
+    """
+
+    def __init__(self, cache_size=256):
+        self._lexicons = {}
+        self._order = {}
+        self._lock = threading.Lock()
+        self._automaton = None
+        self._generation = 0
+        self._cache = OrderedDict()
+        self.cache_size = cache_size
+
+    def register(self, name, lexicon):
+        """Add or replace a lexicon; the automaton is rebuilt on next scan"""
+        lexicon = {category: tuple(keyword.lower() for keyword in keywords)
+                   for category, keywords in lexicon.items()}
+        order = {category: rank for rank, category in enumerate(lexicon)}
+        with self._lock:
+            if self._lexicons.get(name) == lexicon:
+                return
+            # Copy on write so results from earlier scans keep their view
+            self._lexicons = dict(self._lexicons, **{name: lexicon})
+            self._order = dict(self._order, **{name: order})
+            self._automaton = None
+            self._generation += 1
+            self._cache.clear()
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def categories(self, name):
+        return list(self._order.get(name, {}))
+
+    def _build(self):
+        goto = [{}]
+        outputs = [[]]
+
+        for name, lexicon in self._lexicons.items():
+            for category, keywords in lexicon.items():
+                for keyword in keywords:
+                    if not keyword:
+                        continue
+                    state = 0
+                    for char in keyword:
+                        next_state = goto[state].get(char)
+                        if next_state is None:
+                            next_state = len(goto)
+                            goto[state][char] = next_state
+                            goto.append({})
+                            outputs.append([])
+                        state = next_state
+                    entry = (name, category, keyword)
+                    if entry not in outputs[state]:
+                        outputs[state].append(entry)
+
+        # Breadth-first pass to set failure links and merge suffix outputs
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+
+        # Fold failure links into the transition tables so a scan does one
+        # lookup per character; every table also holds the root's transitions
+        delta = [{} for _ in goto]
+        for state in queue:
+            delta[state] = {**delta[fail[state]], **goto[state]}
+        delta = [{**goto[0], **transitions} for transitions in delta]
+
+        return delta, outputs
+
+    def scan(self, text):
+        text = text.lower()
+
+        with self._lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                return cached
+            if self._automaton is None:
+                self._automaton = self._build()
+            delta, outputs = self._automaton
+            order = self._order
+            generation = self._generation
+
+        states = []
+        append = states.append
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            append(state)
+
+        hits = []
+        for index in [index for index, state in enumerate(states) if outputs[state]]:
+            for name, category, keyword in outputs[states[index]]:
+                end = index + 1
+                start = end - len(keyword)
+                whole_word = _at_boundary(text, start) and _at_boundary(text, end)
+                hits.append(KeywordHit(name, category, keyword, start, end, whole_word))
+
+        result = ScanResult(text, hits, order)
+        with self._lock:
+            if generation == self._generation:
+                self._cache[text] = result
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+
+shared_matcher = KeywordMatcher()
+
+
+def register_lexicon(name, lexicon):
+    """Register a lexicon with the shared matcher"""
+    shared_matcher.register(name, lexicon)
+
+
+def scan(text):
+    """Scan text once against every lexicon registered with the shared matcher"""
+    return shared_matcher.scan(text)
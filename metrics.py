@@ -0,0 +1,63 @@
+import bisect
+import threading
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with percentile estimates.
+
+    Buckets grow geometrically from ``lowest`` to ``highest`` seconds, so
+    recording is a binary search plus a counter increment and memory stays
+    constant however many samples are recorded. Percentiles are reported as
+    the upper bound of the bucket that holds them, which over-estimates by
+    at most one bucket width (``growth``).
+    """
+
+    def __init__(self, lowest=1e-7, highest=10.0, growth=1.25):
+        bounds = [lowest]
+        while bounds[-1] < highest:
+            bounds.append(bounds[-1] * growth)
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last bucket holds anything above highest
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        index = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, q):
+        """Upper bound in seconds of the bucket holding the q-th percentile (0-100)"""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q / 100.0 * self.count
+            seen = 0
+            for index, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank and count:
+                    return min(self.bounds[index], self.max) if index < len(self.bounds) else self.max
+        return self.max
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.bounds) + 1)
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+
+    def summary(self):
+        """Count plus mean, p50, p99 and max in microseconds"""
+        return {
+            'count': self.count,
+            'mean_us': round(self.total / self.count * 1e6, 2) if self.count else 0.0,
+            'p50_us': round(self.percentile(50) * 1e6, 2),
+            'p99_us': round(self.percentile(99) * 1e6, 2),
+            'max_us': round(self.max * 1e6, 2),
+        }
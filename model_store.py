@@ -0,0 +1,141 @@
+import datetime
+import json
+import os
+import shutil
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+
+from model_trainer import ModelVersion
+
+FORMAT_VERSION = 1
+
+# TfidfVectorizer settings that change how text is featurized
+VECTORIZER_PARAMS = ('analyzer', 'lowercase', 'strip_accents', 'token_pattern', 'ngram_range', 'max_features',
+                     'binary', 'norm', 'use_idf', 'smooth_idf', 'sublinear_tf')
+
+# name -> (owner, attribute); each is written to <name>.npy
+ARRAYS = {
+    'vocabulary': ('vectorizer', None),
+    'idf': ('vectorizer', 'idf_'),
+    'classes': ('classifier', 'classes_'),
+    'class_count': ('classifier', 'class_count_'),
+    'class_log_prior': ('classifier', 'class_log_prior_'),
+    'feature_log_prob': ('classifier', 'feature_log_prob_'),
+}
+
+
+class ModelStore:
+    """Versioned on-disk store for the TF-IDF + Naive Bayes emotion model.
+
+    Each version is a directory of plain ``.npy`` arrays (vocabulary terms,
+    idf weights, class priors and feature log-probabilities) plus a
+    ``manifest.json`` with the vectorizer settings and training metadata.
+    Arrays are loaded with ``mmap_mode='r'``, so loading is independent of
+    model size and every worker process maps the same page-cache pages.
+    Conversation data is not stored here. A version is written to a
+    temporary directory and made current by atomically replacing the
+    ``CURRENT`` pointer, so readers never see a half-written model.
+    """
+
+    def __init__(self, directory, keep=3):
+        self.directory = directory
+        self.keep = keep
+
+    @staticmethod
+    def supports(model):
+        return isinstance(model.vectorizer, TfidfVectorizer) and isinstance(model.classifier, MultinomialNB)
+
+    def _version_path(self, version):
+        return os.path.join(self.directory, f'v{version:06d}')
+
+    def current_version(self):
+        try:
+            with open(os.path.join(self.directory, 'CURRENT'), encoding='utf-8') as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self, model):
+        """Write a model as a new version and make it current"""
+        if not self.supports(model):
+            raise ValueError(f"Cannot store {type(model.classifier).__name__} models")
+        vectorizer, classifier = model.vectorizer, model.classifier
+        if callable(vectorizer.analyzer) or vectorizer.tokenizer or vectorizer.preprocessor:
+            raise ValueError("Cannot store a vectorizer with custom callables")
+
+        vocabulary = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+        owners = {'vectorizer': vectorizer, 'classifier': classifier}
+        arrays = {name: np.asarray(vocabulary, dtype=str) if attribute is None
+                  else np.asarray(getattr(owners[owner], attribute))
+                  for name, (owner, attribute) in ARRAYS.items()}
+        manifest = {
+            'format': FORMAT_VERSION,
+            'version': model.version,
+            'trained_at': model.trained_at.isoformat() if model.trained_at else None,
+            'training_seconds': model.training_seconds,
+            'example_count': model.example_count,
+            'vectorizer': {name: getattr(vectorizer, name) for name in VECTORIZER_PARAMS},
+            'alpha': classifier.alpha,
+            'arrays': {name: {'dtype': array.dtype.str, 'shape': list(array.shape)} for name, array in arrays.items()},
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        final_path = self._version_path(model.version)
+        temp_path = f'{final_path}.tmp-{os.getpid()}'
+        shutil.rmtree(temp_path, ignore_errors=True)
+        os.makedirs(temp_path)
+        for name, array in arrays.items():
+            # Object arrays would need pickle and could not be memory-mapped
+            np.save(os.path.join(temp_path, f'{name}.npy'), array.astype(str) if array.dtype == object else array,
+                    allow_pickle=False)
+        with open(os.path.join(temp_path, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        shutil.rmtree(final_path, ignore_errors=True)
+        os.rename(temp_path, final_path)
+
+        pointer = os.path.join(self.directory, f'CURRENT.tmp-{os.getpid()}')
+        with open(pointer, 'w', encoding='utf-8') as f:
+            f.write(str(model.version))
+        os.replace(pointer, os.path.join(self.directory, 'CURRENT'))
+        self._prune(model.version)
+
+    def _prune(self, current):
+        versions = []
+        for name in os.listdir(self.directory):
+            if name.startswith('v') and name[1:].isdigit():
+                versions.append(int(name[1:]))
+        # Unlinking is safe for processes that still have the old arrays mapped
+        for version in sorted(v for v in versions if v != current)[:-self.keep + 1 or None]:
+            shutil.rmtree(self._version_path(version), ignore_errors=True)
+
+    def load(self, version=None):
+        """Return the stored ModelVersion, or None when the store is empty"""
+        version = self.current_version() if version is None else version
+        if version is None:
+            return None
+        path = self._version_path(version)
+        with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest['format'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported model format {manifest['format']}")
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r', allow_pickle=False)
+                  for name in ARRAYS}
+
+        params = dict(manifest['vectorizer'], ngram_range=tuple(manifest['vectorizer']['ngram_range']))
+        vectorizer = TfidfVectorizer(**params)
+        vectorizer.vocabulary_ = {term: index for index, term in enumerate(arrays['vocabulary'].tolist())}
+        vectorizer.idf_ = arrays['idf']
+
+        classifier = MultinomialNB(alpha=manifest['alpha'])
+        classifier.classes_ = np.asarray(arrays['classes'])
+        classifier.class_count_ = arrays['class_count']
+        classifier.class_log_prior_ = arrays['class_log_prior']
+        classifier.feature_log_prob_ = arrays['feature_log_prob']
+        classifier.n_features_in_ = arrays['feature_log_prob'].shape[1]
+
+        trained_at = manifest['trained_at']
+        return ModelVersion(manifest['version'], vectorizer, classifier,
+                            datetime.datetime.fromisoformat(trained_at) if trained_at else None,
+                            manifest['training_seconds'], manifest['example_count'])
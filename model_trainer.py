@@ -0,0 +1,310 @@
+import copy
+import datetime
+import queue
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+
+# One trained model. Versions are never mutated after they are published, so
+# a request that grabbed one keeps a consistent vectorizer/classifier pair.
+ModelVersion = namedtuple('ModelVersion', ['version', 'vectorizer', 'classifier', 'trained_at',
+                                           'training_seconds', 'example_count'])
+
+
+def fit_model(texts, labels, version=1):
+    """Fit the TF-IDF + Naive Bayes emotion classifier"""
+    started = time.perf_counter()
+    vectorizer = TfidfVectorizer(analyzer='word', ngram_range=(1, 2), max_features=5000)
+    X = vectorizer.fit_transform(texts)
+    classifier = MultinomialNB()
+    classifier.fit(X, labels)
+    return ModelVersion(version, vectorizer, classifier, datetime.datetime.now(),
+                        time.perf_counter() - started, len(texts))
+
+
+class BackgroundTrainer:
+    """Retrain the emotion model on a worker thread.
+
+    Request handlers call ``submit`` with each new labeled message and read
+    ``current`` for the model to use. The worker refits on every
+    ``retrain_every`` new examples and publishes the result by swapping the
+    ``current`` reference, so readers never wait on training and never see a
+    half-built model. ``on_publish`` runs on the worker after each swap,
+    e.g. to persist the model. ``on_swap`` runs on every change of
+    ``current``, including resumes and online updates, e.g. to hand the
+    model to a registry.
+    """
+
+    def __init__(self, examples=(), retrain_every=10, on_publish=None, on_swap=None):
+        self.retrain_every = retrain_every
+        self.on_publish = on_publish
+        self.on_swap = on_swap
+        self._current = None
+        self.last_error = None
+        self._examples = list(examples)  # (text, emotion) pairs
+        self._since_training = 0
+        self._training = False
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='model-trainer', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def current(self):
+        return self._current
+
+    @current.setter
+    def current(self, model):
+        self._current = model
+        if self.on_swap:
+            self.on_swap(model)
+
+    def publish(self, model):
+        self.current = model
+        if self.on_publish:
+            self.on_publish(model)
+
+    def train(self, examples):
+        """Fit on all examples synchronously and publish the result"""
+        self._examples = list(examples)
+        self._retrain()
+
+    def resume(self, model, examples):
+        """Adopt a previously saved model and the examples it was trained on"""
+        self._examples = list(examples)
+        self.current = model
+
+    def submit(self, text, emotion):
+        """Queue a labeled example for the next retrain"""
+        self._queue.put((text, emotion))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            self._examples.append(item)
+            self._since_training += 1
+
+            if self._since_training >= self.retrain_every:
+                self._retrain()
+
+    def _next_version(self):
+        return self.current.version + 1 if self.current else 1
+
+    def _retrain(self):
+        self._training = True
+        try:
+            texts = [text for text, _ in self._examples]
+            labels = [emotion for _, emotion in self._examples]
+            self.publish(fit_model(texts, labels, self._next_version()))
+            self._since_training = 0
+            self.last_error = None
+        except Exception as e:
+            print(f"Background retraining failed: {str(e)}")
+            self.last_error = str(e)
+        finally:
+            self._training = False
+
+    def status(self):
+        model = self.current
+        return {
+            'version': model.version if model else None,
+            'trained_at': model.trained_at.isoformat() if model else None,
+            'training_seconds': model.training_seconds if model else None,
+            'example_count': model.example_count if model else 0,
+            'pending_examples': self._queue.qsize() + self._since_training,
+            'training': self._training,
+            'last_error': self.last_error
+        }
+
+
+# Class counts are kept in chunks of this many features; a chunk is only allocated once a
+# class has seen one of its features, and only copied when an update changes it
+CHUNK_BITS = 9
+CHUNK_SIZE = 1 << CHUNK_BITS
+
+
+class OnlineNaiveBayes:
+    """Multinomial Naive Bayes that learns one message at a time.
+
+    Keeps raw per-class feature counts over a fixed-size hashed feature
+    space and computes log-probabilities only for the features present in a
+    query, so updates and ``predict`` cost O(nonzero features x classes)
+    instead of O(n_features x classes). New labels get a new row on first
+    sight. Predictions match ``MultinomialNB`` fitted on the same data.
+
+    A class row is a list of ``CHUNK_SIZE``-feature chunks, None until the
+    class sees one of its features. An estimator other threads can see is
+    never changed: ``updated`` returns a new one that copies the chunk
+    lists of the classes it changes and the chunks holding the message's
+    features, and shares everything else. ``partial_fit`` learns in place
+    and is only for an estimator that has not been published yet.
+    """
+
+    def __init__(self, n_features, alpha=1.0):
+        self.n_features = n_features
+        self.alpha = alpha
+        self.classes_ = np.array([], dtype=object)
+        self.class_count_ = np.zeros(0)
+        self._rows = ()  # one list of count chunks per class
+        self._class_totals = np.zeros(0)
+        self._class_index = {}
+
+    def updated(self, X, y):
+        """A new estimator that has also learned X, y; this one is left untouched"""
+        estimator = copy.copy(self)
+        estimator._class_index = dict(self._class_index)
+        return estimator.partial_fit(X, y)
+
+    def partial_fit(self, X, y):
+        X = X.tocsr()
+        rows = list(self._rows)
+        classes = list(self.classes_)
+        class_count = self.class_count_.copy()
+        class_totals = self._class_totals.copy()
+        copied = {}  # row -> chunks already copied by this call
+        for i, label in enumerate(y):
+            row = self._class_index.get(label)
+            if row is None:
+                row = self._class_index[label] = len(rows)
+                rows.append([None] * -(-self.n_features // CHUNK_SIZE))
+                classes.append(label)
+                class_count = np.append(class_count, 0.0)
+                class_totals = np.append(class_totals, 0.0)
+            if row not in copied:
+                rows[row] = list(rows[row])
+                copied[row] = set()
+            chunks, touched = rows[row], copied[row]
+            start, end = X.indptr[i], X.indptr[i + 1]
+            columns, values = X.indices[start:end], X.data[start:end]
+            for column, value in zip(columns.tolist(), values.tolist()):
+                chunk = column >> CHUNK_BITS
+                if chunk not in touched:
+                    counts = chunks[chunk]
+                    chunks[chunk] = np.zeros(CHUNK_SIZE) if counts is None else counts.copy()
+                    touched.add(chunk)
+                chunks[chunk][column & (CHUNK_SIZE - 1)] += value
+            class_totals[row] += values.sum()
+            class_count[row] += 1
+        self._rows = tuple(rows)
+        self.classes_ = np.array(classes, dtype=object)
+        self.class_count_ = class_count
+        self._class_totals = class_totals
+        return self
+
+    def _joint_log_likelihood(self, X):
+        X = X.tocsr()
+        log_prior = np.log(self.class_count_) - np.log(self.class_count_.sum())
+        log_totals = np.log(self._class_totals + self.alpha * self.n_features)
+        jll = np.empty((X.shape[0], len(self.classes_)))
+        for i in range(X.shape[0]):
+            start, end = X.indptr[i], X.indptr[i + 1]
+            columns, values = X.indices[start:end], X.data[start:end]
+            positions = [(column >> CHUNK_BITS, column & (CHUNK_SIZE - 1)) for column in columns.tolist()]
+            counts = np.array([[0.0 if chunks[chunk] is None else chunks[chunk][offset]
+                                for chunk, offset in positions] for chunks in self._rows])
+            counts = counts.reshape(len(self._rows), len(columns))
+            log_probs = np.log(counts + self.alpha)
+            jll[i] = log_probs @ values - values.sum() * log_totals + log_prior
+        return jll
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self._joint_log_likelihood(X), axis=1)]
+
+    def predict_proba(self, X):
+        jll = self._joint_log_likelihood(X)
+        jll -= jll.max(axis=1, keepdims=True)
+        probabilities = np.exp(jll)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+
+def make_online_vectorizer(n_features=2 ** 18):
+    """Stateless featurizer with the same tokens as the batch model"""
+    return HashingVectorizer(analyzer='word', ngram_range=(1, 2), n_features=n_features,
+                             alternate_sign=False, norm='l2')
+
+
+class OnlineTrainer(BackgroundTrainer):
+    """Learn from each submitted message as it arrives.
+
+    Uses a hashing featurizer, so memory stays fixed, and
+    ``OnlineNaiveBayes.updated``, so one update costs O(message length),
+    plus one list of ``n_features / CHUNK_SIZE`` references, no matter how
+    much history exists. Each
+    update builds a new estimator and publishes it as a new version in one
+    swap of ``current``, so a concurrent prediction, or a saved snapshot,
+    keeps the estimator it started with. ``on_publish`` only runs every
+    ``retrain_every`` updates.
+    """
+
+    def __init__(self, examples=(), retrain_every=10, on_publish=None, on_swap=None, n_features=2 ** 18):
+        super().__init__(examples, retrain_every, on_publish, on_swap)
+        self.n_features = n_features
+
+    def train(self, examples):
+        self._examples = []
+        started = time.perf_counter()
+        vectorizer = make_online_vectorizer(self.n_features)
+        classifier = OnlineNaiveBayes(self.n_features)
+        examples = list(examples)
+        if examples:
+            classifier.partial_fit(vectorizer.transform([text for text, _ in examples]),
+                                   [emotion for _, emotion in examples])
+        self.publish(ModelVersion(self._next_version(), vectorizer, classifier, datetime.datetime.now(),
+                                  time.perf_counter() - started, len(examples)))
+
+    def resume(self, model, examples):
+        # Counts are cheap to rebuild, and a saved model may predate the
+        # newest logged examples, so always relearn from the examples
+        self.train(examples)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            self._learn(*item)
+
+    def _learn(self, text, emotion):
+        model = self.current
+        self._training = True
+        try:
+            started = time.perf_counter()
+            classifier = model.classifier.updated(model.vectorizer.transform([text]), [emotion])
+            self.current = model._replace(version=model.version + 1, classifier=classifier,
+                                          trained_at=datetime.datetime.now(),
+                                          training_seconds=time.perf_counter() - started,
+                                          example_count=model.example_count + 1)
+            self._since_training += 1
+            if self._since_training >= self.retrain_every and self.on_publish:
+                self._since_training = 0
+                self.on_publish(self.current)
+            self.last_error = None
+        except Exception as e:
+            print(f"Online update failed: {str(e)}")
+            self.last_error = str(e)
+        finally:
+            self._training = False
+
+
+def make_trainer(mode, retrain_every=10, on_publish=None, on_swap=None):
+    """Return the trainer for a learning mode: 'batch' (full refit) or 'online'"""
+    if mode == 'online':
+        return OnlineTrainer(retrain_every=retrain_every, on_publish=on_publish, on_swap=on_swap)
+    if mode == 'batch':
+        return BackgroundTrainer(retrain_every=retrain_every, on_publish=on_publish, on_swap=on_swap)
+    raise ValueError(f"Unknown learning mode: {mode}")
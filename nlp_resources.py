@@ -0,0 +1,199 @@
+import argparse
+import os
+import threading
+import time
+
+import nltk
+
+# NLTK package name -> path nltk.data.find looks for
+RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'punkt_tab': 'tokenizers/punkt_tab',
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet',
+    'averaged_perceptron_tagger': 'taggers/averaged_perceptron_tagger',
+}
+
+
+class _IdentityLemmatizer:
+    """Stand-in used when the WordNet corpus is not installed"""
+
+    def lemmatize(self, word, pos='n'):
+        return word
+
+
+class NLPResources:
+    """Offline-first access to the NLTK data the analyzers need.
+
+    Resources are looked up in the local NLTK data path (``NLTK_DATA``,
+    ``~/nltk_data`` and the system locations, plus ``data_dir`` when given)
+    and loaded on first use, so constructing an analyzer does no I/O. In
+    serving mode the network is never touched: a missing resource is
+    reported once and replaced by a fallback (identity lemmatizer,
+    scikit-learn's English stopword list, whitespace tokenizer). Downloads
+    only happen with ``allow_download=True`` or through this module's
+    command line. Load times are recorded in ``timings``.
+    """
+
+    def __init__(self, data_dir=None, allow_download=False):
+        self.data_dir = data_dir
+        self.allow_download = allow_download
+        self.timings = {}
+        self.fallbacks = set()
+        self._available = {}
+        self._lock = threading.RLock()
+        self._lemmatizer = None
+        self._stop_words = None
+        self._tokenizer = None
+        self._known_words = None
+        if data_dir and data_dir not in nltk.data.path:
+            nltk.data.path.insert(0, data_dir)
+
+    def available(self, name):
+        """True when the resource is in the local data path (downloading it if allowed)"""
+        with self._lock:
+            if name not in self._available:
+                started = time.perf_counter()
+                found = self._find(name)
+                if not found and self.allow_download:
+                    nltk.download(name, download_dir=self.data_dir, quiet=True)
+                    found = self._find(name)
+                if not found:
+                    print(f"NLTK resource '{name}' is not installed; using a fallback")
+                self._available[name] = found
+                self.timings[f'find:{name}'] = time.perf_counter() - started
+            return self._available[name]
+
+    @staticmethod
+    def _find(name):
+        try:
+            nltk.data.find(RESOURCES.get(name, name))
+            return True
+        except LookupError:
+            return False
+
+    def _load(self, name, loader, fallback):
+        started = time.perf_counter()
+        try:
+            value = loader()
+        except (LookupError, OSError) as e:
+            print(f"Error loading NLTK resource '{name}': {str(e)}")
+            value = None
+        if value is None:
+            self.fallbacks.add(name)
+            value = fallback()
+        self.timings[f'load:{name}'] = time.perf_counter() - started
+        return value
+
+    @property
+    def lemmatizer(self):
+        if self._lemmatizer is None:
+            with self._lock:
+                if self._lemmatizer is None:
+                    self._lemmatizer = self._load('wordnet', self._load_lemmatizer, _IdentityLemmatizer)
+        return self._lemmatizer
+
+    def _load_lemmatizer(self):
+        if not self.available('wordnet'):
+            return None
+        from nltk.stem import WordNetLemmatizer
+        lemmatizer = WordNetLemmatizer()
+        # WordNet itself is loaded lazily; do it now so the cost lands here
+        lemmatizer.lemmatize('feelings')
+        return lemmatizer
+
+    @property
+    def stop_words(self):
+        if self._stop_words is None:
+            with self._lock:
+                if self._stop_words is None:
+                    self._stop_words = self._load('stopwords', self._load_stop_words, self._fallback_stop_words)
+        return self._stop_words
+
+    def _load_stop_words(self):
+        if not self.available('stopwords'):
+            return None
+        from nltk.corpus import stopwords
+        return frozenset(stopwords.words('english'))
+
+    @staticmethod
+    def _fallback_stop_words():
+        from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+        return frozenset(ENGLISH_STOP_WORDS)
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            with self._lock:
+                if self._tokenizer is None:
+                    self._tokenizer = self._load('punkt', self._load_tokenizer, lambda: str.split)
+        return self._tokenizer
+
+    def _load_tokenizer(self):
+        # Newer NLTK releases read punkt_tab, older ones punkt
+        if not (self.available('punkt_tab') or self.available('punkt')):
+            return None
+        from nltk.tokenize import word_tokenize
+        word_tokenize('warm up')
+        return word_tokenize
+
+    @property
+    def known_words(self):
+        """Correctly spelled English words, from the word list bundled with TextBlob"""
+        if self._known_words is None:
+            with self._lock:
+                if self._known_words is None:
+                    self._known_words = self._load('spelling', self._load_known_words, frozenset)
+        return self._known_words
+
+    @staticmethod
+    def _load_known_words():
+        from textblob.en import spelling
+        return frozenset(spelling)
+
+    def warm_up(self):
+        """Load every resource now, e.g. before a worker starts serving"""
+        return self.lemmatizer, self.stop_words, self.tokenizer, self.known_words
+
+    def report(self):
+        return {
+            'timings': dict(self.timings),
+            'fallbacks': sorted(self.fallbacks),
+            'available': dict(self._available),
+        }
+
+
+shared_resources = NLPResources(data_dir=os.environ.get('NLTK_DATA') or None,
+                                allow_download=os.environ.get('NLTK_ALLOW_DOWNLOAD') == '1')
+
+
+def download(names, data_dir=None):
+    """Fetch resources into the local corpus cache; run at deploy time, not in serving"""
+    for name in names:
+        if NLPResources._find(name):
+            print(f"{name}: already installed")
+        elif nltk.download(name, download_dir=data_dir, quiet=True):
+            print(f"{name}: downloaded")
+        else:
+            print(f"{name}: download failed")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Manage the local NLTK data used by the analyzers")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    download_parser = subparsers.add_parser('download', help="download resources into the local data path")
+    download_parser.add_argument('names', nargs='*', default=list(RESOURCES))
+    download_parser.add_argument('--dir', default=os.environ.get('NLTK_DATA'))
+    subparsers.add_parser('check', help="load every resource and report timings")
+    args = parser.parse_args()
+
+    if args.command == 'download':
+        download(args.names, args.dir)
+    else:
+        started = time.perf_counter()
+        shared_resources.warm_up()
+        print(f"Loaded NLP resources in {time.perf_counter() - started:.3f}s")
+        for key, seconds in sorted(shared_resources.timings.items()):
+            print(f"  {key}: {seconds * 1e3:.1f} ms")
+        if shared_resources.fallbacks:
+            print("  fallbacks:", ', '.join(sorted(shared_resources.fallbacks)))
@@ -0,0 +1,190 @@
+import itertools
+import multiprocessing
+import os
+import pickle
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from admission import Overloaded
+from batch import BatchScorer
+from emotion_analyzer import EmotionAnalyzer
+from emotion_lexicon import classify_emotions as lexicon_emotions
+from inference import ModelEmotions
+from model_store import ModelStore
+from model_trainer import ModelVersion
+from nlp_resources import shared_resources
+
+# Emotion classifiers a scorer can be built with
+EMOTION_MODES = ('model', 'analyzer', 'lexicon')
+
+def load_model(model_dir='model_store', legacy_path='ml_model.pkl'):
+    """Current ModelVersion from the model store, else the legacy pickle, else None"""
+    model = ModelStore(model_dir).load() if model_dir and os.path.isdir(model_dir) else None
+    if model is None and legacy_path and os.path.exists(legacy_path):
+        with open(legacy_path, 'rb') as f:
+            vectorizer, classifier, _, history = pickle.load(f)
+        model = ModelVersion(1, vectorizer, classifier, None, None, len(history))
+    return model
+
+
+def build_scorer(emotions='model', model_dir='model_store', crisis_phrases=(), chunk_size=500,
+                 classify_emotions=None, detect_crisis=None):
+    """A BatchScorer with its model and NLP resources loaded.
+
+    ``classify_emotions`` and ``detect_crisis``, when given, label the
+    chunks instead of the ``emotions`` mode and the CrisisDetector.
+    """
+    if emotions not in EMOTION_MODES:
+        raise ValueError(f"Unknown emotion mode '{emotions}'")
+    classify = classify_emotions
+    if classify is None and emotions == 'lexicon':
+        classify = lexicon_emotions
+    elif classify is None and emotions == 'model':
+        model = load_model(model_dir)
+        if model is None:
+            print("No trained model found; using keyword emotion analysis")
+        else:
+            classify = ModelEmotions(model, EmotionAnalyzer().analyze_emotion)
+    scorer = BatchScorer(classify, detect_crisis, crisis_phrases, chunk_size)
+    shared_resources.warm_up()
+    if scorer.detector is not None:
+        scorer.detector.warm_up()
+    return scorer
+
+
+_worker_scorer = None
+
+
+def _init_worker(options):
+    global _worker_scorer
+    # Workers report on stderr; stdout may be carrying results
+    sys.stdout = sys.stderr
+    _worker_scorer = build_scorer(**options)
+
+
+def _score_chunk(chunk, start):
+    return _worker_scorer.score(chunk, start)
+
+
+def _results(pending):
+    # A chunk in flight is a future, or an error item already in place of its results
+    return pending if isinstance(pending, list) else pending.result()
+
+
+class ParallelScorer:
+    """BatchScorer chunks spread over a pool of worker processes.
+
+    Each worker builds its own scorer once, when it starts, with the
+    model, the NLP resources and the crisis indexes already loaded, so a
+    chunk only pays for its own messages. Input is cut into ``chunk_size``
+    chunks and at most ``2 * workers`` chunks are in flight, so memory
+    stays bounded for inputs of any size; results are yielded in input
+    order, like ``BatchScorer.stream``. ``mp_context`` picks how workers
+    are started, as in ``ProcessPoolExecutor``. Use it as a context manager
+    or call ``close``.
+    """
+
+    def __init__(self, workers=None, emotions='model', model_dir='model_store', crisis_phrases=(), chunk_size=500,
+                 classify_emotions=None, detect_crisis=None, mp_context=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        options = {'emotions': emotions, 'model_dir': model_dir, 'crisis_phrases': tuple(crisis_phrases),
+                   'chunk_size': chunk_size, 'classify_emotions': classify_emotions, 'detect_crisis': detect_crisis}
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=mp_context,
+                                            initializer=_init_worker, initargs=(options,))
+
+    def start(self):
+        """Start the workers and build their scorers now rather than on the first chunk"""
+        self.executor.submit(os.getpid).result()
+        return self
+
+    def _submit(self, chunk, start):
+        return self.executor.submit(_score_chunk, chunk, start)
+
+    def stream(self, items, run=None, skip_overloaded=False):
+        """Yield results in input order, scoring chunks in the worker processes.
+
+        ``run`` and ``skip_overloaded`` work as in ``BatchScorer.stream``,
+        except that ``run`` only admits a chunk; it is scored in a worker.
+        """
+        in_flight = deque()
+        iterator = iter(items)
+        start = 0
+        while True:
+            chunk = list(itertools.islice(iterator, self.chunk_size))
+            if not chunk:
+                break
+            try:
+                in_flight.append(run(self._submit, chunk, start) if run else self._submit(chunk, start))
+            except Overloaded as e:
+                if not skip_overloaded:
+                    raise
+                in_flight.append([{'index': start, 'count': len(chunk), 'error': str(e)}])
+            start += len(chunk)
+            if len(in_flight) >= 2 * self.workers:
+                yield from _results(in_flight.popleft())
+        while in_flight:
+            yield from _results(in_flight.popleft())
+
+    def score(self, items):
+        return list(self.stream(items))
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PooledBatchScorer(BatchScorer):
+    """A BatchScorer that hands large inputs to a ParallelScorer.
+
+    Inputs of fewer than ``min_batch`` messages are scored in process, as
+    BatchScorer does. Larger ones go to worker processes that label with
+    the same ``classify_emotions`` and ``detect_crisis``. The workers are
+    forked by ``start``, which must run at startup, before the process has
+    any other thread: a fork copies locks that other threads may be
+    holding. Workers are not spawned, because a spawned worker imports the
+    app's main module again, with all its startup work. Until ``start``,
+    with a single worker, or where fork is not available, everything stays
+    in process.
+    """
+
+    def __init__(self, classify_emotions=None, detect_crisis=None, crisis_phrases=(), chunk_size=500,
+                 min_batch=2000, workers=None):
+        super().__init__(classify_emotions, detect_crisis, crisis_phrases, chunk_size)
+        self.options = {'classify_emotions': classify_emotions, 'detect_crisis': detect_crisis,
+                        'crisis_phrases': tuple(crisis_phrases)}
+        self.min_batch = min_batch
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Fork the worker processes, if there is more than one; call before starting any thread"""
+        with self._lock:
+            if self._pool is None and self.workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+                self._pool = ParallelScorer(self.workers, chunk_size=self.chunk_size,
+                                            mp_context=multiprocessing.get_context('fork'), **self.options).start()
+        return self
+
+    def stream(self, items, run=None, skip_overloaded=False):
+        """BatchScorer.stream, in the worker processes once min_batch messages have been read"""
+        iterator = iter(items)
+        head = list(itertools.islice(iterator, self.min_batch))
+        items = itertools.chain(head, iterator)
+        pool = self._pool
+        if pool is None or len(head) < self.min_batch:
+            return super().stream(items, run, skip_overloaded)
+        return pool.stream(items, run, skip_overloaded)
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
@@ -0,0 +1,83 @@
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+from template_index import TemplateIndex
+
+# templates: emotion -> tuple of templates (response strings or {'input', 'response', 'timestamp'} dicts)
+# indexes: emotion -> TemplateIndex over that emotion's dict templates
+Snapshot = namedtuple('Snapshot', ['version', 'model', 'templates', 'indexes'])
+
+_EMPTY = MappingProxyType({})
+
+
+def _indexed(template):
+    return isinstance(template, dict) and 'input' in template
+
+
+class Registry:
+    """The model and response templates that request threads read.
+
+    ``current`` is an immutable ``Snapshot``. A request reads it once, with
+    no lock, and uses that snapshot throughout, so it never sees a model
+    from one update and templates from another, or a template list being
+    trimmed. Writers serialize on a lock, copy only what they change (one
+    emotion's template tuple and index, and the small outer mappings) and
+    publish by replacing the ``current`` reference. Published templates and
+    indexes are never modified afterwards.
+    """
+
+    def __init__(self, max_templates=100):
+        self.max_templates = max_templates
+        self.current = Snapshot(0, None, _EMPTY, _EMPTY)
+        self._lock = threading.Lock()
+
+    def publish_model(self, model):
+        with self._lock:
+            snapshot = self.current
+            self.current = snapshot._replace(version=snapshot.version + 1, model=model)
+
+    def add_template(self, emotion, template):
+        """Publish one more template for emotion; the oldest beyond max_templates are dropped"""
+        with self._lock:
+            self._add(emotion, template)
+
+    def add_response(self, emotion, response):
+        """Publish a plain response template unless the emotion already has it"""
+        with self._lock:
+            if response not in self.current.templates.get(emotion, ()):
+                self._add(emotion, response)
+
+    def _add(self, emotion, template):
+        snapshot = self.current
+        entries = snapshot.templates.get(emotion, ()) + (template,)
+        if len(entries) > self.max_templates:
+            entries = entries[-self.max_templates:]
+        templates = dict(snapshot.templates)
+        templates[emotion] = entries
+
+        indexes = snapshot.indexes
+        index = indexes.get(emotion)
+        if _indexed(template):
+            index = (index or TemplateIndex(max_size=self.max_templates)).added(template['input'], template['response'])
+        if index is not None:
+            # The index covers exactly the dict templates still in the list
+            kept = sum(1 for entry in entries if _indexed(entry))
+            if len(index) > kept:
+                index = index.newest(kept)
+            if index is not indexes.get(emotion):
+                indexes = dict(indexes)
+                indexes[emotion] = index
+                indexes = MappingProxyType(indexes)
+
+        self.current = snapshot._replace(version=snapshot.version + 1,
+                                         templates=MappingProxyType(templates), indexes=indexes)
+
+    def stats(self):
+        snapshot = self.current
+        return {
+            'version': snapshot.version,
+            'model_version': snapshot.model.version if snapshot.model else None,
+            'templates': {emotion: len(entries) for emotion, entries in snapshot.templates.items()},
+            'indexed': {emotion: len(index) for emotion, index in snapshot.indexes.items()}
+        }
@@ -0,0 +1,176 @@
+import functools
+import re
+import threading
+
+from textblob import _text as pattern
+from textblob.en import sentiment as pattern_sentiment
+
+_LEADING = tuple(pattern.PUNCTUATION.replace(".", ""))
+_TRAILING = _LEADING + (".",)
+_SENTENCE_END = ("...", ".", "!", "?", pattern.EOS)
+_SENTENCE_TAIL = ("'", '"', "”", "’", "...", ".", "!", "?", ")", pattern.EOS)
+_QUOTES = ("“", "”", "‘", "’", "'", '"')
+_LINEBREAK = re.compile(r"\n{2,}")
+
+
+def tokenize(text):
+    """Words of text exactly as TextBlob's pattern tokenizer splits them.
+
+    Follows ``textblob._text.find_tokens`` step by step, with cheap checks
+    that skip the regular expressions and per-character loops when they
+    cannot change anything, which is the common case for chat messages.
+    """
+    if "'" in text:
+        for contraction, replacement in pattern.replacements.items():
+            text = text.replace(contraction, replacement)
+    if any(quote in text for quote in _QUOTES):
+        for quote in _QUOTES:
+            text = text.replace(quote, f" {quote} ")
+    if "\n" in text:
+        text = _LINEBREAK.sub(f" {pattern.EOS} ", text.replace("\r\n", "\n"))
+
+    tokens = []
+    for t in text.split():
+        if t.isalnum():
+            tokens.append(t)
+            continue
+        tail = []
+        while t.startswith(_LEADING) and t not in pattern.replacements:
+            tokens.append(t[0])
+            t = t[1:]
+        while t.endswith(_TRAILING) and t not in pattern.replacements:
+            if t.endswith(_LEADING):
+                tail.append(t[-1])
+                t = t[:-1]
+            if t.endswith("..."):
+                tail.append("...")
+                t = t[:-3].rstrip(".")
+            if t.endswith("."):
+                if (t in pattern.ABBREVIATIONS or pattern.RE_ABBR1.match(t) is not None
+                        or pattern.RE_ABBR2.match(t) is not None or pattern.RE_ABBR3.match(t) is not None):
+                    break
+                tail.append(t[-1])
+                t = t[:-1]
+        if t != "":
+            tokens.append(t)
+        tokens.extend(reversed(tail))
+
+    if not any(token in _SENTENCE_END for token in tokens):
+        sentences = [tokens] if tokens else []
+    else:
+        sentences, i, j = [[]], 0, 0
+        while j < len(tokens):
+            if tokens[j] in _SENTENCE_END:
+                while j < len(tokens) and tokens[j] in _SENTENCE_TAIL:
+                    if tokens[j] in ("'", '"') and sentences[-1].count(tokens[j]) % 2 == 0:
+                        break  # Balanced quotes
+                    j += 1
+                sentences[-1].extend(t for t in tokens[i:j] if t != pattern.EOS)
+                sentences.append([])
+                i = j
+            j += 1
+        sentences[-1].extend(tokens[i:j])
+
+    words = []
+    for sentence in sentences:
+        if not sentence:
+            continue
+        sentence = " ".join(sentence)
+        if "!" in sentence:
+            sentence = pattern.RE_SARCASM.sub("(!)", sentence)
+        if " " in sentence:
+            # Only re-joins emoticons that the tokenizer split apart
+            sentence = pattern.RE_EMOTICONS.sub(lambda m: m.group(1).replace(" ", "") + m.group(2), sentence)
+        words.extend(sentence.split())
+    return words
+
+
+class PolarityScorer:
+    """TextBlob-compatible polarity from a flat word table.
+
+    The table is built once from TextBlob's own English sentiment lexicon:
+    each word maps to its (polarity, subjectivity, intensity) averaged over
+    senses, whether it can modify the next word, and its label. Scoring a
+    message is one pass over its tokens with the same negation, intensifier,
+    exclamation, sarcasm and emoticon rules as ``TextBlob(text).sentiment``,
+    and returns the same float.
+    """
+
+    def __init__(self, cache_size=4096):
+        self._table = None
+        self._emoticons = None
+        self._lock = threading.Lock()
+        self.polarity = functools.lru_cache(maxsize=cache_size)(self._polarity)
+
+    def _load(self):
+        with self._lock:
+            if self._table is None:
+                words = dict(pattern_sentiment.items())
+                self._emoticons = {}
+                for (_, polarity), forms in pattern.EMOTICONS.items():
+                    for form in forms:
+                        # First emoticon group in declaration order wins
+                        self._emoticons.setdefault(form.lower(), polarity)
+                self._table = {
+                    word: (tuple(senses[None]), any(modifier in senses for modifier in pattern_sentiment.modifiers),
+                           pattern_sentiment.labeler.get(word))
+                    for word, senses in words.items()
+                }
+        return self._table
+
+    def assessments(self, words):
+        """Final polarity of every assessed chunk, in order"""
+        table = self._table or self._load()
+        negations = pattern_sentiment.negations
+        is_modifier = pattern_sentiment.modifier
+        found = []  # [polarity, intensity, negated]
+        m = None  # preceding modifier word
+        n = None  # preceding negation
+        for w in words:
+            entry = table.get(w)
+            if entry is not None:
+                (p, s, i), modifies, _ = entry
+                if m is None:
+                    found.append([p, i, False])
+                else:
+                    found[-1][0] = max(-1.0, min(p * found[-1][1], +1.0))
+                    found[-1][1] = i
+                if n is not None:
+                    found[-1][1] = 1.0 / found[-1][1]
+                    found[-1][2] = True
+                m = w if modifies else None
+                n = w if w in negations else None
+            else:
+                if w in negations:
+                    n = w
+                elif n and len(w.strip("'")) > 1:
+                    n = None
+                if n is not None and m is not None and is_modifier(m):
+                    found[-1][2] = True
+                    n = None
+                elif m and len(w) > 2:
+                    m = None
+                if w == "!" and found:
+                    found[-1][0] = max(-1.0, min(found[-1][0] * 1.25, +1.0))
+                if w == "(!)":
+                    found.append([0.0, 1.0, False])
+                if w.isalpha() is False and len(w) <= 5 and w not in pattern.PUNCTUATION:
+                    polarity = self._emoticons.get(w)
+                    if polarity is not None:
+                        found.append([polarity, 1.0, False])
+        return [p * -0.5 if negated else p for p, _, negated in found]
+
+    def _polarity(self, text):
+        total, count = 0, 0
+        for score in self.assessments([w.lower() for w in tokenize(text)]):
+            total += score
+            count += 1
+        return total / float(count or 1)
+
+
+default_scorer = PolarityScorer()
+
+
+def polarity(text):
+    """TextBlob(text).sentiment.polarity, computed with the shared scorer"""
+    return default_scorer.polarity(text)
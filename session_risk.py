@@ -0,0 +1,167 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from analyzed_message import AnalyzedMessage
+from crisis_detector import CrisisDetector
+
+# How much one matching message adds to its category's score
+CATEGORY_WEIGHTS = {
+    'suicide': 3.0,
+    'self_harm': 2.5,
+    'depression': 1.0,
+    'anxiety': 0.75
+}
+DEFAULT_WEIGHT = 1.0
+
+# Highest level whose threshold the decayed total reaches
+RISK_LEVELS = [
+    (6.0, 'high'),
+    (3.0, 'elevated'),
+    (1.0, 'watch')
+]
+NO_RISK = 'none'
+
+
+class _Session:
+    """Rolling state of one conversation: a decayed score per category"""
+
+    __slots__ = ('scores', 'updated', 'level', 'messages')
+
+    def __init__(self, categories, now):
+        self.scores = [0.0] * categories
+        self.updated = now
+        self.level = 0
+        self.messages = 0
+
+
+class SessionRiskTracker:
+    """Crisis risk across the messages of a conversation.
+
+    Every category of ``CrisisDetector.crisis_keywords`` keeps a score per
+    session that halves every ``half_life`` seconds and grows by the
+    category's weight whenever a message mentions it, so a run of worrying
+    messages adds up while an old one fades. An update is a fixed number of
+    substring tests plus one pass over the categories, and a session is one
+    small slotted object, whatever the length of the conversation.
+
+    Sessions live in an LRU ordered by last activity. Sessions idle for
+    ``idle_ttl`` seconds are dropped as new messages arrive, and the least
+    recently active one is evicted once ``max_sessions`` are held, so memory
+    stays bounded however many sessions come and go.
+    """
+
+    def __init__(self, detector=None, half_life=600.0, idle_ttl=3600.0, max_sessions=100000, clock=time.monotonic):
+        detector = detector or CrisisDetector()
+        self.categories = list(detector.crisis_keywords)
+        self.phrases = tuple((keyword.lower(), index) for index, category in enumerate(self.categories)
+                             for keyword in detector.crisis_keywords[category])
+        self.weights = [CATEGORY_WEIGHTS.get(category, DEFAULT_WEIGHT) for category in self.categories]
+        self.levels = [NO_RISK] + [name for _, name in reversed(RISK_LEVELS)]
+        self.thresholds = [threshold for threshold, _ in reversed(RISK_LEVELS)]
+        self.half_life = half_life
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self.sessions = OrderedDict()
+        self.evicted = 0
+        self.expired = 0
+        self._decay_rate = math.log(2) / half_life
+        self._lock = threading.Lock()
+
+    def hits(self, text):
+        """Indexes of the categories the message mentions"""
+        text = text.lower if isinstance(text, AnalyzedMessage) else text.lower()
+        found = set()
+        for phrase, index in self.phrases:
+            if phrase in text:
+                found.add(index)
+        return found
+
+    def update(self, session_id, text):
+        """Fold one message into the session's scores and return its risk.
+
+        Without a session_id the message is scored on its own and nothing
+        is stored.
+        """
+        hits = self.hits(text)
+        now = self.clock()
+        with self._lock:
+            if session_id is None:
+                session = _Session(len(self.categories), now)
+            else:
+                session = self.sessions.get(session_id)
+                if session is None:
+                    self._expire(now)
+                    session = self.sessions[session_id] = _Session(len(self.categories), now)
+                else:
+                    self.sessions.move_to_end(session_id)
+            scores = session.scores
+            elapsed = now - session.updated
+            if elapsed > 0:
+                decay = math.exp(-self._decay_rate * elapsed)
+                for index in range(len(scores)):
+                    scores[index] *= decay
+            for index in hits:
+                scores[index] += self.weights[index]
+            session.updated = now
+            session.messages += 1
+            previous = session.level
+            session.level = self._level(sum(scores))
+            return self._report(session, previous)
+
+    def get(self, session_id):
+        """Current risk of a session without adding a message, or None"""
+        now = self.clock()
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None or now - session.updated > self.idle_ttl:
+                return None
+            decay = math.exp(-self._decay_rate * (now - session.updated))
+            snapshot = _Session(0, now)
+            snapshot.scores = [score * decay for score in session.scores]
+            snapshot.messages = session.messages
+            snapshot.level = self._level(sum(snapshot.scores))
+            return self._report(snapshot, session.level)
+
+    def forget(self, session_id):
+        with self._lock:
+            self.sessions.pop(session_id, None)
+
+    def _level(self, score):
+        level = 0
+        for index, threshold in enumerate(self.thresholds):
+            if score >= threshold:
+                level = index + 1
+        return level
+
+    def _expire(self, now):
+        # Oldest activity sits at the front, so stop at the first live session
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if now - session.updated <= self.idle_ttl and len(self.sessions) < self.max_sessions:
+                break
+            self.sessions.popitem(last=False)
+            if now - session.updated > self.idle_ttl:
+                self.expired += 1
+            else:
+                self.evicted += 1
+
+    def _report(self, session, previous):
+        return {
+            'level': self.levels[session.level],
+            'score': round(sum(session.scores), 3),
+            'escalated': session.level > previous,
+            'categories': {category: round(score, 3)
+                           for category, score in zip(self.categories, session.scores) if score >= 0.01},
+            'messages': session.messages
+        }
+
+    def stats(self):
+        return {
+            'sessions': len(self.sessions),
+            'max_sessions': self.max_sessions,
+            'expired': self.expired,
+            'evicted': self.evicted
+        }
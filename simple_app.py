@@ -1,21 +1,32 @@
-from flask import Flask, request, jsonify, render_template, Response
+from flask import Flask, request, jsonify, render_template, Response, stream_with_context, url_for
 import random
 import re
 import speech_recognition as sr
-import pyttsx3
 import json
-import base64
 import os
 import io
-import tempfile
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.naive_bayes import MultinomialNB
 import pickle
 import datetime
 import pandas as pd
 from collections import defaultdict
+import keyword_matcher
+from registry import Registry
+from model_trainer import ModelVersion, make_trainer
+from conversation_log import ConversationLog
+from model_store import ModelStore
+from inference import ModelEmotions
+from analyzed_message import AnalyzedMessage
+from admission import AdmissionController, Overloaded, NORMAL
+from session_risk import SessionRiskTracker
+from fuzzy_matcher import FuzzyMatcher
+from batch import NDJSON, read_items, ndjson_lines
+from parallel import PooledBatchScorer
+from tts_service import TTSService
+from tts_cache import AudioCache, CachedTTS
+from audio_delivery import AudioLinks, send_audio, wants_audio_url
+from audio_profiles import requested_profile
+from audio_buffer import audio_source
 
 app = Flask(__name__)
 
@@ -163,69 +174,107 @@ training_data = [
     }
 ]
 
-# ML model variables
-vectorizer = None
-classifier = None
+# ML model variables; request handlers read one registry.current snapshot per request
 confidence_threshold = 0.3
-response_templates = {}
-conversation_history = []
+max_templates_per_emotion = 100
+registry = Registry(max_templates=max_templates_per_emotion)  # model, response templates and their indexes
+conversation_history = []  # append-only
+# Durable record of every conversation turn; startup replays only the newest retained_conversations,
+# older turns are moved to conversation_log/archive by background compaction
+retained_conversations = 10000
+conversation_log = ConversationLog('conversation_log', retain_records=retained_conversations)
 conversation_count = 0
 retraining_frequency = 10  # Retrain after every 10 conversations
+# 'batch' refits TF-IDF + Naive Bayes in the background; 'online' learns from each message with partial_fit
+learning_mode = os.environ.get('LEARNING_MODE', 'batch')
+model_store = ModelStore('model_store')  # versioned, memory-mapped model weights
+
+def save_model(model):
+    """Persist a published model's weights; conversations live in conversation_log"""
+    # Online models are relearned from the conversation log on startup
+    if model_store.supports(model):
+        model_store.save(model)
+    print("Model version", model.version, "trained with", model.example_count, "examples")
+
+def training_examples():
+    """(text, emotion) pairs from the conversation history"""
+    return [(item.get('input', item.get('user_input')), item['emotion']) for item in conversation_history]
+
+model_trainer = make_trainer(learning_mode, retrain_every=retraining_frequency, on_publish=save_model,
+                             on_swap=registry.publish_model)
+
+def seed_training_data():
+    """Start the history and templates from the built-in training data"""
+    for item in training_data:
+        conversation_history.append({
+            'input': item['input'],
+            'response': item['response'],
+            'emotion': item['emotion']
+        })
+        
+        # Initialize response templates
+        registry.add_response(item['emotion'], item['response'])
 
 def train_model():
     """Train the ML model for emotion classification"""
-    global vectorizer, classifier, response_templates, conversation_history
-    
     # Create initial training data if none exists
     if not conversation_history:
-        # Initialize with training data
-        for item in training_data:
-            conversation_history.append({
-                'input': item['input'],
-                'response': item['response'],
-                'emotion': item['emotion']
-            })
-            
-            # Initialize response templates
-            if item['emotion'] not in response_templates:
-                response_templates[item['emotion']] = []
-            
-            if item['response'] not in response_templates[item['emotion']]:
-                response_templates[item['emotion']].append(item['response'])
-    
-    # Extract data for training
-    texts = [item['input'] for item in conversation_history]
-    emotions = [item['emotion'] for item in conversation_history]
-    
-    # Initialize and fit the TF-IDF vectorizer
-    vectorizer = TfidfVectorizer(analyzer='word', ngram_range=(1, 2), max_features=5000)
-    X = vectorizer.fit_transform(texts)
-    
-    # Train a Multinomial Naive Bayes classifier
-    classifier = MultinomialNB()
-    classifier.fit(X, emotions)
-    
-    # Save the model
-    with open('ml_model.pkl', 'wb') as f:
-        pickle.dump((vectorizer, classifier, response_templates, conversation_history), f)
-    
-    print("Model trained successfully with", len(conversation_history), "examples")
+        seed_training_data()
+    
+    # Fit the vectorizer and Naive Bayes classifier, then publish and save
+    model_trainer.train(training_examples())
+
+def replay_conversation_log():
+    """Restore conversation turns from the append-only log"""
+    # One-time import of the history written by the old full-pickle format
+    if not any(True for _ in conversation_log.replay()) and os.path.exists('conversation_history.pkl'):
+        with open('conversation_history.pkl', 'rb') as f:
+            for item in pickle.load(f):
+                if 'user_input' in item:
+                    conversation_log.append(item)
+    
+    for record in conversation_log.replay():
+        if isinstance(record.get('timestamp'), str):
+            record['timestamp'] = datetime.datetime.fromisoformat(record['timestamp'])
+        conversation_history.append(record)
+        update_response_templates(record['user_input'], record['response'], record['emotion'], record['timestamp'])
+
+def load_legacy_model():
+    """Load a model from the old ml_model.pkl tuple and move it into the model store"""
+    try:
+        with open('ml_model.pkl', 'rb') as f:
+            vectorizer, classifier, _, history = pickle.load(f)
+    except (FileNotFoundError, EOFError):
+        return None
+    trained_at = datetime.datetime.fromtimestamp(os.path.getmtime('ml_model.pkl'))
+    model = ModelVersion(1, vectorizer, classifier, trained_at, None, len(history))
+    if model_store.supports(model):
+        model_store.save(model)
+    return model
 
 def load_or_create_model():
-    """Load existing model or create a new one"""
-    global vectorizer, classifier, response_templates, conversation_history
-    
+    """Load existing model or create a new one, then start background retraining"""
+    loaded_model = None
     try:
         # Try to load the existing model
-        with open('ml_model.pkl', 'rb') as f:
-            vectorizer, classifier, response_templates, conversation_history = pickle.load(f)
+        loaded_model = model_store.load() or load_legacy_model()
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error loading model: {str(e)}")
+    
+    if loaded_model:
         print("Model loaded successfully")
-    except (FileNotFoundError, EOFError):
+    else:
         print("No model found, creating a new one...")
+    
+    # Templates and history are rebuilt from the training data and the conversation log
+    seed_training_data()
+    replay_conversation_log()
+    
+    if loaded_model:
+        model_trainer.resume(loaded_model, training_examples())
+    else:
         train_model()
-
-# Initialize the model when the app starts
-load_or_create_model()
+    model_trainer.start()
 
 # Initialize learning parameters
 learning_rate = 0.1
@@ -350,6 +399,13 @@ crisis_keywords = [
     'hopeless', 'worthless', 'burden', 'unbearable'
 ]
 
+# Crisis messages get a reserved worker pool here, and a reserved speech worker in tts_service
+admission = AdmissionController(screen_phrases=crisis_keywords)
+BUSY_RESPONSE = {'error': "I'm getting a lot of messages right now. Please try again in a moment."}
+
+# Rolling crisis risk per conversation, keyed by the client's session_id
+session_risk = SessionRiskTracker()
+
 # Emotion keywords - expanded
 emotion_keywords = {
     'sadness': ['sad', 'depressed', 'unhappy', 'miserable', 'lonely', 'hopeless', 'blue', 'down', 'gloomy', 'heartbroken', 'grieving', 'melancholy', 'despair', 'disappointed', 'discouraged', 'defeated'],
@@ -419,6 +475,13 @@ real_time_patterns = {
     }
 }
 
+keyword_matcher.register_lexicon('simple_app.crisis', {'crisis': crisis_keywords})
+# Catches misspelled crisis keywords the exact scan misses
+crisis_fuzzy_matcher = FuzzyMatcher(crisis_keywords)
+keyword_matcher.register_lexicon('simple_app.emotion', emotion_keywords)
+for group, patterns in real_time_patterns.items():
+    keyword_matcher.register_lexicon(f'simple_app.{group}', patterns)
+
 # Crisis helpline numbers
 crisis_helplines = {
     'general': {
@@ -438,27 +501,25 @@ crisis_helplines = {
     }
 }
 
-# Initialize Text-to-Speech engine
-engine = pyttsx3.init()
-engine.setProperty('rate', 150)  # Speed of speech
-engine.setProperty('volume', 0.9)  # Volume level
+# Text-to-Speech runs in worker processes, each with its own pyttsx3 engine, one reserved for crisis replies;
+# they start on first use, not at import
+tts_service = TTSService()
+
+# Synthesized audio is cached in memory by text and voice settings; canned responses are pre-rendered at
+# startup and are the only audio kept on disk
+tts = CachedTTS(tts_service, AudioCache('tts_cache'))
+
+# With ?audio=url, /voice replies at once with a link; speech is synthesized when it is fetched
+audio_links = AudioLinks(tts)
 
 def analyze_emotion(text):
     """Enhanced emotion analysis with confidence scores"""
-    text = text.lower()
-    
     # Create a score dictionary for each emotion
     emotion_scores = {emotion: 0 for emotion in emotion_keywords.keys()}
     
-    # Calculate scores for each emotion
-    for emotion, keywords in emotion_keywords.items():
-        for keyword in keywords:
-            if keyword in text:
-                # Exact match gets higher score
-                if re.search(r'\b' + keyword + r'\b', text):
-                    emotion_scores[emotion] += 2
-                else:
-                    emotion_scores[emotion] += 1
+    # Calculate scores for each emotion; whole-word matches score higher
+    for emotion, keywords in AnalyzedMessage.of(text).keywords.matched('simple_app.emotion').items():
+        emotion_scores[emotion] = sum(2 if whole_word else 1 for whole_word in keywords.values())
     
     # Determine the primary emotion
     if max(emotion_scores.values()) > 0:
@@ -470,25 +531,29 @@ def analyze_emotion(text):
 
 def detect_crisis(text):
     """Enhanced crisis detection with severity rating"""
-    text = text.lower()
-    
     # Count crisis keywords
-    crisis_count = 0
-    matched_keywords = []
-    
-    for keyword in crisis_keywords:
-        if keyword in text:
-            crisis_count += 1
-            matched_keywords.append(keyword)
+    matched_keywords = list(AnalyzedMessage.of(text).keywords.matched('simple_app.crisis').get('crisis', {}))
+    crisis_count = len(matched_keywords)
     
     # Determine severity
-    is_crisis = crisis_count > 0
+    is_crisis = crisis_count > 0 or crisis_fuzzy_matcher.search(AnalyzedMessage.of(text).lower) is not None
     
     return is_crisis
 
+def chat_emotions(messages):
+    return [analyze_emotion(message) for message in messages]
+
+def chat_crises(messages):
+    return [detect_crisis(message) for message in messages]
+
+# Bulk scoring for transcripts and audits, with the emotion and crisis flag /chat returns; chunks are admitted
+# in the normal lane, and large inputs are scored in worker processes. The workers are forked here, once the
+# labels above are defined and before load_or_create_model starts the trainer thread
+batch_scorer = PooledBatchScorer(chat_emotions, chat_crises).start()
+
 def detect_therapeutic_need(text):
     """Detect specific therapeutic needs based on patterns"""
-    text = text.lower()
+    text = AnalyzedMessage.of(text).lower
     
     for need, patterns in therapy_patterns.items():
         for pattern in patterns:
@@ -497,17 +562,26 @@ def detect_therapeutic_need(text):
     
     return None
 
-def get_time_based_greeting():
-    """Get appropriate friendly greeting based on time of day"""
-    hour = datetime.datetime.now().hour
+def day_period(hour):
+    """'morning', 'afternoon', 'evening' or 'night' for an hour of the day"""
     if 5 <= hour < 12:
-        return "Good morning! 🌅 I'm here to chat and support you. How are you feeling today? Remember, it's okay to share whatever's on your mind."
+        return 'morning'
     elif 12 <= hour < 17:
-        return "Good afternoon! ☀️ I'm glad you're here. How's your day going? I'm here to listen and support you."
+        return 'afternoon'
     elif 17 <= hour < 22:
-        return "Good evening! 🌙 Welcome! I'm here to be your friendly chat companion. What would you like to talk about?"
-    else:
-        return "It's late, but I'm still here for you! 🌙 Sometimes the quiet hours are the best time to talk. How are you feeling?"
+        return 'evening'
+    return 'night'
+
+TIME_GREETINGS = {
+    'morning': "Good morning! 🌅 I'm here to chat and support you. How are you feeling today? Remember, it's okay to share whatever's on your mind.",
+    'afternoon': "Good afternoon! ☀️ I'm glad you're here. How's your day going? I'm here to listen and support you.",
+    'evening': "Good evening! 🌙 Welcome! I'm here to be your friendly chat companion. What would you like to talk about?",
+    'night': "It's late, but I'm still here for you! 🌙 Sometimes the quiet hours are the best time to talk. How are you feeling?"
+}
+
+def get_time_based_greeting():
+    """Get appropriate friendly greeting based on time of day"""
+    return TIME_GREETINGS[day_period(datetime.datetime.now().hour)]
 
 def analyze_context(text):
     """Analyze context of the conversation"""
@@ -517,25 +591,13 @@ def analyze_context(text):
         'health_focus': None
     }
     
-    text = text.lower()
-    
-    # Check time-based patterns
-    for time, keywords in real_time_patterns['time_based'].items():
-        if any(keyword in text for keyword in keywords):
-            context['time_of_day'] = time
-            break
+    result = AnalyzedMessage.of(text).keywords
     
-    # Check activity-based patterns
-    for activity, keywords in real_time_patterns['activity_based'].items():
-        if any(keyword in text for keyword in keywords):
-            context['activity'] = activity
-            break
-    
-    # Check health-based patterns
-    for health, keywords in real_time_patterns['health_based'].items():
-        if any(keyword in text for keyword in keywords):
-            context['health_focus'] = health
-            break
+    # First matching category of each pattern group, in declaration order
+    for key, group in (('time_of_day', 'time_based'), ('activity', 'activity_based'), ('health_focus', 'health_based')):
+        matched = result.matched(f'simple_app.{group}')
+        if matched:
+            context[key] = next(iter(matched))
     
     return context
 
@@ -575,71 +637,51 @@ def get_contextual_response(text, emotion, context):
     
     return " ".join(response_parts)
 
-def update_response_templates(user_input, response, emotion):
+def update_response_templates(user_input, response, emotion, timestamp=None):
     """Update response templates based on successful interactions"""
-    # Initialize response templates for the emotion if it doesn't exist
-    if emotion not in response_templates:
-        response_templates[emotion] = []
-    
-    # Add new template
-    response_templates[emotion].append({
+    # Publishes a new snapshot; the registry keeps the most recent templates per emotion
+    registry.add_template(emotion, {
         'input': user_input,
         'response': response,
-        'timestamp': datetime.datetime.now()
+        'timestamp': timestamp or datetime.datetime.now()
     })
-    
-    # Keep only the most recent 100 templates per emotion
-    if len(response_templates[emotion]) > 100:
-        response_templates[emotion] = response_templates[emotion][-100:]
 
 def get_ml_response(text, emotion):
     """Get response using ML model and templates"""
-    # Initialize response templates for the emotion if it doesn't exist
-    if emotion not in response_templates:
-        response_templates[emotion] = []
+    # One snapshot for the whole lookup, so the model and templates match
+    snapshot = registry.current
     
     # If no templates for this emotion, use contextual response
-    if len(response_templates[emotion]) == 0:
+    if not snapshot.templates.get(emotion):
         return get_contextual_response(text, emotion, analyze_context(text))
     
-    # Find similar past interactions
-    similar_responses = []
-    for template in response_templates[emotion]:
-        if isinstance(template, dict) and 'input' in template:
-            similarity = cosine_similarity(
-                vectorizer.transform([text]),
-                vectorizer.transform([template['input']])
-            )[0][0]
-            
-            if similarity > 0.3:  # Similarity threshold
-                similar_responses.append((template['response'], similarity))
+    # Find the most similar past interaction above the similarity threshold
+    index = snapshot.indexes.get(emotion)
+    similar_responses = index.search(text, snapshot.model.vectorizer, k=1, threshold=0.3) if index else []
     
     if similar_responses:
-        # Sort by similarity and get the best match
-        similar_responses.sort(key=lambda x: x[1], reverse=True)
         return similar_responses[0][0]
     
     return get_contextual_response(text, emotion, analyze_context(text))
 
 def update_conversation_history(user_input, response, emotion):
     """Update conversation history and ML model"""
-    conversation_history.append({
+    record = {
         'user_input': user_input,
         'response': response,
         'emotion': emotion,
         'timestamp': datetime.datetime.now()
-    })
+    }
+    conversation_history.append(record)
     
     # Update response templates
     update_response_templates(user_input, response, emotion)
     
-    # Retrain model periodically
-    if len(conversation_history) % 10 == 0:
-        train_model()
+    # Queue the example; the trainer retrains in the background every retraining_frequency examples
+    model_trainer.submit(user_input, emotion)
     
-    # Save updated history
-    with open('conversation_history.pkl', 'wb') as f:
-        pickle.dump(conversation_history, f)
+    # Append this turn to the log; earlier turns are never rewritten
+    conversation_log.append(record)
 
 def get_crisis_helpline_info():
     """Get formatted crisis helpline information"""
@@ -655,7 +697,8 @@ def get_crisis_helpline_info():
 
 def get_response(text, emotion):
     """Enhanced response generation with ML"""
-    text = text.lower()
+    message = AnalyzedMessage.of(text)
+    text = message.lower
     
     # Check for greetings with more friendly variations
     greeting_words = ['hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening', 'good night']
@@ -663,13 +706,13 @@ def get_response(text, emotion):
         return get_time_based_greeting()
     
     # Check for crisis - highest priority
-    if detect_crisis(text):
+    if detect_crisis(message):
         crisis_response = random.choice(responses['crisis'])
         return f"{crisis_response}\n\n{get_crisis_helpline_info()}"
     
     # If emotion is neutral, use contextual response
     if emotion == 'neutral':
-        return get_contextual_response(text, emotion, analyze_context(text))
+        return get_contextual_response(text, emotion, analyze_context(message))
     
     # Get ML-enhanced response
     response = get_ml_response(text, emotion)
@@ -679,42 +722,27 @@ def get_response(text, emotion):
     
     return response
 
-def text_to_speech(text):
+def text_to_speech(text, priority=NORMAL, profile=None):
     """Convert text to speech and return as base64 audio data"""
-    try:
-        # Create a temporary file to save the audio
-        temp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-        temp_filename = temp_file.name
-        temp_file.close()
-        
-        # Save speech to the temporary file
-        engine.save_to_file(text, temp_filename)
-        engine.runAndWait()
-        
-        # Read the file and convert to base64
-        with open(temp_filename, 'rb') as f:
-            audio_data = f.read()
-        
-        # Remove the temporary file
-        os.unlink(temp_filename)
-        
-        # Convert to base64
-        return base64.b64encode(audio_data).decode('utf-8')
-    except Exception as e:
-        print(f"Text-to-speech error: {str(e)}")
-        return None
+    return tts.text_to_speech(text, priority, profile=profile)
+
+WELCOME_MESSAGES = {
+    'morning': "🌅 Good morning! I'm your friendly mental health companion. I'm here to listen, support, and chat with you. How are you feeling today? Remember, this is a safe space to share whatever's on your mind. Take your time - I'm here for you.",
+    'afternoon': "☀️ Good afternoon! I'm so glad you're here. I'm your friendly chat buddy, ready to listen and support you. How's your day going? Feel free to share anything - the good, the bad, or the in-between. I'm here to listen without judgment.",
+    'evening': "🌙 Good evening! Welcome to our safe space! I'm here to be your friendly companion and support you. What would you like to talk about? Remember, it's okay to share whatever you're feeling - I'm here to listen and help.",
+    'night': "🌙 It's late, but I'm still here for you! Sometimes the quiet hours are the best time to talk. I'm your friendly mental health companion, ready to listen and support you. How are you feeling? Take your time - I'm here all night."
+}
 
 def get_welcome_message():
     """Get a warm, friendly welcome message"""
-    hour = datetime.datetime.now().hour
-    if 5 <= hour < 12:
-        return "🌅 Good morning! I'm your friendly mental health companion. I'm here to listen, support, and chat with you. How are you feeling today? Remember, this is a safe space to share whatever's on your mind. Take your time - I'm here for you."
-    elif 12 <= hour < 17:
-        return "☀️ Good afternoon! I'm so glad you're here. I'm your friendly chat buddy, ready to listen and support you. How's your day going? Feel free to share anything - the good, the bad, or the in-between. I'm here to listen without judgment."
-    elif 17 <= hour < 22:
-        return "🌙 Good evening! Welcome to our safe space! I'm here to be your friendly companion and support you. What would you like to talk about? Remember, it's okay to share whatever you're feeling - I'm here to listen and help."
-    else:
-        return "🌙 It's late, but I'm still here for you! Sometimes the quiet hours are the best time to talk. I'm your friendly mental health companion, ready to listen and support you. How are you feeling? Take your time - I'm here all night."
+    return WELCOME_MESSAGES[day_period(datetime.datetime.now().hour)]
+
+def canned_responses():
+    """Every fixed response text the bot can send, for pre-rendering speech"""
+    texts = [response for options in responses.values() for response in options]
+    texts += [f"{response}\n\n{get_crisis_helpline_info()}" for response in responses['crisis']]
+    texts += list(TIME_GREETINGS.values()) + list(WELCOME_MESSAGES.values())
+    return texts
 
 @app.route('/')
 def home():
@@ -726,29 +754,67 @@ def home():
 def chat():
     data = request.json
     user_input = data.get('message', '')
+    session_id = data.get('session_id')
+    session_id = str(session_id) if session_id else None
     
     # If this is the first message, send a warm welcome
     if user_input.lower() in ['', 'hi', 'hello', 'hey']:
         return jsonify({
             'response': get_welcome_message(),
             'emotion': 'neutral',
-            'is_crisis': False
+            'is_crisis': False,
+            'risk': session_risk.update(session_id, user_input)
         })
     
+    try:
+        priority = admission.priority_for(user_input)
+        response, emotion, is_crisis = admission.run(priority, process_message, user_input)
+    except Overloaded:
+        return jsonify(BUSY_RESPONSE), 503
+    
+    return jsonify({
+        'response': response,
+        'emotion': emotion,
+        'is_crisis': is_crisis,
+        'risk': session_risk.update(session_id, user_input)
+    })
+
+@app.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    """Score many messages: a JSON {"messages": [...]} body, or NDJSON lines in and out"""
+    run = lambda fn, *args: admission.run(NORMAL, fn, *args)
+    if request.mimetype == NDJSON:
+        items = read_items(request.stream)
+    else:
+        items = (request.get_json(silent=True) or {}).get('messages')
+        if not isinstance(items, list):
+            return jsonify({'error': "Expected a JSON body with a 'messages' list"}), 400
+    
+    # Large inputs stream back one result per line as they are scored
+    if request.mimetype == NDJSON or NDJSON in request.headers.get('Accept', ''):
+        # Headers are already sent when a chunk is rejected, so it becomes an error line instead of a 503
+        results = batch_scorer.stream(items, run, skip_overloaded=True)
+        return Response(stream_with_context(ndjson_lines(results)), mimetype=NDJSON)
+    try:
+        return jsonify({'results': list(batch_scorer.stream(items, run))})
+    except Overloaded:
+        return jsonify(BUSY_RESPONSE), 503
+
+def process_message(user_input):
+    """Emotion, crisis flag and response for one message"""
+    # Analyze the message once for every analyzer below
+    message = AnalyzedMessage(user_input)
+    
     # Analyze emotion
-    emotion = analyze_emotion(user_input)
+    emotion = analyze_emotion(message)
     
     # Check for crisis
-    is_crisis = detect_crisis(user_input)
+    is_crisis = detect_crisis(message)
     
     # Get response
-    response = get_response(user_input, emotion)
+    response = get_response(message, emotion)
     
-    return jsonify({
-        'response': response,
-        'emotion': emotion,
-        'is_crisis': is_crisis
-    })
+    return response, emotion, is_crisis
 
 @app.route('/voice', methods=['POST'])
 def voice():
@@ -757,39 +823,49 @@ def voice():
     
     audio_file = request.files['audio']
     
+    # Output profile for the spoken reply, e.g. ?profile=mulaw8k for mobile clients
+    try:
+        profile = requested_profile(request)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Initialize the recognizer
     recognizer = sr.Recognizer()
     
     try:
-        # Save the uploaded file temporarily
-        temp_audio = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-        audio_file.save(temp_audio.name)
-        temp_audio.close()
-        
-        # Convert speech to text
-        with sr.AudioFile(temp_audio.name) as source:
+        # Read the upload in memory; nothing is written to disk
+        with audio_source(audio_file.read()) as source:
             audio_data = recognizer.record(source)
-            text = recognizer.recognize_google(audio_data)
         
-        # Remove temporary file
-        os.unlink(temp_audio.name)
+        # Convert speech to text in the normal lane; the transcript decides the priority of the rest
+        text = admission.run(NORMAL, recognizer.recognize_google, audio_data)
         
         # Process the text
-        emotion = analyze_emotion(text)
-        is_crisis = detect_crisis(text)
-        response = get_response(text, emotion)
-        
-        # Convert response to speech
-        audio_response = text_to_speech(response)
+        priority = admission.priority_for(text)
+        response, emotion, is_crisis = admission.run(priority, process_message, text)
         
-        return jsonify({
+        reply = {
             'text': text,
             'response': response,
             'emotion': emotion,
-            'is_crisis': is_crisis,
-            'audio_response': audio_response
-        })
+            'is_crisis': is_crisis
+        }
+        
+        # Link to the speech, or convert the response to speech now
+        if wants_audio_url(request):
+            reply['audio_url'] = url_for('audio_file', token=audio_links.issue(response, priority, profile=profile))
+        else:
+            try:
+                reply['audio_response'] = text_to_speech(response, priority, profile)
+            except Overloaded:
+                # The reply is ready; only the speech waits, behind a link the client can fetch later
+                reply['audio_response'] = None
+                reply['audio_url'] = url_for('audio_file', token=audio_links.issue(response, priority, profile=profile))
+        
+        return jsonify(reply)
     
+    except Overloaded:
+        return jsonify(BUSY_RESPONSE), 503
     except sr.UnknownValueError:
         return jsonify({'error': "Could not understand the audio"}), 400
     except sr.RequestError:
@@ -797,23 +873,59 @@ def voice():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/admission', methods=['GET'])
+def admission_status():
+    """Queue depth and wait times per priority lane"""
+    return jsonify(admission.stats())
+
+@app.route('/tts', methods=['GET'])
+def tts_status():
+    """Text-to-speech queue depth, failures, synthesis latency, cache hits and audio links"""
+    return jsonify(dict(tts.stats(), links=audio_links.stats()))
+
+@app.route('/audio/<token>', methods=['GET'])
+def audio_file(token):
+    """Speech for a reply sent with ?audio=url; supports Range requests and Accept-negotiated profiles"""
+    try:
+        profile = requested_profile(request)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        result = audio_links.fetch(token, profile)
+        if result is None:
+            return jsonify({'error': 'Audio link not found or expired'}), 404
+        key, audio = result
+        return send_audio(audio, key, max_age=int(audio_links.ttl))
+    except Overloaded:
+        return jsonify(BUSY_RESPONSE), 503
+    except Exception as e:
+        print(f"Text-to-speech error: {str(e) or type(e).__name__}")
+        return jsonify({'error': 'Could not synthesize audio'}), 500
+
+@app.route('/model', methods=['GET'])
+def model_status():
+    """Current model version, background training state and published templates"""
+    return jsonify(dict(model_trainer.status(), registry=registry.stats()))
+
 def predict_emotion(text):
     """Predict emotion using ML model"""
+    return predict_emotions([text])[0]
+
+def predict_emotions(texts):
+    """Predict emotions for a batch of messages with one model call"""
     if len(conversation_history) < 10:
-        return analyze_emotion(text)
+        return [analyze_emotion(text) for text in texts]
     
-    # Transform input text
-    X = vectorizer.transform([text])
-    
-    # Get prediction and probability
-    prediction = classifier.predict(X)[0]
-    probabilities = classifier.predict_proba(X)[0]
-    confidence = max(probabilities)
-    
-    if confidence < min_confidence_threshold:
-        return analyze_emotion(text)
-    
-    return prediction
+    # One model version for the whole batch; low-confidence labels fall back to keyword analysis
+    messages = [AnalyzedMessage.of(text) for text in texts]
+    return ModelEmotions(registry.current.model, analyze_emotion, min_confidence_threshold)(messages)
+
+# Initialize the model when the app starts; replaying the conversation log needs the helpers above
+load_or_create_model()
 
 if __name__ == '__main__':
+    # Warm the speech engines before the first request
+    tts_service.start()
+    tts.prerender_in_background(canned_responses())
     app.run(debug=True) 
\ No newline at end of file
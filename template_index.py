@@ -0,0 +1,155 @@
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+
+class TemplateIndex:
+    """Past (input, response) pairs for one emotion, searchable by cosine similarity.
+
+    Template inputs are vectorized once into an L2-normalized sparse matrix
+    that is extended as templates are added. The matrix is stored by column,
+    so a query, vectorized once, is scored by reading only the columns of
+    the few terms it contains rather than every stored entry. The matrix is
+    rebuilt in one batch when a different vectorizer is passed in, e.g.
+    after the model is retrained.
+
+    ``added`` returns a new index and leaves this one untouched, sharing the
+    rows already vectorized, so a published index can be searched from many
+    threads while a writer builds its successor. The matrix cache is
+    replaced in one assignment, so concurrent searches never see it half
+    updated.
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.inputs = []
+        self.responses = []
+        # (vectorizer, query vectorizer, matrix, number of leading inputs in the matrix)
+        self._cache = None
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def add(self, user_input, response):
+        self.inputs.append(user_input)
+        self.responses.append(response)
+        self._trim()
+
+    def added(self, user_input, response):
+        """A copy of this index with one more template"""
+        index = TemplateIndex(self.max_size)
+        index.inputs = self.inputs + [user_input]
+        index.responses = self.responses + [response]
+        index._cache = self._cache
+        index._trim()
+        return index
+
+    def newest(self, size):
+        """A copy of this index with only its newest size templates"""
+        index = TemplateIndex(self.max_size)
+        index.inputs = list(self.inputs)
+        index.responses = list(self.responses)
+        index._cache = self._cache
+        index._trim(size)
+        return index
+
+    def _trim(self, size=None):
+        size = self.max_size if size is None else size
+        if size is not None and len(self.inputs) > size:
+            drop = len(self.inputs) - size
+            del self.inputs[:drop]
+            del self.responses[:drop]
+            cache = self._cache
+            if cache is not None:
+                # Rows for templates added since the last search are not in the matrix yet
+                vectorizer, query_vectorizer, matrix, rows = cache
+                self._cache = (vectorizer, query_vectorizer, matrix[drop:], rows - drop) if drop <= rows else None
+
+    def _sync(self, vectorizer):
+        inputs = self.inputs
+        cache = self._cache
+        if cache is None or cache[0] is not vectorizer:
+            cache = (vectorizer, _QueryVectorizer.for_vectorizer(vectorizer),
+                     normalize(vectorizer.transform(inputs)).tocsc(), len(inputs))
+        elif cache[3] < len(inputs):
+            new_rows = normalize(vectorizer.transform(inputs[cache[3]:]))
+            cache = cache[:2] + (sp.vstack([cache[2], new_rows], format='csc'), len(inputs))
+        else:
+            return cache
+        self._cache = cache
+        return cache
+
+    def search(self, text, vectorizer, k=1, threshold=0.0):
+        """Return up to k (response, similarity) pairs above threshold, best first"""
+        if not self.inputs:
+            return []
+        _, query_vectorizer, matrix, _ = self._sync(vectorizer)
+
+        if query_vectorizer is not None:
+            scores = _column_scores(matrix, query_vectorizer(text))
+        else:
+            scores = (matrix @ normalize(vectorizer.transform([text])).T).toarray().ravel()
+
+        candidates = np.flatnonzero(scores > threshold)
+        if k < len(candidates):
+            kth_best = -np.partition(-scores[candidates], k - 1)[k - 1]
+            candidates = candidates[scores[candidates] >= kth_best]
+        # Ties go to the oldest template, as with a stable sort
+        order = candidates[np.lexsort((candidates, -scores[candidates]))][:k]
+        responses = self.responses
+        return [(responses[i], float(scores[i])) for i in order]
+
+
+def _column_scores(matrix, query):
+    """matrix @ query for a CSC matrix and a dense query with few nonzero terms"""
+    indptr, indices, data = matrix.indptr, matrix.indices, matrix.data
+    columns = np.flatnonzero(query)
+    if not len(columns):
+        return np.zeros(matrix.shape[0])
+    spans = [slice(indptr[column], indptr[column + 1]) for column in columns]
+    rows = np.concatenate([indices[span] for span in spans])
+    weights = np.concatenate([data[span] * query[column] for span, column in zip(spans, columns)])
+    return np.bincount(rows, weights=weights, minlength=matrix.shape[0])
+
+
+class _QueryVectorizer:
+    """Dense, L2-normalized tf-idf vector for one query string.
+
+    Skips the per-call validation in ``TfidfVectorizer.transform``, which
+    costs far more than the arithmetic for a single short message.
+    """
+
+    def __init__(self, analyzer, vocabulary, idf, sublinear_tf):
+        self.analyzer = analyzer
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.sublinear_tf = sublinear_tf
+        self.n_features = len(vocabulary)
+
+    @classmethod
+    def for_vectorizer(cls, vectorizer):
+        """Return a query vectorizer, or None when the vectorizer has no vocabulary"""
+        vocabulary = getattr(vectorizer, 'vocabulary_', None)
+        if vocabulary is None or not hasattr(vectorizer, 'build_analyzer'):
+            return None
+        idf = vectorizer.idf_ if getattr(vectorizer, 'use_idf', False) else None
+        return cls(vectorizer.build_analyzer(), vocabulary, idf, getattr(vectorizer, 'sublinear_tf', False))
+
+    def __call__(self, text):
+        counts = {}
+        for term in self.analyzer(text):
+            column = self.vocabulary.get(term)
+            if column is not None:
+                counts[column] = counts.get(column, 0) + 1
+
+        vector = np.zeros(self.n_features)
+        if not counts:
+            return vector
+        columns = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        if self.sublinear_tf:
+            values = np.log(values) + 1
+        if self.idf is not None:
+            values *= self.idf[columns]
+        vector[columns] = values / np.sqrt(np.dot(values, values))
+        return vector
@@ -0,0 +1,96 @@
+"""/chat/batch must label every message exactly as /chat does, in both apps.
+
+    python -m pytest test_chat_batch.py
+"""
+import importlib
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+from admission import Overloaded
+
+MESSAGES = [
+    "I need to finish this report right now",
+    "I feel hopeless and worthless",
+    "this is terrible awful horrible",
+    "I want to die",
+    "i want to dye",
+    "I can't breathe and I want to die",
+    "I keep thinking about ending it all",
+    "Can you help me with a breathing exercise?",
+    "play me some calm music",
+    "What is depression?",
+    "how does therapy work",
+    "I am so happy today, thanks for everything",
+    "I'm anxious about my exam tomorrow",
+    "I feel so alone and nobody understands",
+    "work has been too much and I'm exhausted",
+    "hello",
+    "hey there",
+    "",
+    "ok",
+]
+
+
+@pytest.fixture(scope='module', params=['app', 'simple_app'])
+def app_module(request, tmp_path_factory):
+    # The apps keep their logs, model store and audio cache relative to the working directory
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp(request.param))
+    try:
+        yield importlib.import_module(request.param)
+    finally:
+        os.chdir(cwd)
+
+
+def test_batch_matches_chat(app_module):
+    client = app_module.app.test_client()
+    expected = []
+    for message in MESSAGES:
+        reply = client.post('/chat', json={'message': message}).json
+        expected.append((message, reply['emotion'], reply['is_crisis']))
+
+    results = client.post('/chat/batch', json={'messages': MESSAGES}).json['results']
+    assert [(message, result['emotion'], result['is_crisis'])
+            for message, result in zip(MESSAGES, results)] == expected
+
+
+def test_large_batch_in_worker_processes(app_module, monkeypatch):
+    client = app_module.app.test_client()
+    expected = client.post('/chat/batch', json={'messages': MESSAGES}).json['results']
+
+    def in_parent(chunk, start=0):
+        raise AssertionError("chunk scored in the app process")
+
+    monkeypatch.setattr(app_module.batch_scorer, 'chunk_size', 4)
+    monkeypatch.setattr(app_module.batch_scorer, 'min_batch', 8)
+    monkeypatch.setattr(app_module.batch_scorer, 'workers', 2)
+    monkeypatch.setattr(app_module.batch_scorer, 'score', in_parent)
+    try:
+        # The apps start the pool at import; a single-core host starts none, so force two workers
+        app_module.batch_scorer.start()
+        results = client.post('/chat/batch', json={'messages': MESSAGES}).json['results']
+    finally:
+        app_module.batch_scorer.close()
+    assert results == expected
+
+
+def test_ndjson_stream_reports_rejected_chunks(app_module, monkeypatch):
+    client = app_module.app.test_client()
+
+    def rejected(priority, fn, *args, **kwargs):
+        raise Overloaded("normal queue is full")
+
+    monkeypatch.setattr(app_module.batch_scorer, 'chunk_size', 2)
+    monkeypatch.setattr(app_module.admission, 'run', rejected)
+    response = client.post('/chat/batch', data='\n'.join(json.dumps(m) for m in MESSAGES[:5]),
+                           content_type='application/x-ndjson')
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert response.status_code == 200
+    assert [(line['index'], line['count']) for line in lines] == [(0, 2), (2, 2), (4, 1)]
+    assert all(line['error'] == "normal queue is full" for line in lines)
@@ -0,0 +1,35 @@
+"""Shortcut expansion must leave ordinary words alone.
+
+    python -m pytest test_text_normalizer.py
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+from text_normalizer import normalize
+
+
+@pytest.mark.parametrize('text', [
+    "i feel ill",
+    "my mood is low",
+    "i need extra help",
+    "the basic things feel hard",
+    "the room is lit",
+    "i bet it will be fine",
+    "i wear a cap",
+    "the goat on the farm",
+    "good vibes",
+    "slay the dragon",
+    "that was dope",
+])
+def test_real_words_unchanged(text):
+    assert normalize(text) == text
+
+
+def test_shortcuts_expanded():
+    assert normalize("idk what to do rn tbh") == "I don't know what to do right now to be honest"
+    assert normalize("no cap im tired") == "no lie I am tired"
@@ -0,0 +1,96 @@
+import re
+
+# Chat slang and shortcuts expanded before emotion classification. Words that are also ordinary
+# English ("ill", "mood", "lit", ...) are left out: expanding them would rewrite what users say
+SHORTCUTS = {
+    "u": "you", "ur": "your", "r": "are", "rn": "right now",
+    "im": "I am", "ive": "I have", "dont": "do not",
+    "cant": "cannot", "wont": "will not", "idk": "I don't know",
+    "pls": "please", "bc": "because", "cuz": "because",
+    "af": "very", "lol": "laughing out loud", "brb": "be right back",
+    "tbh": "to be honest", "lmk": "let me know", "rofl": "rolling on floor laughing",
+    "ngl": "not gonna lie", "gtg": "got to go", "ttyl": "talk to you later",
+    "fomo": "fear of missing out", "imo": "in my opinion", "smh": "shaking my head",
+    "finna": "going to", "lowkey": "kind of", "highkey": "really", "sus": "suspicious",
+    "deadass": "seriously", "no cap": "no lie", "yass": "yes", "boujee": "fancy"
+}
+
+_WORD_RE = re.compile(r'\w+')
+_PHRASE_RE = re.compile(r'\w+(?: \w+)*')
+_END = object()
+
+
+class ShortcutNormalizer:
+    """Expand shortcuts in a single pass over the text.
+
+    Shortcuts are stored in a word-level trie, so each word of the message
+    costs one dict lookup per phrase word regardless of how many shortcuts
+    are loaded. Matching is case-insensitive, whole-word only (the same as
+    ``\\bshortcut\\b``) and prefers the longest phrase at each position, so
+    "no cap" wins over "cap".
+    """
+
+    def __init__(self, shortcuts=None):
+        self._trie = {}
+        self.size = 0
+        self.update(SHORTCUTS if shortcuts is None else shortcuts)
+
+    def add(self, shortcut, full_form):
+        shortcut = shortcut.strip().lower()
+        if not _PHRASE_RE.fullmatch(shortcut):
+            raise ValueError(f"Shortcut must be words separated by single spaces: {shortcut!r}")
+
+        node = self._trie
+        for word in shortcut.split(' '):
+            node = node.setdefault(word, {})
+        if _END not in node:
+            self.size += 1
+        node[_END] = full_form.strip()
+
+    def update(self, shortcuts):
+        for shortcut, full_form in shortcuts.items():
+            self.add(shortcut, full_form)
+
+    def normalize(self, text):
+        words = list(_WORD_RE.finditer(text))
+        if not words:
+            return text.strip()
+
+        parts = []
+        last = 0
+        i = 0
+        while i < len(words):
+            node = self._trie
+            match = None
+            j = i
+            while j < len(words):
+                # Phrase words must be separated by exactly one space
+                if j > i and text[words[j - 1].end():words[j].start()] != ' ':
+                    break
+                node = node.get(words[j].group().lower())
+                if node is None:
+                    break
+                if _END in node:
+                    match = (j, node[_END])
+                j += 1
+
+            if match is None:
+                i += 1
+                continue
+
+            end, full_form = match
+            parts.append(text[last:words[i].start()])
+            parts.append(full_form)
+            last = words[end].end()
+            i = end + 1
+
+        parts.append(text[last:])
+        return ''.join(parts).strip()
+
+
+default_normalizer = ShortcutNormalizer()
+
+
+def normalize(text):
+    """Expand chat shortcuts using the shared normalizer"""
+    return default_normalizer.normalize(text)
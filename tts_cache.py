@@ -0,0 +1,284 @@
+import argparse
+import base64
+import hashlib
+import importlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from admission import NORMAL, Overloaded
+from audio_profiles import DEFAULT_PROFILE, encode
+
+
+def cache_key(text, rate, volume, voice, profile=None):
+    """Content address of the audio for text spoken with these settings, in an output profile"""
+    parts = [text, rate, volume, voice] + ([profile] if profile not in (None, DEFAULT_PROFILE) else [])
+    return hashlib.sha256(json.dumps(parts).encode('utf-8')).hexdigest()
+
+
+class AudioCache:
+    """Synthesized audio by cache key: an LRU in memory over files on disk.
+
+    The memory tier holds at most ``max_bytes`` of audio and drops the
+    least recently used entries beyond that. Entries put with ``persist``
+    (pre-rendered canned responses) are also written to ``directory`` (one
+    WAV per key, written to a temp file and renamed into place), so they
+    survive restarts and are shared by processes using the same directory;
+    everything else, such as speech for a user's own text, stays in memory
+    only. A disk hit is promoted to memory and has its mtime refreshed;
+    once the directory passes ``max_disk_bytes`` the files with the oldest
+    mtimes are removed.
+    """
+
+    def __init__(self, directory='tts_cache', max_bytes=64 * 2**20, max_disk_bytes=1024 * 2**20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.disk_bytes = self._disk_usage() if directory else 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.wav')
+
+    def _files(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith('.wav'):
+                    yield os.path.join(root, name)
+
+    def _disk_usage(self):
+        total = 0
+        for path in self._files():
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
+
+    def get(self, key):
+        """Audio bytes for key, or None"""
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+        audio = self._read(key) if self.directory else None
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, audio)
+        return audio
+
+    def put(self, key, audio, persist=False):
+        with self._lock:
+            self._remember(key, audio)
+        if persist and self.directory:
+            self._write(key, audio)
+
+    def __contains__(self, key):
+        return key in self._entries or self.persisted(key)
+
+    def persisted(self, key):
+        """Whether key is on disk, or in memory when the cache has no directory"""
+        if not self.directory:
+            return key in self._entries
+        return os.path.exists(self._path(key))
+
+    def _remember(self, key, audio):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.memory_bytes -= len(previous)
+        if len(audio) > self.max_bytes:
+            return
+        self._entries[key] = audio
+        self.memory_bytes += len(audio)
+        while self.memory_bytes > self.max_bytes:
+            _, dropped = self._entries.popitem(last=False)
+            self.memory_bytes -= len(dropped)
+
+    def _read(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                audio = f.read()
+            os.utime(path)
+            return audio
+        except OSError:
+            return None
+
+    def _write(self, key, audio):
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(audio)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Error writing audio cache entry: {str(e)}")
+            return
+        with self._lock:
+            self.disk_bytes += len(audio)
+            over = self.max_disk_bytes is not None and self.disk_bytes > self.max_disk_bytes
+        if over:
+            self._prune()
+
+    def _prune(self):
+        """Remove the least recently used files until the directory is at 90% of max_disk_bytes"""
+        files = []
+        for path in self._files():
+            try:
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+            except OSError:
+                pass
+        total = sum(size for _, size, _ in files)
+        target = self.max_disk_bytes * 0.9
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self.disk_bytes = total
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'memory_bytes': self.memory_bytes,
+                'disk_bytes': self.disk_bytes,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses
+            }
+
+
+class CachedTTS:
+    """TTSService in front of an AudioCache, with the same interface.
+
+    Audio is looked up by ``cache_key`` of the text and the settings it
+    would be spoken with; only misses reach the worker pool. Concurrent
+    misses for the same key wait for one synthesis instead of each
+    starting their own. Audio in another output ``profile`` is encoded
+    from the cached synthesis and cached under its own key. Only audio
+    synthesized with ``persist`` (``prerender``) goes to the disk tier.
+    """
+
+    def __init__(self, service, cache=None):
+        self.service = service
+        self.cache = cache if cache is not None else AudioCache()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def key_for(self, text, rate=None, volume=None, voice=None, profile=None):
+        service = self.service
+        return cache_key(text, service.rate if rate is None else rate, service.volume if volume is None else volume,
+                         service.voice if voice is None else voice, profile)
+
+    def synthesize(self, text, rate=None, volume=None, voice=None, priority=NORMAL, profile=None, persist=False):
+        """WAV bytes for text in profile, from the cache when it has them"""
+        key = self.key_for(text, rate, volume, voice, profile)
+        audio = self.cache.get(key)
+        if audio is not None:
+            if persist:
+                self.cache.put(key, audio, persist)
+            return audio
+        if profile not in (None, DEFAULT_PROFILE):
+            audio = encode(self.synthesize(text, rate, volume, voice, priority, persist=persist), profile)
+            self.cache.put(key, audio, persist)
+            return audio
+
+        with self._lock:
+            waiter = self._in_flight.get(key)
+            if waiter is None:
+                self._in_flight[key] = done = threading.Event()
+        if waiter is not None:
+            waiter.wait(self.service.timeout)
+            audio = self.cache.get(key)
+            if audio is not None:
+                if persist:
+                    self.cache.put(key, audio, persist)
+                return audio
+            return self.service.synthesize(text, rate, volume, voice, priority)
+
+        try:
+            audio = self.service.synthesize(text, rate, volume, voice, priority)
+            self.cache.put(key, audio, persist)
+            return audio
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            done.set()
+
+    def text_to_speech(self, text, priority=NORMAL, **settings):
+        """Base64 WAV audio for text, or None if synthesis fails"""
+        try:
+            return base64.b64encode(self.synthesize(text, priority=priority, **settings)).decode('utf-8')
+        except Overloaded:
+            raise
+        except Exception as e:
+            print(f"Text-to-speech error: {str(e) or type(e).__name__}")
+            return None
+
+    def prerender(self, texts, **settings):
+        """Synthesize every text not on disk yet, one at a time, and keep it there; returns (rendered, cached, failed)"""
+        rendered = cached = failed = 0
+        for text in dict.fromkeys(texts):
+            if self.cache.persisted(self.key_for(text, **settings)):
+                cached += 1
+                continue
+            try:
+                self.synthesize(text, persist=True, **settings)
+                rendered += 1
+            except Exception as e:
+                print(f"Error pre-rendering speech: {str(e) or type(e).__name__}")
+                failed += 1
+        return rendered, cached, failed
+
+    def prerender_in_background(self, texts, **settings):
+        """Start prerender in a daemon thread, so startup does not wait for it"""
+        def run():
+            started = time.perf_counter()
+            rendered, cached, failed = self.prerender(texts, **settings)
+            print(f"Pre-rendered {rendered} responses ({cached} already cached, {failed} failed) "
+                  f"in {time.perf_counter() - started:.1f}s")
+        thread = threading.Thread(target=run, name='tts-prerender', daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        return dict(self.service.stats(), cache=self.cache.stats())
+
+    def close(self):
+        self.service.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pre-render an app's canned responses into the audio cache")
+    parser.add_argument('app', choices=['app', 'simple_app'], help="module whose canned_responses() to render")
+    args = parser.parse_args()
+
+    module = importlib.import_module(args.app)
+    texts = module.canned_responses()
+    started = time.perf_counter()
+    rendered, cached, failed = module.tts.prerender(texts)
+    print(f"{len(texts)} canned responses: {rendered} rendered, {cached} already cached, {failed} failed "
+          f"in {time.perf_counter() - started:.1f}s")
+    print(json.dumps(module.tts.cache.stats()))
@@ -0,0 +1,271 @@
+import base64
+import multiprocessing
+import queue
+import threading
+import time
+
+import pyttsx3
+
+from admission import CRISIS, NORMAL, Overloaded
+from audio_buffer import read_file, spooled_path
+from metrics import LatencyHistogram
+
+DEFAULT_RATE = 150  # Speed of speech
+DEFAULT_VOLUME = 0.9
+
+# Per worker process: its own engine and the settings last applied to it
+_engine = None
+_settings = None
+
+
+def _init_worker(engine_factory, rate, volume, voice):
+    global _engine
+    try:
+        _engine = engine_factory()
+        _configure(rate, volume, voice)
+        # The first synthesis loads the voice data; pay for it before real jobs arrive
+        _render("Ready.")
+    except Exception as e:
+        print(f"Error initializing text-to-speech worker: {str(e)}")
+        _engine = None
+
+
+def _configure(rate, volume, voice):
+    global _settings
+    if _settings != (rate, volume, voice):
+        _engine.setProperty('rate', rate)
+        _engine.setProperty('volume', volume)
+        if voice is not None:
+            _engine.setProperty('voice', voice)
+        _settings = (rate, volume, voice)
+
+
+def _render(text):
+    # pyttsx3 only writes to a path; spool it on tmpfs and read it straight back
+    with spooled_path('.wav') as path:
+        _engine.save_to_file(text, path)
+        _engine.runAndWait()
+        return read_file(path)
+
+
+def _synthesize(text, rate, volume, voice):
+    if _engine is None:
+        raise RuntimeError("Text-to-speech engine not available")
+    started = time.perf_counter()
+    _configure(rate, volume, voice)
+    audio = _render(text)
+    return audio, time.perf_counter() - started
+
+
+def _serve(conn, engine_factory, rate, volume, voice):
+    # Worker process: one job at a time from the pipe, until None or the parent goes away
+    _init_worker(engine_factory, rate, volume, voice)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        conn.send(('started', None))
+        try:
+            conn.send(('done', _synthesize(*job)))
+        except Exception as e:
+            conn.send(('error', str(e) or type(e).__name__))
+
+
+class _Worker:
+    """A worker process and the parent's end of its pipe"""
+
+    def __init__(self, engine_factory, rate, volume, voice):
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_serve, args=(child, engine_factory, rate, volume, voice),
+                                               daemon=True)
+        self.process.start()
+        child.close()
+
+    def run(self, job, timeout):
+        """(audio, seconds) for job; timeout applies from the moment the worker picks it up"""
+        self.conn.send(job)
+        for _ in ('started', 'done'):
+            if not self.conn.poll(timeout):
+                raise TimeoutError(f"text-to-speech job did not finish within {timeout}s")
+            kind, value = self.conn.recv()
+            if kind == 'error':
+                raise RuntimeError(value)
+        return value
+
+    def stop(self, wait=0):
+        if wait:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+            self.process.join(wait)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+
+
+class TTSService:
+    """Speech synthesis in worker processes.
+
+    pyttsx3 engines cannot be shared between threads and ``runAndWait``
+    blocks for the whole synthesis, so each worker process owns one engine
+    and jobs return WAV bytes. Workers start, and warm up their engines, on
+    first use or ``start``, not when the service is created. ``workers``
+    processes serve every job and ``crisis_workers`` more are reserved for
+    crisis jobs, which take a free shared worker when there is one and
+    otherwise wait only behind other crisis jobs. At most
+    ``workers + max_queue`` jobs are pending; beyond that normal jobs raise
+    ``Overloaded`` (crisis jobs are always accepted). A job that runs for
+    more than ``timeout`` seconds, not counting its wait for a worker,
+    raises ``TimeoutError``; its worker is assumed hung and is replaced,
+    and jobs running in other workers are not affected.
+    """
+
+    def __init__(self, workers=2, max_queue=16, timeout=30.0, rate=DEFAULT_RATE, volume=DEFAULT_VOLUME,
+                 voice=None, engine_factory=pyttsx3.init, crisis_workers=1):
+        self.workers = workers
+        self.crisis_workers = crisis_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.rate = rate
+        self.volume = volume
+        self.voice = voice
+        self.engine_factory = engine_factory
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.restarts = 0
+        self.latency = LatencyHistogram(lowest=1e-4, highest=120.0)
+        self.synthesis = LatencyHistogram(lowest=1e-4, highest=120.0)
+        self._lock = threading.Lock()
+        self._started = False
+        self._live = set()
+        self._idle = {NORMAL: queue.Queue(), CRISIS: queue.Queue()}
+
+    def _spawn(self):
+        worker = _Worker(self.engine_factory, self.rate, self.volume, self.voice)
+        self._live.add(worker)
+        return worker
+
+    def start(self):
+        """Start the worker processes; the first synthesize does this if needed"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            for lane, count in ((NORMAL, self.workers), (CRISIS, self.crisis_workers)):
+                for _ in range(count):
+                    self._idle[lane].put(self._spawn())
+
+    def _acquire(self, priority):
+        if priority == CRISIS and self.crisis_workers:
+            try:
+                return NORMAL, self._idle[NORMAL].get_nowait()
+            except queue.Empty:
+                return CRISIS, self._idle[CRISIS].get()
+        return NORMAL, self._idle[NORMAL].get()
+
+    def _replace(self, lane, worker):
+        # A hung or dead engine never answers, so its process is killed and a fresh one takes its place
+        worker.stop()
+        with self._lock:
+            self._live.discard(worker)
+            self.restarts += 1
+            replacement = self._spawn() if self._started else None
+        if replacement is not None:
+            self._idle[lane].put(replacement)
+
+    def synthesize(self, text, rate=None, volume=None, voice=None, priority=NORMAL):
+        """WAV bytes for text, synthesized in a worker process"""
+        with self._lock:
+            if priority != CRISIS and self.pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise Overloaded("text-to-speech queue is full")
+            self.pending += 1
+        self.start()
+
+        started = time.perf_counter()
+        lane, worker = None, None
+        try:
+            lane, worker = self._acquire(priority)
+            audio, seconds = worker.run((text, self.rate if rate is None else rate,
+                                         self.volume if volume is None else volume,
+                                         self.voice if voice is None else voice), self.timeout)
+        except TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            self._replace(lane, worker)
+            raise
+        except (EOFError, OSError):
+            with self._lock:
+                self.failed += 1
+            self._replace(lane, worker)
+            raise RuntimeError("text-to-speech worker exited")
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            if worker is not None:
+                self._idle[lane].put(worker)
+            raise
+        else:
+            self._idle[lane].put(worker)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+        self.latency.record(time.perf_counter() - started)
+        self.synthesis.record(seconds)
+        with self._lock:
+            self.completed += 1
+        return audio
+
+    def text_to_speech(self, text, priority=NORMAL, **settings):
+        """Base64 WAV audio for text, or None if synthesis fails"""
+        try:
+            return base64.b64encode(self.synthesize(text, priority=priority, **settings)).decode('utf-8')
+        except Overloaded:
+            raise
+        except Exception as e:
+            print(f"Text-to-speech error: {str(e) or type(e).__name__}")
+            return None
+
+    def stats(self):
+        """Queue depth, outcomes and latency; synthesis is time spent in the engine"""
+        with self._lock:
+            pending = self.pending
+            counts = {
+                'completed': self.completed,
+                'failed': self.failed,
+                'timeouts': self.timeouts,
+                'rejected': self.rejected,
+                'restarts': self.restarts
+            }
+        return dict({
+            'workers': self.workers,
+            'crisis_workers': self.crisis_workers,
+            'pending': pending,
+            'queued': max(0, pending - self.workers - self.crisis_workers),
+            'max_queue': self.max_queue,
+            'latency': self.latency.summary(),
+            'synthesis': self.synthesis.summary()
+        }, **counts)
+
+    def close(self):
+        with self._lock:
+            self._started = False
+            workers, self._live = self._live, set()
+            self._idle = {NORMAL: queue.Queue(), CRISIS: queue.Queue()}
+        for worker in workers:
+            worker.stop(wait=5)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,20 +1,23 @@
 import speech_recognition as sr
-import pyttsx3
 import wave
 import io
-import base64
-import os
-import tempfile
+from admission import NORMAL
+from audio_buffer import audio_source
+from tts_service import TTSService, DEFAULT_RATE, DEFAULT_VOLUME
+from tts_cache import CachedTTS
+from audio_profiles import PROFILES
 
 class VoiceHandler:
-    def __init__(self):
+    def __init__(self, tts=None):
         try:
             self.recognizer = sr.Recognizer()
-            self.engine = pyttsx3.init()
             
-            # Configure the text-to-speech engine
-            self.engine.setProperty('rate', 150)  # Speed of speech
-            self.engine.setProperty('volume', 0.9)  # Volume level
+            # Speech is synthesized by the TTS worker pool, each worker with its own engine
+            self.tts = tts or CachedTTS(TTSService())
+            # Output profiles clients can ask for: native WAV, 16/8 kHz PCM, 8 kHz mu-law or IMA ADPCM
+            self.profiles = list(PROFILES)
+            self.rate = DEFAULT_RATE
+            self.volume = DEFAULT_VOLUME
             
             # Test the recognizer
             self.recognizer.energy_threshold = 4000  # Adjust for ambient noise
@@ -27,26 +30,16 @@ class VoiceHandler:
 
     def speech_to_text(self, audio_data):
         try:
-            # Create a temporary file to save the audio
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-            audio_data.save(temp_file.name)
-            temp_file.close()
-            
-            # Process the audio file
-            with sr.AudioFile(temp_file.name) as source:
+            # Read the upload into memory; no temporary file to write, reopen or leak
+            with audio_source(audio_data.read()) as source:
                 # Adjust for ambient noise
                 self.recognizer.adjust_for_ambient_noise(source)
                 
                 # Record the audio
                 audio = self.recognizer.record(source)
-                
-                # Recognize speech using Google Speech Recognition
-                text = self.recognizer.recognize_google(audio)
-                
-                # Clean up the temporary file
-                os.unlink(temp_file.name)
-                
-                return text
+            
+            # Recognize speech using Google Speech Recognition
+            return self.recognizer.recognize_google(audio)
         except sr.UnknownValueError:
             return "Sorry, I couldn't understand that."
         except sr.RequestError:
@@ -55,38 +48,14 @@ class VoiceHandler:
             print(f"Speech recognition error: {str(e)}")
             return f"An error occurred: {str(e)}"
 
-    def text_to_speech(self, text):
-        try:
-            # Create a temporary file to save the audio
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-            temp_filename = temp_file.name
-            temp_file.close()
-            
-            # Save speech to the temporary file
-            self.engine.save_to_file(text, temp_filename)
-            self.engine.runAndWait()
-            
-            # Read the file and convert to base64
-            with open(temp_filename, 'rb') as f:
-                audio_data = f.read()
-            
-            # Remove the temporary file
-            os.unlink(temp_filename)
-            
-            # Convert to base64
-            return base64.b64encode(audio_data).decode('utf-8')
-        except Exception as e:
-            print(f"Text-to-speech error: {str(e)}")
-            return None
+    def text_to_speech(self, text, priority=NORMAL, profile=None):
+        return self.tts.text_to_speech(text, priority=priority, rate=self.rate, volume=self.volume, profile=profile)
 
     def adjust_voice_settings(self, rate=None, volume=None):
         """
         Adjust the voice settings for text-to-speech
         """
-        try:
-            if rate is not None:
-                self.engine.setProperty('rate', rate)
-            if volume is not None:
-                self.engine.setProperty('volume', volume)
-        except Exception as e:
-            print(f"Error adjusting voice settings: {str(e)}") 
\ No newline at end of file
+        if rate is not None:
+            self.rate = rate
+        if volume is not None:
+            self.volume = volume